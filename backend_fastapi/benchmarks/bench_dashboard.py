@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Web 自动化仪表板接口基准测试
+向 automation 数据库灌入指定数量的执行记录（默认 100 万），重建执行日汇总后对 get_dashboard_data 计时
+
+运行方式（需可连接 Config 中配置的 automation 数据库，灌入的数据在结束时删除，--keep 保留）:
+    python -m backend_fastapi.benchmarks.bench_dashboard --executions 1000000 --runs 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from backend_fastapi.db.session import AutomationSessionLocal, AutomationSessionLocalSync, automation_engine
+from backend_fastapi.routes.AutomationPlatform.WebAutomation.WebAutomationDashboard_Router import get_dashboard_data
+from backend_fastapi.services.execution_stats_service import ExecutionStatsService
+from backend_fastapi.utils.LogManeger import DatabaseLogHandler
+
+BENCH_MARKER = 'bench_dashboard'
+INSERT_BATCH_SIZE = 5000
+# 模拟真实数据：detailed_log 为较大的文本，验证仪表板不会读取它
+DETAILED_LOG_SIZE = 2048
+STATUSES = ['Passed', 'Passed', 'Passed', 'Failed', 'Error', 'Cancelled']
+
+
+def seed(connection, executions, projects, days):
+    """
+    灌入基准数据：1 个产品、projects 个自动化项目、executions 条执行记录（结束时间均匀分布在最近 days 天）
+    :return: (产品ID, 自动化项目ID列表, 最早结束日期)
+    """
+    now = datetime.now()
+    packages = [f'{BENCH_MARKER}_pkg_{i}' for i in range(10)]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO projects (product_id, product_package_name, product_address, is_automated, created_at) "
+            "VALUES (%s, %s, %s, %s, NOW())",
+            (BENCH_MARKER, BENCH_MARKER, '', '是')
+        )
+        product_id = cursor.lastrowid
+        ap_ids = []
+        for i in range(projects):
+            ap_packages = random.sample(packages, 2)
+            cursor.execute(
+                "INSERT INTO automation_projects (process_name, product_ids, project_id, product_package_names, created_at, updated_at) "
+                "VALUES (%s, %s, %s, %s, NOW(), NOW())",
+                (f'{BENCH_MARKER}_{i}', '[]', product_id, json.dumps(ap_packages))
+            )
+            ap_ids.append(cursor.lastrowid)
+            cursor.executemany(
+                "INSERT INTO automation_project_products (automation_project_id, product_package_name) VALUES (%s, %s)",
+                [(ap_ids[-1], pkg) for pkg in ap_packages]
+            )
+    connection.commit()
+
+    detailed_log = 'x' * DETAILED_LOG_SIZE
+    sql = (
+        "INSERT INTO automation_executions (project_id, process_name, product_ids, status, start_time, end_time, detailed_log, executed_by) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+    )
+    started = time.perf_counter()
+    for offset in range(0, executions, INSERT_BATCH_SIZE):
+        rows = []
+        for _ in range(min(INSERT_BATCH_SIZE, executions - offset)):
+            end_time = now - timedelta(seconds=random.randint(0, days * 86400))
+            rows.append((
+                random.choice(ap_ids), BENCH_MARKER, '[]', random.choice(STATUSES),
+                end_time - timedelta(seconds=random.randint(5, 600)), end_time, detailed_log, BENCH_MARKER
+            ))
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        connection.commit()
+        done = offset + len(rows)
+        if done % (INSERT_BATCH_SIZE * 20) == 0 or done == executions:
+            print(f"  已灌入 {done}/{executions} 条执行记录 ({time.perf_counter() - started:.0f}s)")
+    return product_id, ap_ids, (now - timedelta(days=days)).date()
+
+
+def cleanup(connection, product_id, ap_ids):
+    """删除基准数据及其日汇总"""
+    with connection.cursor() as cursor:
+        placeholders = ','.join(['%s'] * len(ap_ids))
+        cursor.execute(f"DELETE FROM automation_execution_daily_stats WHERE automation_project_id IN ({placeholders})", ap_ids)
+        # 分批删除，避免单个大事务
+        while cursor.execute(f"DELETE FROM automation_executions WHERE project_id IN ({placeholders}) LIMIT 50000", ap_ids):
+            connection.commit()
+        cursor.execute(f"DELETE FROM automation_project_products WHERE automation_project_id IN ({placeholders})", ap_ids)
+        cursor.execute(f"DELETE FROM automation_projects WHERE id IN ({placeholders})", ap_ids)
+        cursor.execute("DELETE FROM projects WHERE id = %s", (product_id,))
+    connection.commit()
+
+
+async def time_dashboard(runs):
+    """调用仪表板接口 runs 次（先预热一次），返回每次耗时（毫秒）"""
+    timings = []
+    try:
+        for i in range(runs + 1):
+            async with AutomationSessionLocal() as db:
+                start = time.perf_counter()
+                result = await get_dashboard_data(db)
+                elapsed = (time.perf_counter() - start) * 1000
+            if result.get('code') != 200:
+                raise RuntimeError(result.get('msg'))
+            if i > 0:
+                timings.append(elapsed)
+    finally:
+        await automation_engine.dispose()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Web 自动化仪表板接口耗时')
+    parser.add_argument('--executions', type=int, default=1000000, help='灌入的执行记录数')
+    parser.add_argument('--projects', type=int, default=200, help='灌入的自动化项目数')
+    parser.add_argument('--days', type=int, default=365, help='执行结束时间分布的天数')
+    parser.add_argument('--runs', type=int, default=20, help='计时次数')
+    parser.add_argument('--keep', action='store_true', help='保留灌入的数据')
+    args = parser.parse_args()
+
+    connection = DatabaseLogHandler().get_connection()
+    print(f"灌入 {args.executions} 条执行记录...")
+    product_id, ap_ids, first_day = seed(connection, args.executions, args.projects, args.days)
+    try:
+        started = time.perf_counter()
+        db = AutomationSessionLocalSync()
+        try:
+            ExecutionStatsService.rebuild_sync(db, first_day)
+        finally:
+            db.close()
+        print(f"重建执行日汇总耗时 {time.perf_counter() - started:.1f}s")
+
+        timings = asyncio.run(time_dashboard(args.runs))
+        p95 = sorted(timings)[max(int(len(timings) * 0.95) - 1, 0)]
+        print(f"get_dashboard_data: 中位数 {statistics.median(timings):.1f}ms, P95 {p95:.1f}ms, 最大 {max(timings):.1f}ms (目标 < 50ms)")
+    finally:
+        if not args.keep:
+            cleanup(connection, product_id, ap_ids)
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
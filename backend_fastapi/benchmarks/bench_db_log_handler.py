@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+数据库日志处理器基准测试
+对比逐行写入的 DatabaseLogHandler 与批量异步写入的 BatchedDatabaseLogHandler 的吞吐量（行/秒）
+
+运行方式（需可连接 Config 中配置的 automation 数据库）:
+    python -m backend_fastapi.benchmarks.bench_db_log_handler --lines 2000 --threads 4
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+from backend_fastapi.utils.LogManeger import (
+    DatabaseLogHandler,
+    BatchedDatabaseLogHandler,
+    LOG_FORMAT,
+    LOG_DATE_FORMAT,
+)
+
+
+def _create_execution(connection):
+    """创建一条临时执行记录，返回执行ID"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO automation_executions (process_name, product_ids, status, start_time) "
+            "VALUES (%s, %s, %s, NOW())",
+            ('bench_db_log_handler', '[]', 'Benchmark')
+        )
+        execution_id = cursor.lastrowid
+    connection.commit()
+    return execution_id
+
+
+def _drop_execution(connection, execution_id):
+    """删除临时执行记录及其方法级日志、日志行"""
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM automation_execut_method_logs WHERE execution_id = %s", (execution_id,))
+        cursor.execute("DELETE FROM automation_execution_log_lines WHERE execution_id = %s", (execution_id,))
+        cursor.execute("DELETE FROM automation_executions WHERE id = %s", (execution_id,))
+    connection.commit()
+
+
+def run_handler(handler, execution_id, lines, threads):
+    """
+    使用指定处理器写入日志并计时
+    :param handler: 数据库日志处理器
+    :param execution_id: 执行ID
+    :param lines: 每个线程写入的行数
+    :param threads: 并发线程数（模拟并发浏览器）
+    :return: (总行数, 耗时秒)
+    """
+    logger = logging.getLogger(f'bench.{type(handler).__name__}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+    handler.set_execution_id(execution_id)
+    logger.addHandler(handler)
+
+    def worker(index):
+        for i in range(lines):
+            logger.info(f"[test_bench_{index}] 开始测试步骤{i % 20} 的操作 line={i}")
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    # 计时包含把队列中剩余日志全部落库的时间
+    handler.flush()
+    elapsed = time.perf_counter() - start
+
+    logger.removeHandler(handler)
+    handler.close()
+    return lines * threads, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='数据库日志处理器吞吐量对比')
+    parser.add_argument('--lines', type=int, default=1000, help='每个线程写入的日志行数')
+    parser.add_argument('--threads', type=int, default=4, help='并发写入线程数')
+    args = parser.parse_args()
+
+    connection = DatabaseLogHandler().get_connection()
+    try:
+        for handler_cls in (DatabaseLogHandler, BatchedDatabaseLogHandler):
+            execution_id = _create_execution(connection)
+            try:
+                total, elapsed = run_handler(handler_cls(), execution_id, args.lines, args.threads)
+                print(f"{handler_cls.__name__:<28} {total} 行, 耗时 {elapsed:.2f}s, {total / elapsed:,.0f} 行/秒")
+            finally:
+                _drop_execution(connection, execution_id)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,499 @@
+# -*- coding: utf-8 -*-
+"""
+日志解析器基准测试
+对比逐行多次正则匹配的旧解析逻辑与单次遍历、预编译正则的 AutomationLogParser：
+1. 生成指定行数的模拟执行日志（多方法、多步骤、截图、并发、pytest 总结）
+2. 校验全量解析与按随机块增量 feed 的结果与旧逻辑完全一致
+3. 输出两者的解析耗时与加速比
+
+运行方式（无需数据库）:
+    python -m backend_fastapi.benchmarks.bench_log_parser --lines 100000
+"""
+
+import argparse
+import html
+import json
+import random
+import re
+import time
+import uuid
+
+from backend_fastapi.utils.UitilTools import AutomationLogParser, UitilTools
+
+
+def legacy_parse_automation_log(log_content, is_error_log=False):
+    """
+    旧版日志解析逻辑（逐行执行十余次正则匹配），仅作为基准对照与结果一致性校验使用
+    :param log_content: 日志内容
+    :param is_error_log: 是否为错误日志模式（直接返回所有内容作为单个步骤的日志）
+    """
+    if not log_content:
+        return {
+            'testStepsCount': 0,
+            'testMethodsCount': 0,
+            'screenshotsCount': 0,
+            'testSteps': [],
+            'initLogs': [],
+            'endLogs': [],
+            'screenshots': []
+        }
+
+    lines = log_content.split('\n')
+
+    # 错误日志模式特殊处理
+    if is_error_log:
+        # 简单的 HTML 转义处理，保留换行
+        formatted_logs = [html.escape(line) for line in lines]
+        return {
+            'testStepsCount': 0,
+            'testMethodsCount': 0,
+            'screenshotsCount': 0,
+            'testSteps': [{
+                'id': str(uuid.uuid4()),
+                'name': '错误详情',
+                'number': 1,
+                'status': 'error',
+                'logs': formatted_logs,
+                'method': 'error_log'
+            }],
+            'initLogs': [],
+            'endLogs': [],
+            'screenshots': []
+        }
+
+    test_steps = []
+    test_methods = set()
+    screenshots = []
+    init_logs = []
+    end_logs = []
+
+    current_step = None
+    current_step_logs = []
+    is_in_step = False
+    is_in_end_phase = False
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # 检测测试方法
+        method_match = re.search(r'\[(test_\w+(?:_\d+)?)\]', line)
+        if method_match:
+            test_methods.add(method_match.group(1))
+
+        # 检测测试完成标志
+        test_completion_match = re.search(r'\[(test_\w+(?:_\d+)?)\]\s+\1\s+完成', line)
+        should_switch_to_end_phase = bool(test_completion_match)
+
+        # 检测截图
+        screenshot_match = re.search(r'\[(test_\w+(?:_\d+)?)\]\s.*(?:截图成功保存|数据信息保存成功):\s*([^\s]+\.png)', line)
+        if screenshot_match:
+            screenshots.append({
+                'method': screenshot_match.group(1),
+                'path': screenshot_match.group(2),
+                'line': line
+            })
+        else:
+            # 兼容其他截图格式
+            over_abs_match = re.search(r'((?:[A-Za-z]:\\\\|/)\S*?over_test_(test_\w+(?:_\d+)?)_[^\\\\\/\s]*\.png)', line)
+            over_bare_match = re.search(r'(over_test_(test_\w+(?:_\d+)?)_[^\\\\\/\s]*\.png)', line) if not over_abs_match else None
+            request_shot_match = re.search(r'请求测试截图:\s*([^\s]+\.png)', line) if not (over_abs_match or over_bare_match) else None
+
+            matched_path = (over_abs_match and over_abs_match.group(1)) or \
+                           (over_bare_match and over_bare_match.group(1)) or \
+                           (request_shot_match and request_shot_match.group(1))
+
+            if matched_path:
+                method_in_name = re.search(r'over_test_(test_\w+(?:_\d+)?)', matched_path)
+                method_from_name = method_in_name.group(1) if method_in_name else None
+                if method_from_name:
+                    test_methods.add(method_from_name)
+                screenshots.append({
+                    'method': method_from_name,
+                    'path': matched_path,
+                    'line': line
+                })
+
+        # 原有的 test_completion_match 逻辑 (移动到 is_in_end_phase 检查之后，避免冲突)
+        if should_switch_to_end_phase:
+            # 标记进入结束阶段，当前行归入上一个步骤（如果是完成日志）或者 endLogs
+            # 这里的逻辑是：[test_HG] test_HG 完成 -> 这行还是属于 test_HG 的最后一步，或者是单独的一行
+            # 但既然标志着完成，后续的应该就是 endLogs 了
+            is_in_end_phase = True
+
+            # 尝试将这一行归入当前步骤
+            if current_step:
+                current_step['logs'].append(line)
+                # 同时也尝试归入方法日志
+                log_method_match = re.search(r'\[(test_\w+(?:_\d+)?)\]', line)
+                if log_method_match:
+                     log_method = log_method_match.group(1)
+                     if log_method in current_step['methods']:
+                         current_step['methods'][log_method].append(line)
+            else:
+                end_logs.append(line)
+
+        # 检测测试步骤开始 (三种模式)
+        # 模式0: 完整带时间戳的日志行 (2025-12-03... INFO - 开始测试步骤5 输入帐号 的操作==============)
+        # 兼容 "开始测试步骤3-4: 验证码识别与登录 (智能重试)" 这种格式
+        step_match_0 = re.search(r'开始(测试步骤[\d-]+.*?)(\s+的操作|=+$|:\s+.*$)', line)
+
+        # 模式1: "开始测试步骤1 ..." - 更加宽容的匹配，后续再清洗名称
+        # 兼容 "开始测试步骤3-4" 这种格式
+        step_match_1 = re.search(r'开始测试步骤([\d-]+)\s*(.*)', line)
+        # 模式2: "执行第1次操作: ..."
+        step_match_2 = re.search(r'执行第(\d+)次操作[:：](.*)', line)
+
+        step_match = step_match_0 or step_match_1 or step_match_2
+
+        if step_match and not is_in_end_phase:
+            if step_match_0:
+                 # 从模式0中提取步骤号 (兼容 "3-4")
+                 # 先尝试提取第一个数字作为主步骤号
+                 num_match = re.search(r'测试步骤(\d+)', step_match.group(1))
+                 step_number = int(num_match.group(1)) if num_match else 0
+
+                 # 提取完整步骤名称
+                 raw_name = step_match.group(1).strip()
+                 # 如果包含冒号，可能是 "测试步骤3-4: 验证码识别与登录"
+                 if ':' in raw_name:
+                     step_name = raw_name
+                 else:
+                     step_name = raw_name
+            elif step_match_1:
+                # 处理步骤号 "3-4" -> 3
+                step_num_str = step_match_1.group(1)
+                if '-' in step_num_str:
+                    step_number = int(step_num_str.split('-')[0])
+                else:
+                    step_number = int(step_num_str)
+
+                raw_name = step_match_1.group(2).strip()
+                # 清洗名称：去除末尾的等号
+                raw_name = re.sub(r'=+$', '', raw_name).strip()
+                # 清洗名称：去除末尾的 "的操作"
+                raw_name = re.sub(r'\s*的操作$', '', raw_name).strip()
+                step_name = raw_name
+            else:
+                step_number = int(step_match_2.group(1))
+                raw_name = step_match_2.group(2).strip()
+                # 如果冒号后面是具体操作指令，取一部分作为名称，或者直接叫"执行操作"
+                step_name = raw_name if raw_name else f"第{step_number}次操作"
+
+            existing_step = next((s for s in test_steps if s['stepNumber'] == step_number), None)
+
+            if existing_step:
+                # 如果已经存在该步骤（可能是重复进入或同一步骤的多条日志触发），切换回该步骤
+                if current_step and current_step != existing_step:
+                    # 保存当前步骤状态
+                    current_step['logs'] = current_step_logs
+                    if current_step not in test_steps:
+                        test_steps.append(current_step)
+
+                current_step = existing_step
+                current_step_logs = current_step['logs']
+                is_in_step = True
+            else:
+                # 保存上一个步骤
+                if current_step:
+                    current_step['logs'] = current_step_logs
+                    if current_step not in test_steps:
+                        test_steps.append(current_step)
+
+                current_step = {
+                    'stepNumber': step_number,
+                    'stepName': step_name,
+                    'logs': [],
+                    'methods': {}
+                }
+                current_step_logs = []
+                is_in_step = True
+                test_steps.append(current_step)
+
+        # 检测并发执行信息
+        concurrent_match = re.search(r'开始并发执行\s*(\d+)\s*个独立浏览器实例', line)
+
+        # 检测Pytest失败/总结标志，强制结束当前步骤
+        # 类似 "FAILED", "FAILURES", "ERRORS", "short test summary info" 等
+        # 或者 "[INFO] 浏览器布局信息" 这种总结性日志开始
+        is_summary_line = False
+        # 增加对 Pytest Output for execution 的检测，作为结束阶段的开始
+        if re.search(r'={10,}\s+(FAILURES|ERRORS|short test summary info)\s+={10,}', line) or \
+           re.search(r'\[INFO\]\s+浏览器布局信息', line) or \
+           re.search(r'(?:测试执行异常|所有操作均失败|ELEMENT_CLICK_TIMEOUT|元素点击超时|BROWSER_CLOSED_BY_USER)', line) or \
+           re.search(r'Pytest Output for execution', line) or \
+           line.strip() == 'FAILED':
+            is_summary_line = True
+
+        if is_summary_line:
+            # 遇到总结行，强制进入结束阶段
+            is_in_end_phase = True
+            end_logs.append(line)
+            continue
+
+        # 如果进入了结束阶段，所有后续日志都归入 endLogs
+        # 除非遇到了明确的"任务执行完成" 或 "Celery任务...数据库更新成功" 这种真正的结束行（这里也归入 endLogs）
+        # 注意：之前有一个 test_completion_match 逻辑，它只是标志单个测试方法完成，不一定是整个任务结束
+        # 但 Pytest Output 之后的所有内容都应该算作结束阶段
+        if is_in_end_phase:
+            end_logs.append(line)
+            continue
+
+        # 检测测试步骤开始 (三种模式)
+            should_switch_to_end_phase = True
+
+        if should_switch_to_end_phase and is_in_step:
+            # 结束当前步骤
+            if current_step:
+                 current_step['logs'] = current_step_logs
+            current_step = None
+            is_in_step = False
+            is_in_end_phase = True
+
+        # 分配日志到相应的组
+        if method_match and screenshot_match:
+            log_method = method_match.group(1)
+            found_step = None
+
+            step_number_from_log = None
+            step_info_match = re.search(r'步骤_(?:test_)?step_(\d+)_|测试步骤_(?:test_)?step_(\d+)_', line)
+            if step_info_match:
+                step_number_from_log = int(step_info_match.group(1) or step_info_match.group(2))
+            else:
+                over_step_info_match = re.search(r'over_test_(?:test_)?step_(\d+)_', line)
+                if over_step_info_match:
+                    step_number_from_log = int(over_step_info_match.group(1))
+
+            if step_number_from_log is not None:
+                if current_step and current_step['stepNumber'] == step_number_from_log:
+                    found_step = current_step
+                else:
+                    found_step = next((s for s in test_steps if s['stepNumber'] == step_number_from_log), None)
+
+            if not found_step:
+                if current_step and log_method in current_step['methods']:
+                    found_step = current_step
+                else:
+                    for s in reversed(test_steps):
+                        if log_method in s['methods']:
+                            found_step = s
+                            break
+
+            if found_step:
+                if found_step == current_step:
+                    current_step_logs.append(line)
+                else:
+                    found_step['logs'].append(line)
+
+                if log_method not in found_step['methods']:
+                    found_step['methods'][log_method] = []
+                found_step['methods'][log_method].append(line)
+            else:
+                end_logs.append(line)
+
+        elif method_match and is_in_end_phase:
+            log_method = method_match.group(1)
+            found_step = None
+
+            if screenshot_match:
+                step_number_from_log = None
+                step_info_match = re.search(r'步骤_(?:test_)?step_(\d+)_|测试步骤_(?:test_)?step_(\d+)_', line)
+                if step_info_match:
+                    step_number_from_log = int(step_info_match.group(1) or step_info_match.group(2))
+                else:
+                    over_step_info_match = re.search(r'over_test_(?:test_)?step_(\d+)_', line)
+                    if over_step_info_match:
+                        step_number_from_log = int(over_step_info_match.group(1))
+
+                if step_number_from_log is not None:
+                    if current_step and current_step['stepNumber'] == step_number_from_log:
+                        found_step = current_step
+                    else:
+                        found_step = next((s for s in test_steps if s['stepNumber'] == step_number_from_log), None)
+
+            if not found_step:
+                if current_step and log_method in current_step['methods']:
+                    found_step = current_step
+                else:
+                    for s in reversed(test_steps):
+                        if log_method in s['methods']:
+                            found_step = s
+                            break
+
+            if found_step:
+                found_step['logs'].append(line)
+                if log_method not in found_step['methods']:
+                    found_step['methods'][log_method] = []
+                found_step['methods'][log_method].append(line)
+            else:
+                # 只有当不在结束阶段时，未匹配到步骤的日志才尝试归入 endLogs (或者 initLogs?)
+                # 实际上如果还没开始任何步骤，应该归入 initLogs
+                if not test_steps:
+                    init_logs.append(line)
+                else:
+                    # 已经在步骤中间，但没匹配到特定步骤（奇怪的情况），暂时归入 endLogs 或者是上一个步骤？
+                    # 保持原有逻辑，归入 endLogs
+                    end_logs.append(line)
+
+        elif is_in_step and current_step:
+            # 过滤掉没有时间戳且来自 LogManeger 的原始控制台日志，避免重复或混乱
+            # 例如: "INFO     星火: :LogManeger.py:257 [test_SC] ..."
+            # 只要包含 LogManeger.py 就认为是原始日志，不归入测试步骤
+            is_raw_log = re.search(r'LogManeger\.py:\d+', line)
+
+            if is_raw_log:
+                # 如果这行日志本身包含"测试执行异常"等关键错误信息，且之前没有触发过结束阶段
+                # 那么这行日志也应该被视为结束信号（双重保险）
+                if re.search(r'(?:测试执行异常|所有操作均失败|ELEMENT_CLICK_TIMEOUT|元素点击超时|BROWSER_CLOSED_BY_USER)', line):
+                     # 既然是原始日志，我们把它放到 endLogs 里，并强制结束当前步骤
+                     end_logs.append(line)
+                     # 手动触发结束逻辑
+                     if current_step:
+                         current_step['logs'] = current_step_logs
+                         if current_step not in test_steps:
+                             test_steps.append(current_step)
+                     is_in_end_phase = True
+                     is_in_step = False
+                     current_step = None
+                else:
+                    end_logs.append(line)
+            else:
+                current_step_logs.append(line)
+                if method_match:
+                    method = method_match.group(1)
+                    if method not in current_step['methods']:
+                        current_step['methods'][method] = []
+                    current_step['methods'][method].append(line)
+        else:
+            init_logs.append(line)
+
+        if should_switch_to_end_phase:
+            if current_step:
+                current_step['logs'] = current_step_logs
+                # Ensure current step is in list (it should be already added when created)
+                if current_step not in test_steps:
+                    test_steps.append(current_step)
+            is_in_end_phase = True
+            is_in_step = False
+            current_step = None
+
+    if current_step:
+        current_step['logs'] = current_step_logs
+        if current_step not in test_steps:
+            test_steps.append(current_step)
+
+    test_methods_count = len(test_methods)
+    concurrent_line = next((l for l in lines if '开始并发执行' in l and '个独立浏览器实例' in l), None)
+    if concurrent_line:
+        match = re.search(r'开始并发执行\s*(\d+)\s*个独立浏览器实例', concurrent_line)
+        if match:
+            test_methods_count = int(match.group(1))
+
+    return {
+        'testStepsCount': len(test_steps),
+        'testMethodsCount': test_methods_count,
+        'screenshotsCount': len(screenshots),
+        'testSteps': test_steps,
+        'initLogs': init_logs,
+        'endLogs': end_logs,
+        'screenshots': screenshots
+    }
+
+
+def generate_log(lines, methods=4, steps=20, seed=0):
+    """
+    生成模拟执行日志
+    :param lines: 总行数
+    :param methods: 并发测试方法数
+    :param steps: 每个方法的步骤数
+    """
+    rng = random.Random(seed)
+    method_names = [f"test_bench_{i}" for i in range(methods)]
+    prefix = "2026-10-18 10:00:00 - automation - INFO - "
+    output = [
+        f"{prefix}开始执行自动化测试",
+        f"{prefix}测试文件分析结果: {{'test_methods': {method_names!r}}}",
+        f"{prefix}开始并发执行 {methods} 个独立浏览器实例",
+    ]
+    body_lines = max(lines - len(output) - 8, 0)
+    per_step = max(body_lines // steps, 1)
+    for i in range(body_lines):
+        step = min(i // per_step, steps - 1) + 1
+        method = method_names[i % methods]
+        kind = rng.random()
+        if i % per_step == 0:
+            output.append(f"{prefix}[{method}] 开始测试步骤{step} 输入帐号 的操作==============")
+        elif kind < 0.03:
+            output.append(f"{prefix}[{method}] 截图成功保存: /data/screenshots/步骤_test_step_{step}_{method}_{i}.png")
+        elif kind < 0.04:
+            output.append(f"{prefix}[{method}] 截图: /data/screenshots/over_test_{method}_{i}.png")
+        elif kind < 0.05:
+            output.append(f"INFO     星火: :LogManeger.py:257 [{method}] 原始控制台输出 {i}")
+        elif kind < 0.06:
+            output.append(f"{prefix}执行第{step}次操作: 点击 #submit")
+        else:
+            output.append(f"{prefix}[{method}] 元素定位成功，执行操作 line={i}")
+    for method in method_names:
+        output.append(f"{prefix}[{method}] {method} 完成")
+    output.extend([
+        "=" * 20 + " short test summary info " + "=" * 20,
+        "FAILED",
+        f"{prefix}任务执行完成",
+    ])
+    return '\n'.join(output)
+
+
+def feed_in_chunks(log_content, seed=1):
+    """按随机大小的块增量 feed，模拟运行中执行多次轮询续解析"""
+    rng = random.Random(seed)
+    parser = AutomationLogParser()
+    position = 0
+    while position < len(log_content):
+        size = rng.randint(1, 64 * 1024)
+        parser.feed(log_content[position:position + size])
+        position += size
+        # 中途读取结果不能影响后续解析
+        parser.result()
+    return parser.finish()
+
+
+def _timeit(func, log_content, repeat):
+    """返回多次运行中的最短耗时"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(log_content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _dump(result):
+    return json.dumps(result, ensure_ascii=False, sort_keys=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='自动化日志解析器性能与一致性对比')
+    parser.add_argument('--lines', type=int, default=100000, help='模拟日志行数')
+    parser.add_argument('--methods', type=int, default=4, help='并发测试方法数')
+    parser.add_argument('--repeat', type=int, default=3, help='计时重复次数（取最短）')
+    args = parser.parse_args()
+
+    log_content = generate_log(args.lines, methods=args.methods)
+    print(f"日志行数: {log_content.count(chr(10)) + 1}, 大小: {len(log_content.encode('utf-8')) / 1024 / 1024:.1f} MB")
+
+    expected = _dump(legacy_parse_automation_log(log_content))
+    assert _dump(UitilTools.parse_automation_log(log_content)) == expected, '全量解析结果与旧逻辑不一致'
+    assert _dump(feed_in_chunks(log_content)) == expected, '增量解析结果与旧逻辑不一致'
+    print("解析结果一致性校验通过（全量 + 增量）")
+
+    legacy_elapsed = _timeit(legacy_parse_automation_log, log_content, args.repeat)
+    new_elapsed = _timeit(UitilTools.parse_automation_log, log_content, args.repeat)
+    print(f"{'旧解析逻辑':<16} {legacy_elapsed:.3f}s")
+    print(f"{'AutomationLogParser':<16} {new_elapsed:.3f}s")
+    print(f"加速比: {legacy_elapsed / new_elapsed:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
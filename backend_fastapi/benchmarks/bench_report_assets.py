@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+报告截图打包基准测试
+在模拟数据集上对比：
+1. 旧方式：每个截图文件原样 Base64 内嵌（只按文件名去重）
+2. inline：按内容哈希去重 + 压缩后内嵌（WebP/JPEG，不同质量）
+3. zip：按内容哈希去重 + 完整图/缩略图写入 assets 目录
+输出各方式的产物大小与耗时（冷缓存/热缓存）
+
+运行方式（无需数据库）:
+    python -m backend_fastapi.benchmarks.bench_report_assets --unique 40 --files 200
+"""
+
+import argparse
+import base64
+import os
+import random
+import shutil
+import tempfile
+import time
+import zipfile
+
+from PIL import Image, ImageDraw
+
+from backend_fastapi.services import report_asset_service
+from backend_fastapi.services.report_asset_service import ReportAssetBundler
+
+
+def generate_screenshots(directory, unique, files, size=(1920, 1080), seed=0):
+    """
+    生成模拟截图：unique 张不同内容的页面截图，复制为 files 个不同文件名（模拟重复截图）
+    :return: 文件路径列表
+    """
+    rng = random.Random(seed)
+    sources = []
+    for i in range(unique):
+        image = Image.new('RGB', size, (245, 247, 250))
+        draw = ImageDraw.Draw(image)
+        # 顶栏、侧边栏、表格与文字块，接近后台管理页面的截图
+        draw.rectangle([0, 0, size[0], 60], fill=(48, 65, 86))
+        draw.rectangle([0, 60, 220, size[1]], fill=(255, 255, 255))
+        for row in range(18):
+            y = 120 + row * 48
+            color = (255, 255, 255) if row % 2 else (250, 250, 250)
+            draw.rectangle([260, y, size[0] - 40, y + 46], fill=color, outline=(235, 238, 245))
+            for col in range(6):
+                x = 280 + col * 260
+                width = rng.randint(60, 200)
+                draw.rectangle([x, y + 18, x + width, y + 28], fill=(96, 98, 102))
+        draw.rectangle([rng.randint(300, 1500), 80, rng.randint(1550, 1880), 110], fill=(64, 158, 255))
+        for line in range(40):
+            draw.text((30, 80 + line * 24), f"菜单项 menu_{i}_{line} {rng.random():.6f}", fill=(48, 49, 51))
+        # 图片/图表区域（噪点），使 PNG 大小接近真实页面截图
+        noise = Image.effect_noise((640, 360), 64).convert('RGB')
+        image.paste(noise, (rng.randint(260, 1200), rng.randint(300, 650)))
+        path = os.path.join(directory, f"source_{i}.png")
+        image.save(path, format='PNG')
+        sources.append(path)
+
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, f"over_test_test_bench_{i}_{i % 20}.png")
+        shutil.copyfile(sources[i % unique], path)
+        paths.append(path)
+    return paths
+
+
+def run_legacy(paths):
+    """旧方式：按文件名去重，原图 Base64 内嵌"""
+    total = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            total += len(f"data:image/png;base64,{base64.b64encode(f.read()).decode('utf-8')}")
+    return total
+
+
+def run_inline(paths, image_format, quality):
+    bundler = ReportAssetBundler(image_format, quality)
+    for path in paths:
+        bundler.add_image(f"IMG_LOGS/{os.path.basename(path)}", path)
+    return bundler.bundled_bytes
+
+
+def run_zip(paths, image_format, quality, output_dir):
+    zip_path = os.path.join(output_dir, 'report.zip')
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        bundler = ReportAssetBundler(image_format, quality, zip_file=zf)
+        for path in paths:
+            bundler.add_image(f"IMG_LOGS/{os.path.basename(path)}", path)
+    size = os.path.getsize(zip_path)
+    os.remove(zip_path)
+    return size
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='报告截图打包大小与耗时对比')
+    parser.add_argument('--unique', type=int, default=40, help='不同内容的截图数')
+    parser.add_argument('--files', type=int, default=200, help='日志中引用的截图文件数')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_report_assets_')
+    try:
+        image_dir = os.path.join(work_dir, 'img')
+        os.makedirs(image_dir)
+        paths = generate_screenshots(image_dir, args.unique, args.files)
+        original = sum(os.path.getsize(p) for p in paths)
+        print(f"截图文件: {args.files} 个（{args.unique} 种内容），原始大小 {original / 1024 / 1024:.1f} MB")
+
+        legacy_size, legacy_time = _timed(run_legacy, paths)
+        print(f"{'方式':<22}{'产物大小':>12}{'冷缓存耗时':>12}{'热缓存耗时':>12}")
+        print(f"{'旧: 原图 Base64 内嵌':<22}{legacy_size / 1024 / 1024:>10.1f}MB{legacy_time:>11.2f}s{'-':>12}")
+
+        cases = [
+            ('inline webp q75', run_inline, ('webp', 75)),
+            ('inline webp q50', run_inline, ('webp', 50)),
+            ('inline jpeg q75', run_inline, ('jpeg', 75)),
+            ('zip webp q75', run_zip, ('webp', 75, work_dir)),
+            ('zip jpeg q75', run_zip, ('jpeg', 75, work_dir)),
+        ]
+        for name, func, extra in cases:
+            # 每种方式使用独立的磁盘缓存目录：第一次为冷缓存，第二次命中缓存
+            report_asset_service.REPORT_ASSET_CACHE_DIR = os.path.join(work_dir, 'cache', name.replace(' ', '_'))
+            report_asset_service._file_digests.clear()
+            size, cold = _timed(func, paths, *extra)
+            _, warm = _timed(func, paths, *extra)
+            print(f"{name:<22}{size / 1024 / 1024:>10.2f}MB{cold:>11.2f}s{warm:>11.2f}s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
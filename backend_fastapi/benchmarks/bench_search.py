@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+标题/编号检索基准测试
+向主数据库灌入指定数量的需求（默认 100 万），对比 LIKE '%词%' 与 FULLTEXT ngram 检索的耗时，并对跨对象搜索接口计时
+
+运行方式（需可连接 Config 中配置的主数据库且已执行 create.sql 中的全文索引，灌入的数据在结束时删除，--keep 保留）:
+    python -m backend_fastapi.benchmarks.bench_search --requirements 1000000 --runs 20
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, or_, desc
+
+from backend_fastapi.db.session import AsyncSessionLocal, engine, sync_engine
+from backend_fastapi.models.pm_models import PMRequirement
+from backend_fastapi.services.search_service import SearchService
+
+BENCH_MARKER = 'bench_search'
+INSERT_BATCH_SIZE = 5000
+# 标题由以下词随机组合，检索词从中挑选（含命中多/命中少的词及编号片段）
+TITLE_WORDS = [
+    '登录', '注册', '支付', '订单', '退款', '报表', '导出', '权限', '菜单', '消息', '通知', '审批', '流程',
+    '页面', '接口', '性能', '优化', '兼容', '移动端', '后台', '配置', '日志', '缓存', '搜索', '上传', '下载',
+    'API', 'SDK', 'OAuth', 'Excel', 'iOS', 'Android'
+]
+# 编号带 '-'（与缺陷编号 BUG-10001 等格式一致），ngram 索引不包含跨 '-' 的字符组合
+CODE_PREFIX = 'REQ-'
+SEARCH_TERMS = ['登录', '退款流程', '移动端 兼容', 'OAuth', '20000123', 'REQ-200000123', 'REQ-2000001']
+
+
+def seed(connection, requirements, days):
+    """灌入基准需求，编号为 REQ-200000001 起"""
+    now = datetime.now()
+    sql = (
+        "INSERT INTO pm_requirement (req_code, title, type, priority, status, create_by, create_time, update_time, del_flag) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 0)"
+    )
+    started = time.perf_counter()
+    for offset in range(0, requirements, INSERT_BATCH_SIZE):
+        rows = []
+        for i in range(offset, min(offset + INSERT_BATCH_SIZE, requirements)):
+            created = now - timedelta(seconds=random.randint(0, days * 86400))
+            title = ''.join(random.sample(TITLE_WORDS, random.randint(2, 5)))
+            rows.append((
+                f"{CODE_PREFIX}{200000001 + i}", title, random.choice(['product', 'tech', 'bug']), 'Medium',
+                random.choice(['draft', 'developing', 'testing', 'completed']), BENCH_MARKER, created, created
+            ))
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+        connection.commit()
+        done = offset + len(rows)
+        if done % (INSERT_BATCH_SIZE * 20) == 0 or done == requirements:
+            print(f"  已灌入 {done}/{requirements} 条需求 ({time.perf_counter() - started:.0f}s)")
+
+
+def cleanup(connection):
+    """分批删除基准数据，避免单个大事务"""
+    with connection.cursor() as cursor:
+        while cursor.execute("DELETE FROM pm_requirement WHERE create_by = %s LIMIT 50000", (BENCH_MARKER,)):
+            connection.commit()
+    connection.commit()
+
+
+def percentile(timings, ratio):
+    return sorted(timings)[max(int(len(timings) * ratio) - 1, 0)]
+
+
+async def time_query(name, run, runs):
+    """执行 run() runs 次（先预热一次），打印中位数/P95"""
+    timings = []
+    for i in range(runs + 1):
+        start = time.perf_counter()
+        await run()
+        elapsed = (time.perf_counter() - start) * 1000
+        if i > 0:
+            timings.append(elapsed)
+    print(f"  {name}: 中位数 {statistics.median(timings):.1f}ms, P95 {percentile(timings, 0.95):.1f}ms")
+
+
+async def check_recall(db, term):
+    """对比 LIKE 与 FULLTEXT 的命中数，FULLTEXT 漏掉 LIKE 能找到的数据时给出提示"""
+    like_count = (await db.execute(select(func.count()).select_from(PMRequirement).where(
+        or_(PMRequirement.title.like(f"%{term}%"), PMRequirement.req_code.like(f"%{term}%")),
+        PMRequirement.del_flag == 0
+    ))).scalar() or 0
+    fulltext_count = (await db.execute(select(func.count()).select_from(PMRequirement).where(
+        SearchService.condition('requirement', term),
+        PMRequirement.del_flag == 0
+    ))).scalar() or 0
+    missed = ' (FULLTEXT 漏掉了 LIKE 命中的数据!)' if fulltext_count < like_count else ''
+    print(f"  命中数: LIKE {like_count}, FULLTEXT {fulltext_count}{missed}")
+
+
+async def run_benchmark(runs):
+    try:
+        async with AsyncSessionLocal() as db:
+            for term in SEARCH_TERMS:
+                print(f"检索词 '{term}':")
+
+                async def like_query():
+                    stmt = select(PMRequirement.req_id).where(
+                        or_(PMRequirement.title.like(f"%{term}%"), PMRequirement.req_code.like(f"%{term}%")),
+                        PMRequirement.del_flag == 0
+                    ).order_by(desc(PMRequirement.update_time)).limit(20)
+                    return (await db.execute(stmt)).all()
+
+                async def fulltext_query():
+                    stmt = select(PMRequirement.req_id).where(
+                        SearchService.condition('requirement', term),
+                        PMRequirement.del_flag == 0
+                    ).order_by(desc(SearchService.relevance('requirement', term))).limit(20)
+                    return (await db.execute(stmt)).all()
+
+                async def unified_search():
+                    return await SearchService.search(db, term, page=1, page_size=20)
+
+                await check_recall(db, term)
+                await time_query('LIKE', like_query, runs)
+                await time_query('FULLTEXT', fulltext_query, runs)
+                await time_query('跨对象搜索(含总数)', unified_search, runs)
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='标题/编号检索耗时')
+    parser.add_argument('--requirements', type=int, default=1000000, help='灌入的需求数')
+    parser.add_argument('--days', type=int, default=365 * 3, help='创建时间分布的天数')
+    parser.add_argument('--runs', type=int, default=20, help='每个查询的计时次数')
+    parser.add_argument('--keep', action='store_true', help='保留灌入的数据')
+    args = parser.parse_args()
+
+    connection = sync_engine.raw_connection()
+    print(f"灌入 {args.requirements} 条需求...")
+    seed(connection, args.requirements, args.days)
+    try:
+        asyncio.run(run_benchmark(args.runs))
+    finally:
+        if not args.keep:
+            cleanup(connection)
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
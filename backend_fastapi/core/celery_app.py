@@ -5,7 +5,7 @@ celery_app = Celery(
     "worker",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["backend_fastapi.tasks.automation_tasks"]
+    include=["backend_fastapi.tasks.automation_tasks", "backend_fastapi.tasks.report_tasks", "backend_fastapi.tasks.execution_stats_tasks", "backend_fastapi.tasks.automation_project_product_tasks", "backend_fastapi.tasks.activity_tasks", "backend_fastapi.tasks.requirement_progress_tasks"]
 )
 
 celery_app.conf.update(
@@ -21,5 +21,15 @@ celery_app.conf.update(
             'schedule': 60.0, # 每 60 秒执行一次
             'args': ()
         },
+        'reconcile-execution-daily-stats-every-10-minutes': {
+            'task': 'backend_fastapi.tasks.execution_stats_tasks.reconcile_execution_daily_stats',
+            'schedule': 600.0, # 每 10 分钟校准最近两天的执行日汇总
+            'args': ()
+        },
+        'reconcile-requirement-progress-every-hour': {
+            'task': 'backend_fastapi.tasks.requirement_progress_tasks.reconcile_requirement_progress',
+            'schedule': 3600.0, # 每小时校准需求进度（兜底字典映射变更、直接改库等情况）
+            'args': ()
+        },
     }
 )
@@ -31,6 +31,10 @@ class Settings(BaseSettings):
     CELERY_RESULT_BACKEND: str = 'redis://127.0.0.1:6379/2'
     CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP: bool = True
 
+    # 报告配置
+    # 报告图片资源、报告产物的磁盘缓存目录（相对路径基于启动目录）
+    REPORT_CACHE_DIR: str = 'ReportCache'
+
     class Config:
         case_sensitive = True
         env_file = ".env"
@@ -0,0 +1,5 @@
+from redis import asyncio as aioredis
+from backend_fastapi.core.config import settings
+
+# 进程内共享的异步 Redis 客户端（自带连接池），各服务统一从这里导入，不再各自创建
+redis_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
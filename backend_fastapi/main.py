@@ -1,9 +1,12 @@
 import os
+import asyncio
 from fastapi import FastAPI
 from fastapi.openapi.docs import get_swagger_ui_html
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from backend_fastapi.core.config import settings
+from backend_fastapi.utils.screenshot_index import ScreenshotIndex
+from backend_fastapi.services.dict_cache_service import DictCache
 from backend_fastapi.routes.Auth import Auth_Router
 from backend_fastapi.routes.Workbench import Workbench_Router
 from backend_fastapi.routes.MySpace import MySpace_Router
@@ -15,6 +18,7 @@ from backend_fastapi.routes.ProductionMgt import Production_Router
 from backend_fastapi.routes.ProductionIssue import Issue_Router
 from backend_fastapi.routes.Report import Report_Router
 from backend_fastapi.routes.QualityMgt import Defect_Router
+from backend_fastapi.routes.Search import Search_Router
 from backend_fastapi.routes.SystemManager import (
     User_Router as SysUser_Router,
     Role_Router as SysRole_Router,
@@ -88,6 +92,7 @@ app.include_router(Project_Router.router, prefix="/api/project")
 app.include_router(Requirement_Router.router, prefix="/api/requirement")
 app.include_router(Quality_Router.router, prefix="/api/quality")
 app.include_router(Defect_Router.router, prefix="/api/quality/defect")
+app.include_router(Search_Router.router, prefix="/api/search")
 app.include_router(UAT_Router.router, prefix="/api/uat")
 app.include_router(Production_Router.router, prefix="/api/production")
 app.include_router(Issue_Router.router, prefix="/api/issue")
@@ -123,6 +128,20 @@ app.include_router(SysDict_Router.router, prefix="/api/system/dict")
 app.include_router(SysAutomation_Router.router, prefix="/api/system/automation")
 app.include_router(SysFile_Router.router, prefix="/api/system/file")
 
+@app.on_event("startup")
+async def build_screenshot_index():
+    """
+    启动时在后台线程建立截图文件索引，不阻塞服务启动
+    """
+    asyncio.get_running_loop().run_in_executor(None, ScreenshotIndex.build)
+
+@app.on_event("startup")
+async def start_dict_cache_listener():
+    """
+    启动时订阅字典变更广播，清除本进程的字典缓存
+    """
+    app.state.dict_cache_listener = asyncio.create_task(DictCache.listen())
+
 @app.get("/")
 async def root():
     """
@@ -1,10 +1,13 @@
-from .sys_models import SysUser, AppUserLog, TestEnvironment, TestEnvironmentLog, SysNotification, SysUserFollow
+from .sys_models import SysUser, AppUserLog, TestEnvironment, TestEnvironmentLog, SysNotification, SysUserFollow, SysUserActivity
 from .automation_models import (
     Project, 
     AutomationProject, 
+    AutomationProjectProduct,
     ProjectFile, 
     AutomationExecution, 
     AutomationExecutMethodLog, 
+    AutomationExecutionLogLine,
+    AutomationExecutionDailyStat,
     EnumValue, 
     ProjectLog
 )
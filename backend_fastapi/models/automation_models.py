@@ -1,6 +1,6 @@
-from sqlalchemy import String, Integer, BigInteger, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import String, Integer, BigInteger, Date, DateTime, Text, Boolean, ForeignKey, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column
-from datetime import datetime
+from datetime import date, datetime
 from backend_fastapi.db.session import Base
 from typing import Optional
 
@@ -98,6 +98,31 @@ class AutomationProject(Base):
             'end_time': self.end_time.strftime('%Y-%m-%d %H:%M:%S') if self.end_time else None
         }
 
+class AutomationProjectProduct(Base):
+    """
+    自动化测试案例-产品包关联表 (automation_project_products)
+    由 AutomationProject.product_ids / product_package_names 规范化而来，创建、更新测试案例时同步，
+    用于按产品包统计分布、筛选时走索引关联查询
+    """
+    __tablename__ = 'automation_project_products'
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True, comment='主键ID')
+    automation_project_id: Mapped[int] = mapped_column(Integer, nullable=False, comment='关联automation_projects表ID')
+    project_id: Mapped[Optional[int]] = mapped_column(Integer, comment='关联projects表ID(未匹配到产品时为空)')
+    product_code: Mapped[Optional[str]] = mapped_column(String(255), comment='产品编号(product_ids中的原始值)')
+    product_package_name: Mapped[str] = mapped_column(String(255), nullable=False, default='', comment='产品包名')
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.now, comment='创建时间')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'automation_project_id': self.automation_project_id,
+            'project_id': self.project_id,
+            'product_code': self.product_code,
+            'product_package_name': self.product_package_name,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
+        }
+
 class ProjectFile(Base):
     """
     自动化测试文件表 (project_files)
@@ -150,6 +175,10 @@ class AutomationExecution(Base):
     executed_by: Mapped[Optional[str]] = mapped_column(String(100), default='admin', comment='执行人')
     cancel_type: Mapped[Optional[str]] = mapped_column(String(50), comment='取消类型')
     task_id: Mapped[Optional[str]] = mapped_column(String(50), comment='Celery任务ID')
+    log_line_seq: Mapped[Optional[int]] = mapped_column(Integer, default=0, comment='已分配的日志行序号')
+    # 体积较大，默认延迟加载，只在读取日志结构时按需加载
+    parsed_log: Mapped[Optional[bytes]] = mapped_column(LargeBinary, deferred=True, comment='预解析日志结构(zlib压缩JSON)')
+    parsed_log_version: Mapped[Optional[int]] = mapped_column(Integer, comment='预解析日志结构版本')
 
     def to_dict(self):
         return {
@@ -188,6 +217,56 @@ class AutomationExecutMethodLog(Base):
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
         }
 
+class AutomationExecutionLogLine(Base):
+    """
+    自动化测试执行日志行表 (automation_execution_log_lines)
+    按 (execution_id, seq) 只追加写入，替代不断 CONCAT 增长的 detailed_log / log_content
+    """
+    __tablename__ = 'automation_execution_log_lines'
+
+    execution_id: Mapped[int] = mapped_column(Integer, primary_key=True, comment='关联automation_executions表ID')
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, comment='执行内日志行序号(从1开始)')
+    method_name: Mapped[Optional[str]] = mapped_column(String(100), comment='测试方法名称')
+    step_number: Mapped[Optional[int]] = mapped_column(Integer, comment='测试步骤号')
+    level: Mapped[Optional[str]] = mapped_column(String(20), comment='日志级别')
+    content: Mapped[Optional[str]] = mapped_column(Text, comment='日志内容')
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.now, comment='创建时间')
+
+    def to_dict(self):
+        return {
+            'execution_id': self.execution_id,
+            'seq': self.seq,
+            'method_name': self.method_name,
+            'step_number': self.step_number,
+            'level': self.level,
+            'content': self.content,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S') if self.created_at else None
+        }
+
+class AutomationExecutionDailyStat(Base):
+    """
+    自动化测试执行日汇总表 (automation_execution_daily_stats)
+    按 (结束日期, 自动化项目, 产品包, 状态) 预聚合执行数，执行结束时增量刷新，仪表板与趋势图只做范围扫描
+    """
+    __tablename__ = 'automation_execution_daily_stats'
+
+    stat_date: Mapped[date] = mapped_column(Date, primary_key=True, comment='统计日期(执行结束日期)')
+    automation_project_id: Mapped[int] = mapped_column(Integer, primary_key=True, comment='关联automation_projects表ID')
+    product_package_name: Mapped[str] = mapped_column(String(255), primary_key=True, default='', comment='产品包名')
+    status: Mapped[str] = mapped_column(String(50), primary_key=True, comment='执行状态')
+    execution_count: Mapped[int] = mapped_column(Integer, default=0, comment='执行次数')
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now, comment='更新时间')
+
+    def to_dict(self):
+        return {
+            'stat_date': self.stat_date.strftime('%Y-%m-%d') if self.stat_date else None,
+            'automation_project_id': self.automation_project_id,
+            'product_package_name': self.product_package_name,
+            'status': self.status,
+            'execution_count': self.execution_count,
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None
+        }
+
 class EnumValue(Base):
     """
     枚举值表 (enum_values)
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 from backend_fastapi.db.session import Base
 from typing import Optional
+import json
 
 class SysUser(Base):
     """
@@ -270,6 +271,55 @@ class SysUserFollow(Base):
             'create_time': self.create_time.strftime('%Y-%m-%d %H:%M:%S') if self.create_time else None
         }
 
+class SysUserActivity(Base):
+    """
+    用户操作动态表（只追加）
+    由新建/更新/执行接口写入，工作台"我的动态"按 (username, create_time, activity_id) 游标分页读取
+    """
+    __tablename__ = 'sys_user_activity'
+
+    activity_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    username: Mapped[str] = mapped_column(String(30), nullable=False)
+    action: Mapped[str] = mapped_column(String(20), nullable=False)
+    target_type: Mapped[str] = mapped_column(String(50), nullable=False)
+    target_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    target_name: Mapped[Optional[str]] = mapped_column(String(500))
+    project_name: Mapped[Optional[str]] = mapped_column(String(255))
+    status: Mapped[Optional[str]] = mapped_column(String(50))
+    content: Mapped[Optional[str]] = mapped_column(String(600))
+    extra: Mapped[Optional[str]] = mapped_column(Text)
+    create_time: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+
+    def to_dict(self):
+        data = {
+            'activity_id': self.activity_id,
+            'id': self.target_id,
+            'time': self.create_time.strftime('%Y-%m-%d %H:%M:%S') if self.create_time else None,
+            'target_type': self.target_type,
+            'target_name': self.target_name,
+            'project_name': self.project_name,
+            'action': self.action,
+            'result': self.status,
+            'content': self.content,
+            'status': self.status
+        }
+        if self.extra:
+            try:
+                data.update(json.loads(self.extra))
+            except Exception:
+                pass
+        return data
+
+class SysCodeSequence(Base):
+    """
+    编号序列表：各业务编号（需求/子需求/任务/用例）的下一个可分配值
+    """
+    __tablename__ = 'sys_code_sequence'
+
+    seq_name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    next_value: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    update_time: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.now, onupdate=datetime.now)
+
 class AppUserLog(Base):
     """
     用户登录日志表
@@ -1,9 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc, or_
-from backend_fastapi.db.session import get_automation_db, get_db
-from backend_fastapi.models.automation_models import AutomationProject, ProjectFile, AutomationExecution, AutomationExecutMethodLog, Project
+from backend_fastapi.db.session import get_automation_db, get_db, AutomationSessionLocal
+from backend_fastapi.models.automation_models import AutomationProject, AutomationProjectProduct, ProjectFile, AutomationExecution, Project
+from backend_fastapi.services.execution_log_service import ExecutionLogService, LOG_SECTIONS
+from backend_fastapi.services.execution_stats_service import ExecutionStatsService
+from backend_fastapi.services.automation_project_product_service import AutomationProjectProductService
+from backend_fastapi.services.activity_service import ActivityService, ACTION_CREATE, ACTION_UPDATE, ACTION_EXECUTE
+from backend_fastapi.services.pagination_service import PaginationService
+from backend_fastapi.utils.screenshot_index import ScreenshotIndex
 from backend_fastapi.utils.LogManeger import log_info
 from backend_fastapi.utils.AccountManager import generate_unique_email_for_url, get_credentials_for_url, update_account_data
 from backend_fastapi.utils.TestCodeGenerator import TestCodeGenerator
@@ -17,12 +23,21 @@ import os
 import shutil
 import requests
 import re
-import ast
 import pytz
 import asyncio
 
 router = APIRouter(tags=["自动化管理"])
 
+# 日志实时推送配置
+LOG_STREAM_POLL_INTERVAL = 1.0  # 轮询日志行表的间隔（秒）
+LOG_STREAM_BATCH_SIZE = 500  # 单次推送的最大行数
+LOG_STREAM_HEARTBEAT = 15  # 无新数据时的心跳间隔（秒）
+LOG_STREAM_DRAIN_POLLS = 3  # 执行结束后继续等待迟到日志的空轮询次数
+
+# 游标分页排序：(排序键, 主键)
+PROJECT_CURSOR_ORDER = [(AutomationProject.updated_at, True), (AutomationProject.id, True)]
+EXECUTION_CURSOR_ORDER = [(AutomationExecution.start_time, True), (AutomationExecution.id, True)]
+
 from .schemas import (
     GenerateAccountsRequest,
     GetLoginAccountsRequest,
@@ -36,31 +51,15 @@ from .schemas import (
 # Helper Functions
 async def _process_account_data_saving(project_id, process_name, test_steps, db: AsyncSession):
     try:
-        stmt = select(AutomationProject).where(AutomationProject.id == project_id)
+        # 关联的产品从产品包关联表读取，不再逐个解析 product_ids
+        stmt = select(Project).join(
+            AutomationProjectProduct, AutomationProjectProduct.project_id == Project.id
+        ).where(AutomationProjectProduct.automation_project_id == project_id).distinct()
         result = await db.execute(stmt)
-        project = result.scalar_one_or_none()
+        products = result.scalars().all()
         
-        if not project or not project.product_ids:
+        if not products:
             return
-
-        p_ids_raw = project.product_ids
-        p_ids = []
-        if isinstance(p_ids_raw, str):
-            try:
-                parsed = json.loads(p_ids_raw)
-                if isinstance(parsed, list):
-                    p_ids = [str(i).strip() for i in parsed if i]
-                else:
-                    p_ids = [str(parsed).strip()]
-            except:
-                p_ids = [i.strip() for i in p_ids_raw.split(',') if i.strip()]
-        
-        if not p_ids:
-            return
-            
-        stmt = select(Project).where(Project.id.in_(p_ids))
-        result = await db.execute(stmt)
-        products = result.scalars().all()
         
         url_to_product_name = {}
         for p in products:
@@ -234,6 +233,19 @@ async def generate_test_case_path(automation_project, db: AsyncSession):
 
 # Routes
 
+async def record_project_activity(username, action, project: AutomationProject, target_id=None, status=None):
+    """
+    将测试案例的新建/更新/执行写入用户动态（主库），显示第一个测试流程名和产品包名
+    """
+    process_names = AutomationProjectProductService.parse_list(project.process_name)
+    package_names = AutomationProjectProductService.parse_list(project.product_package_names)
+    await ActivityService.record_detached(
+        username, action, 'automation_project', target_id if target_id is not None else project.id,
+        target_name=process_names[0] if process_names else project.process_name,
+        project_name=package_names[0] if package_names else '自动化项目',
+        status=status if status is not None else (project.des_status or project.status)
+    )
+
 @router.post('/generate_register_accounts')
 async def generate_register_accounts(req: GenerateAccountsRequest):
     try:
@@ -369,8 +381,11 @@ async def get_projects(
     created_by: Optional[str] = None,
     start_time: Optional[datetime] = None,
     end_time: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    cursor_mode: Optional[bool] = False,
     db: AsyncSession = Depends(get_automation_db)
 ):
+    # cursor_mode=true 或传入上一页返回的 next_cursor 时使用游标分页，总数使用缓存
     try:
         stmt = select(AutomationProject, Project).outerjoin(
             Project, AutomationProject.project_id == Project.id
@@ -390,7 +405,12 @@ async def get_projects(
             stmt = stmt.where(AutomationProject.level.in_(level_list))
         if product_names:
             name_list = product_names.split(',')
-            stmt = stmt.where(Project.product_package_name.in_(name_list))
+            # 通过产品包关联表按索引筛选，覆盖测试案例关联的全部产品包
+            stmt = stmt.where(AutomationProject.id.in_(
+                select(AutomationProjectProduct.automation_project_id).where(
+                    AutomationProjectProduct.product_package_name.in_(name_list)
+                )
+            ))
         if environment:
             stmt = stmt.where(Project.environment == environment)
         if des_status:
@@ -407,13 +427,18 @@ async def get_projects(
         stmt = stmt.order_by(desc(AutomationProject.updated_at))
         
         # Pagination
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total_result = await db.execute(count_stmt)
-        total = total_result.scalar() or 0
-        
-        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
-        result = await db.execute(stmt)
-        items = result.all() # list of (AutomationProject, Project)
+        next_cursor = None
+        if cursor_mode or cursor:
+            items, next_cursor = await PaginationService.fetch(db, stmt, PROJECT_CURSOR_ORDER, cursor, page_size)
+            total = await PaginationService.cached_total(db, stmt, 'automation_project')
+        else:
+            count_stmt = select(func.count()).select_from(stmt.subquery())
+            total_result = await db.execute(count_stmt)
+            total = total_result.scalar() or 0
+
+            stmt = stmt.offset((page - 1) * page_size).limit(page_size)
+            result = await db.execute(stmt)
+            items = result.all() # list of (AutomationProject, Project)
         
         projects = []
         for ap, p in items:
@@ -458,9 +483,12 @@ async def get_projects(
                 'list': projects,
                 'total': total,
                 'page': page,
-                'page_size': page_size
+                'page_size': page_size,
+                'next_cursor': next_cursor
             }
         }
+    except ValueError as e:
+        return {'code': 400, 'message': str(e)}
     except Exception as e:
         log_info(f"Get projects error: {str(e)}")
         return {'code': 500, 'message': str(e)}
@@ -541,8 +569,12 @@ async def create_project(
         )
         
         db.add(new_project)
+        await db.flush()
+        # 同步产品包关联表，随测试案例一起提交
+        await AutomationProjectProductService.sync(db, new_project)
         await db.commit()
         await db.refresh(new_project)
+        await record_project_activity(new_project.created_by, ACTION_CREATE, new_project)
         
         try:
             if req.test_steps:
@@ -641,8 +673,13 @@ async def update_project(
         if req.des_status is not None: project.des_status = req.des_status
         if req.start_time is not None: project.start_time = req.start_time
         if req.end_time is not None: project.end_time = req.end_time
+
+        if req.product_ids is not None or req.product_package_names is not None:
+            await AutomationProjectProductService.sync(db, project)
         
         await db.commit()
+        # 更新请求不携带操作人，沿用创建人（与原工作台动态的统计口径一致）
+        await record_project_activity(project.created_by, ACTION_UPDATE, project)
         
         try:
             stmt = select(ProjectFile).where(ProjectFile.project_id == project_id)
@@ -756,6 +793,7 @@ async def execute_project(
         project.status = 'Running'
         await db.commit()
         await db.refresh(execution)
+        await record_project_activity(execution.executed_by, ACTION_EXECUTE, project, execution.id, execution.status)
         
         # Trigger Celery task
         task = run_test_execution.apply_async(args=[execution.id, project.id])
@@ -769,6 +807,16 @@ async def execute_project(
         log_info(f"项目执行请求异常: {str(e)}")
         return {'code': 500, 'message': str(e)}
 
+async def refresh_execution_stats(db: AsyncSession, execution: AutomationExecution):
+    """
+    执行结束后刷新执行日汇总，失败只记录日志，不影响主流程（定时校准任务会兜底）
+    """
+    try:
+        await ExecutionStatsService.refresh_execution(db, execution)
+    except Exception as e:
+        await db.rollback()
+        log_info(f"Refresh execution daily stats error (execution_id={execution.id}): {str(e)}")
+
 @router.post('/test_projects/{project_id}/cancel')
 async def cancel_execution(
     project_id: int,
@@ -795,6 +843,8 @@ async def cancel_execution(
             project.status = 'Cancelled'
             
         await db.commit()
+        if execution:
+            await refresh_execution_stats(db, execution)
         return {'code': 200, 'message': '执行已取消'}
     except Exception as e:
         await db.rollback()
@@ -805,8 +855,11 @@ async def get_executions(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1),
     project_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    cursor_mode: Optional[bool] = False,
     db: AsyncSession = Depends(get_automation_db)
 ):
+    # cursor_mode=true 或传入上一页返回的 next_cursor 时使用游标分页，总数使用缓存
     try:
         stmt = select(AutomationExecution)
         if project_id:
@@ -814,13 +867,19 @@ async def get_executions(
             
         stmt = stmt.order_by(desc(AutomationExecution.start_time))
         
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total_result = await db.execute(count_stmt)
-        total = total_result.scalar() or 0
-        
-        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
-        result = await db.execute(stmt)
-        items = result.scalars().all()
+        next_cursor = None
+        if cursor_mode or cursor:
+            rows, next_cursor = await PaginationService.fetch(db, stmt, EXECUTION_CURSOR_ORDER, cursor, page_size)
+            items = [row[0] for row in rows]
+            total = await PaginationService.cached_total(db, stmt, 'automation_execution')
+        else:
+            count_stmt = select(func.count()).select_from(stmt.subquery())
+            total_result = await db.execute(count_stmt)
+            total = total_result.scalar() or 0
+
+            stmt = stmt.offset((page - 1) * page_size).limit(page_size)
+            result = await db.execute(stmt)
+            items = result.scalars().all()
         
         executions = []
         for exe in items:
@@ -840,17 +899,25 @@ async def get_executions(
                 'list': executions,
                 'total': total,
                 'page': page,
-                'page_size': page_size
+                'page_size': page_size,
+                'next_cursor': next_cursor
             }
         }
+    except ValueError as e:
+        return {'code': 400, 'message': str(e)}
     except Exception as e:
         return {'code': 500, 'message': str(e)}
 
 @router.get('/executions/{execution_id}')
 async def get_execution_detail(
     execution_id: int,
+    include_logs: bool = Query(False, description="是否返回完整日志内容，默认只返回步骤/方法骨架"),
     db: AsyncSession = Depends(get_automation_db)
 ):
+    """
+    获取执行详情
+    默认只返回日志骨架（步骤名称、行数、状态、截图数），日志内容通过 /executions/{id}/log_section 分页读取
+    """
     try:
         stmt = select(AutomationExecution).where(AutomationExecution.id == execution_id)
         result = await db.execute(stmt)
@@ -894,6 +961,7 @@ async def get_execution_detail(
                     
                     await db.commit()
                     log_info(f"Synced execution {execution_id} status from Celery: {execution.status}")
+                    await refresh_execution_stats(db, execution)
             except Exception as e:
                 log_info(f"Failed to check Celery status: {e}")
 
@@ -916,105 +984,182 @@ async def get_execution_detail(
                 await db.commit()
                 log_info(f"Synced project {project.id} status to {project.status} based on execution {execution.id}")
 
-        # Parse logs
-        detailed_log_content = execution.detailed_log or ""
-        # Lazy import to avoid circular dependency if any
-        from backend_fastapi.utils.UitilTools import UitilTools
-        parsed_log = UitilTools.parse_automation_log(detailed_log_content)
-        
-        # Get Method Logs
-        stmt_logs = select(AutomationExecutMethodLog).where(AutomationExecutMethodLog.execution_id == execution_id)
-        res_logs = await db.execute(stmt_logs)
-        method_logs_records = res_logs.scalars().all()
-        
-        method_logs_data = []
-        for record in method_logs_records:
-            method_logs_data.append({
-                'name': record.method_name,
-                'logs': UitilTools.parse_automation_log(record.log_content)
-            })
+        # Parse logs (执行结束时已预解析的直接读取，旧数据回退实时解析)
+        structure = await ExecutionLogService.get_log_structure(db, execution)
 
-        # Extract Error Logs
-        error_log = None
-        if detailed_log_content:
-            console_output_marker = f"\n\n{'='*20} Console Output {'='*20}\n"
-            if console_output_marker in detailed_log_content:
-                parts = detailed_log_content.split(console_output_marker)
-                if len(parts) > 1:
-                    console_output = parts[1]
-                    
-                    if "FAILURES" in console_output or "ERRORS" in console_output:
-                         match = re.search(r'(={10,}\s+(FAILURES|ERRORS)\s+={10,}[\s\S]*)', console_output)
-                         if match:
-                             error_content = match.group(1)
-                             filtered_lines = []
-                             log_pattern = re.compile(r'^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\s+-\s+.*?\s+-\s+INFO\s+-')
-                             for line in error_content.split('\n'):
-                                 if not log_pattern.match(line.strip()):
-                                     filtered_lines.append(line)
-                             error_content = '\n'.join(filtered_lines)
-                             
-                             error_log = {
-                                 'name': '错误日志',
-                                 'logs': UitilTools.parse_automation_log(error_content, is_error_log=True)
-                             }
-                         else:
-                             filtered_lines = []
-                             log_pattern = re.compile(r'^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\s+-\s+.*?\s+-\s+INFO\s+-')
-                             for line in console_output.split('\n'):
-                                 if not log_pattern.match(line.strip()):
-                                     filtered_lines.append(line)
-                                     
-                             error_log = {
-                                 'name': '错误日志',
-                                 'logs': UitilTools.parse_automation_log('\n'.join(filtered_lines), is_error_log=True)
-                             }
-        
-        if error_log:
-            method_logs_data.append(error_log)
-            
-        # Legacy test methods count
-        test_methods_count = 0
-        if method_logs_data:
-            test_methods_count = len([m for m in method_logs_data if m.get('name') != '错误日志'])
-        else:
-            try:
-                match = re.search(r'测试文件分析结果:\s*(\{.*?\})', detailed_log_content)
-                if match:
-                    analysis_result = ast.literal_eval(match.group(1))
-                    if isinstance(analysis_result, dict) and 'test_methods' in analysis_result:
-                        methods = analysis_result['test_methods']
-                        filtered_methods = [m for m in methods if m != 'test_concurrent_independent_browsers']
-                        test_methods_count = len(filtered_methods)
-            except Exception as e:
-                log_info(f"Failed to parse legacy test methods: {e}")
-                test_methods_count = len(set(s.get('method') for s in parsed_log.get('testSteps', []) if s.get('method')))
+        if not include_logs:
+            structure = ExecutionLogService.build_log_skeleton(structure)
 
         data = execution.to_dict()
-        data['logs'] = parsed_log
-        data['method_logs'] = method_logs_data
-        data['stats'] = {
-            'test_steps_count': len(parsed_log.get('testSteps', [])),
-            'test_methods_count': test_methods_count,
-            'screenshots_count': detailed_log_content.count('Screenshot saved at'),
-            'keyword_data_count': sum(len(step.get('logs', [])) for step in parsed_log.get('testSteps', []))
-        }
+        data['logs'] = structure['logs']
+        data['method_logs'] = structure['method_logs']
+        data['stats'] = structure['stats']
             
         return {'code': 200, 'message': 'Success', 'data': data}
     except Exception as e:
         log_info(f"Get execution detail error: {str(e)}")
         return {'code': 500, 'message': f'获取执行记录详情时发生错误: {str(e)}'}
 
+@router.get('/executions/{execution_id}/log_section')
+async def get_execution_log_section(
+    execution_id: int,
+    view: str = Query('all', description="all 表示全部日志，否则为测试方法名（含\"错误日志\"）"),
+    section: str = Query('step', description="日志分段: init/step/end"),
+    step_number: Optional[int] = Query(None, description="section 为 step 时的步骤号"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(200, ge=1, le=2000),
+    db: AsyncSession = Depends(get_automation_db)
+):
+    """
+    分页读取执行详情中某个步骤/方法的日志行
+    """
+    try:
+        if section not in LOG_SECTIONS:
+            return {'code': 400, 'message': f'不支持的日志分段: {section}'}
+        if section == 'step' and step_number is None:
+            return {'code': 400, 'message': '读取步骤日志时必须指定 step_number'}
+
+        execution = await db.get(AutomationExecution, execution_id)
+        if not execution:
+            return {'code': 404, 'message': f'执行记录未找到 (ID: {execution_id})'}
+
+        structure = await ExecutionLogService.get_log_structure(db, execution)
+        page = ExecutionLogService.get_section_lines(
+            structure, view=view, section=section, step_number=step_number, offset=offset, limit=limit
+        )
+        if page is None:
+            return {'code': 404, 'message': '日志视图或步骤不存在'}
+        return {'code': 200, 'message': 'Success', 'data': page}
+    except Exception as e:
+        log_info(f"Get execution log section error: {str(e)}")
+        return {'code': 500, 'message': str(e)}
+
+@router.get('/executions/{execution_id}/log_lines')
+async def get_execution_log_lines(
+    execution_id: int,
+    after_seq: int = Query(0, ge=0, description="游标：只返回序号大于该值的日志行"),
+    limit: int = Query(500, ge=1, le=5000),
+    method_name: Optional[str] = None,
+    step_number: Optional[int] = None,
+    db: AsyncSession = Depends(get_automation_db)
+):
+    """
+    分页读取执行日志行（按序号游标）
+    """
+    try:
+        lines = await ExecutionLogService.fetch_lines(
+            db, execution_id, after_seq=after_seq, limit=limit,
+            method_name=method_name, step_number=step_number
+        )
+        next_seq = lines[-1].seq if lines else after_seq
+        return {
+            'code': 200,
+            'message': 'Success',
+            'data': {
+                'list': [line.to_dict() for line in lines],
+                'next_seq': next_seq,
+                'has_more': len(lines) == limit
+            }
+        }
+    except Exception as e:
+        log_info(f"Get execution log lines error: {str(e)}")
+        return {'code': 500, 'message': str(e)}
+
+@router.get('/executions/{execution_id}/stream')
+async def stream_execution_logs(
+    execution_id: int,
+    request: Request,
+    after_seq: int = Query(0, ge=0, description="游标：从该序号之后开始推送"),
+):
+    """
+    以 SSE (text/event-stream) 实时推送执行日志
+    只推送游标之后的新日志行与状态变更，轮询成本与已执行时长无关
+    事件类型: log (新日志行), status (状态变更), end (执行结束且日志已推送完毕)
+    断线重连时优先使用 Last-Event-ID 作为游标
+    """
+    last_event_id = request.headers.get('last-event-id')
+    cursor = max(after_seq, int(last_event_id)) if last_event_id and last_event_id.isdigit() else after_seq
+
+    def sse(event, data, event_id=None):
+        head = f"id: {event_id}\n" if event_id is not None else ""
+        return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def event_generator():
+        nonlocal cursor
+        last_status = None
+        idle_seconds = 0.0
+        drain_polls = 0
+        # 流式响应期间依赖注入的会话可能已关闭，这里自行管理会话
+        async with AutomationSessionLocal() as db:
+            while True:
+                if await request.is_disconnected():
+                    return
+
+                status_stmt = select(AutomationExecution.status, AutomationExecution.end_time).where(AutomationExecution.id == execution_id)
+                row = (await db.execute(status_stmt)).first()
+                if not row:
+                    yield sse('end', {'execution_id': execution_id, 'message': f'执行记录未找到 (ID: {execution_id})'})
+                    return
+
+                if row.status != last_status:
+                    last_status = row.status
+                    yield sse('status', {
+                        'execution_id': execution_id,
+                        'status': row.status,
+                        'end_time': row.end_time.strftime('%Y-%m-%d %H:%M:%S') if row.end_time else None
+                    })
+
+                lines = await ExecutionLogService.fetch_lines(db, execution_id, after_seq=cursor, limit=LOG_STREAM_BATCH_SIZE)
+                lines = [line.to_dict() for line in lines]
+                # 结束会话中的只读事务，保证下一轮能读到其他进程新提交的日志
+                await db.rollback()
+
+                if lines:
+                    cursor = lines[-1]['seq']
+                    idle_seconds = 0.0
+                    drain_polls = 0
+                    yield sse('log', {'lines': lines, 'next_seq': cursor}, event_id=cursor)
+                    if len(lines) == LOG_STREAM_BATCH_SIZE:
+                        # 积压较多时不等待，继续推送
+                        continue
+                elif row.status != 'Running':
+                    # 执行已结束：再等待几轮，收尾批量写入的迟到日志
+                    drain_polls += 1
+                    if drain_polls >= LOG_STREAM_DRAIN_POLLS:
+                        yield sse('end', {'execution_id': execution_id, 'status': row.status, 'next_seq': cursor})
+                        return
+                else:
+                    idle_seconds += LOG_STREAM_POLL_INTERVAL
+                    if idle_seconds >= LOG_STREAM_HEARTBEAT:
+                        idle_seconds = 0.0
+                        yield ": heartbeat\n\n"
+
+                await asyncio.sleep(LOG_STREAM_POLL_INTERVAL)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get('/image')
 async def get_image(path: str = Query(..., description="File path to image")):
+    """
+    获取截图
+    只按文件名在截图索引中查找，不直接读取请求中的路径，避免读取截图目录以外的任意文件
+    """
     try:
         if not path:
             return {'code': 400, 'message': '路径是必填项'}
             
-        if not os.path.exists(path):
+        file_path = ScreenshotIndex.lookup(path)
+        if not file_path:
+            return {'code': 404, 'message': '文件未找到'}
+        if not os.path.exists(file_path):
+            ScreenshotIndex.discard(os.path.basename(file_path))
             return {'code': 404, 'message': '文件未找到'}
             
-        return FileResponse(path)
+        return FileResponse(file_path)
     except Exception as e:
         log_info(f"Get image error: {str(e)}")
         return {'code': 500, 'message': '获取图片时发生错误'}
@@ -1,13 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, or_
+from sqlalchemy import select, func, desc, case
 from backend_fastapi.db.session import get_automation_db
-from backend_fastapi.models.automation_models import AutomationProject, AutomationExecution, Project
+from backend_fastapi.models.automation_models import AutomationProject, AutomationProjectProduct, AutomationExecution, Project
+from backend_fastapi.services.execution_stats_service import ExecutionStatsService
 from datetime import datetime, timedelta
-import json
 
 router = APIRouter(tags=["Web自动化仪表板"])
 
+def is_passed_status(status):
+    return status == 'Passed' or status == '成功'
+
+async def get_distribution_data(db: AsyncSession):
+    """
+    按产品包统计测试用例数（产品包关联表上的索引聚合）
+    """
+    stmt = select(
+        AutomationProjectProduct.product_package_name,
+        func.count(func.distinct(AutomationProjectProduct.automation_project_id))
+    ).where(
+        AutomationProjectProduct.product_package_name != ''
+    ).group_by(AutomationProjectProduct.product_package_name)
+    return [{'name': name, 'value': cnt} for name, cnt in (await db.execute(stmt)).all()]
+
 @router.get('/')
 async def get_dashboard_data(db: AsyncSession = Depends(get_automation_db)):
     try:
@@ -16,101 +31,58 @@ async def get_dashboard_data(db: AsyncSession = Depends(get_automation_db)):
         today_start = datetime.combine(now.date(), datetime.min.time())
         yesterday_start = today_start - timedelta(days=1)
         
-        # 1. Key Metrics
-        # Total Products
-        stmt_total_projects = select(func.count(Project.id))
-        res_total_projects = await db.execute(stmt_total_projects)
-        total_projects = res_total_projects.scalar() or 0
-        
-        # Yesterday Total
-        stmt_yesterday_projects = select(func.count(Project.id)).where(Project.created_at < today_start)
-        res_yesterday_projects = await db.execute(stmt_yesterday_projects)
-        yesterday_total_projects = res_yesterday_projects.scalar() or 0
+        # 1. Key Metrics（每张表一次聚合查询）
+        # Total Products / Yesterday Total
+        stmt_projects = select(
+            func.count(Project.id),
+            func.count(case((Project.created_at < today_start, Project.id)))
+        )
+        total_projects, yesterday_total_projects = (await db.execute(stmt_projects)).one()
         
         project_growth = total_projects - yesterday_total_projects
         
-        # Total Test Cases
-        stmt_total_cases = select(func.count(AutomationProject.id))
-        res_total_cases = await db.execute(stmt_total_cases)
-        total_test_cases = res_total_cases.scalar() or 0
-        
-        # Today New Cases
-        stmt_today_cases = select(func.count(AutomationProject.id)).where(AutomationProject.created_at >= today_start)
-        res_today_cases = await db.execute(stmt_today_cases)
-        today_new_cases = res_today_cases.scalar() or 0
-        
-        # Success Rates
-        # Today's Executions
-        stmt_today_execs = select(AutomationExecution).where(AutomationExecution.end_time >= today_start)
-        res_today_execs = await db.execute(stmt_today_execs)
-        today_executions = res_today_execs.scalars().all()
+        # Total Test Cases / Today New Cases
+        stmt_cases = select(
+            func.count(AutomationProject.id),
+            func.count(case((AutomationProject.created_at >= today_start, AutomationProject.id)))
+        )
+        total_test_cases, today_new_cases = (await db.execute(stmt_cases)).one()
         
-        today_total_exec = len(today_executions)
-        today_passed = sum(1 for e in today_executions if e.status == 'Passed' or e.status == '成功')
+        # Success Rates（从执行日汇总表读取，按结束日期统计）
+        trend_start = now.date() - timedelta(days=6)
+        daily_counts = await ExecutionStatsService.daily_status_counts(db, trend_start, now.date())
+
+        today_counts = daily_counts.get(now.date().strftime('%Y-%m-%d'), {})
+        today_total_exec = sum(today_counts.values())
+        today_passed = sum(cnt for status, cnt in today_counts.items() if is_passed_status(status))
         today_success_rate = round((today_passed / today_total_exec * 100), 2) if today_total_exec > 0 else 0
         
         # Historical Success Rate
-        stmt_total_execs_count = select(func.count(AutomationExecution.id))
-        res_total_execs_count = await db.execute(stmt_total_execs_count)
-        total_executions_count = res_total_execs_count.scalar() or 0
-        
-        stmt_passed_count = select(func.count(AutomationExecution.id)).where(
-            or_(AutomationExecution.status == 'Passed', AutomationExecution.status == '成功')
-        )
-        res_passed_count = await db.execute(stmt_passed_count)
-        total_passed_count = res_passed_count.scalar() or 0
+        status_totals = await ExecutionStatsService.status_totals(db)
+        total_executions_count = sum(status_totals.values())
+        total_passed_count = sum(cnt for status, cnt in status_totals.items() if is_passed_status(status))
         
         historical_success_rate = round((total_passed_count / total_executions_count * 100), 2) if total_executions_count > 0 else 0
         
         # 2. Trend Chart (Last 7 Days)
-        trend_data = []
-        for i in range(6, -1, -1):
-            day = now.date() - timedelta(days=i)
-            day_start = datetime.combine(day, datetime.min.time())
-            day_end = datetime.combine(day, datetime.max.time())
-            
-            stmt_day_execs = select(AutomationExecution).where(
-                AutomationExecution.end_time >= day_start,
-                AutomationExecution.end_time <= day_end
-            )
-            res_day_execs = await db.execute(stmt_day_execs)
-            day_execs = res_day_execs.scalars().all()
-            
-            day_total = len(day_execs)
-            day_passed = sum(1 for e in day_execs if e.status == 'Passed' or e.status == '成功')
-            rate = round((day_passed / day_total * 100), 2) if day_total > 0 else 0
-            
-            trend_data.append({
-                'date': day.strftime('%Y-%m-%d'),
-                'rate': rate
-            })
+        trend_dates, trend_rates = ExecutionStatsService.success_trend(trend_start, now.date(), daily_counts, is_passed_status)
+        trend_data = [{'date': d, 'rate': rate} for d, rate in zip(trend_dates, trend_rates)]
             
         # 3. Distribution Chart (By Product Package)
-        stmt_all_cases = select(AutomationProject.product_package_names)
-        res_all_cases = await db.execute(stmt_all_cases)
-        all_cases_pkgs = res_all_cases.scalars().all()
-        
-        pkg_counts = {}
-        for pkgs in all_cases_pkgs:
-            if pkgs:
-                try:
-                    pkg_list = json.loads(pkgs)
-                    if not isinstance(pkg_list, list):
-                        pkg_list = [str(pkg_list)]
-                except:
-                    pkg_list = pkgs.split(',')
-                
-                for pkg in pkg_list:
-                    pkg = pkg.strip()
-                    if pkg:
-                        pkg_counts[pkg] = pkg_counts.get(pkg, 0) + 1
-                        
-        distribution_data = [{'name': k, 'value': v} for k, v in pkg_counts.items()]
-        
-        # 4. Recent Activities
-        stmt_recent = select(AutomationExecution).order_by(desc(AutomationExecution.end_time)).limit(50)
-        res_recent = await db.execute(stmt_recent)
-        recent_activities = res_recent.scalars().all()
+        distribution_data = await get_distribution_data(db)
+        
+        # 4. Recent Activities（只取列表展示的列，不读取日志大字段）
+        stmt_recent = select(
+            AutomationExecution.id,
+            AutomationExecution.project_id,
+            AutomationExecution.process_name,
+            AutomationExecution.status,
+            AutomationExecution.start_time,
+            AutomationExecution.end_time,
+            AutomationExecution.executed_by,
+            AutomationExecution.task_id
+        ).order_by(desc(AutomationExecution.end_time)).limit(50)
+        recent_activities = (await db.execute(stmt_recent)).all()
         
         data = {
             'stats': {
@@ -123,7 +95,16 @@ async def get_dashboard_data(db: AsyncSession = Depends(get_automation_db)):
             },
             'trendChart': trend_data,
             'distributionChart': distribution_data,
-            'recentActivities': [e.to_dict() for e in recent_activities]
+            'recentActivities': [{
+                'id': e.id,
+                'project_id': e.project_id,
+                'process_name': e.process_name,
+                'status': e.status,
+                'start_time': e.start_time.strftime('%Y-%m-%d %H:%M:%S') if e.start_time else None,
+                'end_time': e.end_time.strftime('%Y-%m-%d %H:%M:%S') if e.end_time else None,
+                'executed_by': e.executed_by,
+                'task_id': e.task_id
+            } for e in recent_activities]
         }
         
         return {'code': 200, 'msg': 'success', 'data': data}
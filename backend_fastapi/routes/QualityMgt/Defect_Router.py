@@ -1,11 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, desc, func, or_
 from typing import List, Optional
 from datetime import datetime
-import io
-import csv
 import logging
 
 from backend_fastapi.db.session import get_db
@@ -15,12 +12,31 @@ from backend_fastapi.models.pm_models import PMDefect, PMProject, PMModule, PMRe
 from backend_fastapi.models.test_mgt_models import TestCase
 from backend_fastapi.routes.QualityMgt.schemas import DefectCreate, DefectUpdate, DefectResponse
 from backend_fastapi.services.automation_service import AutomationService
+from backend_fastapi.services.activity_service import ActivityService, ACTION_CREATE, ACTION_UPDATE
+from backend_fastapi.services.search_service import SearchService
+from backend_fastapi.services.export_service import ExportService
+from backend_fastapi.services.pagination_service import PaginationService
 from backend_fastapi.core.constants import DEFECT_STATUS_PROGRESS_MAP
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["缺陷管理"])
 
+# 缺陷列表导出列
+DEFECT_EXPORT_COLUMNS = [
+    ('ID', PMDefect.defect_code, None),
+    ('标题', PMDefect.title, None),
+    ('类型', PMDefect.defect_type, None),
+    ('状态', PMDefect.status, None),
+    ('优先级', PMDefect.priority, None),
+    ('严重程度', PMDefect.severity, None),
+    ('创建人', PMDefect.create_by, None),
+    ('创建时间', PMDefect.create_time, None)
+]
+
+# 游标分页排序：(排序键, 主键)
+DEFECT_CURSOR_ORDER = [(PMDefect.create_time, True), (PMDefect.defect_id, True)]
+
 @router.get("/list", response_model=None)
 async def get_defect_list(
     project_id: Optional[int] = None,
@@ -35,13 +51,17 @@ async def get_defect_list(
     end_date: Optional[str] = None,
     search_term: Optional[str] = None,
     export: Optional[bool] = False,
+    export_format: Optional[str] = 'csv',
     severity: Optional[str] = None,
     page: int = 1,
     page_size: int = 20,
+    cursor: Optional[str] = None,
+    cursor_mode: Optional[bool] = False,
     db: AsyncSession = Depends(get_db)
 ):
     """
     获取缺陷列表
+    cursor_mode=true 或传入上一页返回的 next_cursor 时使用游标分页，否则按页码分页
     """
     stmt = select(PMDefect, TestCase.case_name, PMRequirement.title.label("req_title")).outerjoin(TestCase, PMDefect.case_id == TestCase.case_id).outerjoin(PMRequirement, PMDefect.linked_req_id == PMRequirement.req_id).where(PMDefect.del_flag == 0)
     
@@ -80,51 +100,33 @@ async def get_defect_list(
         except ValueError:
             pass
 
-    if search_term:
-        stmt = stmt.where(or_(
-            PMDefect.title.like(f"%{search_term}%"),
-            PMDefect.defect_code.like(f"%{search_term}%")
-        ))
+    stmt = SearchService.apply(stmt, 'defect', search_term)
     
     # Export logic
     if export:
         stmt = stmt.order_by(desc(PMDefect.create_time))
-        result = await db.execute(stmt)
-        defects = result.scalars().all()
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['ID', '标题', '类型', '状态', '优先级', '严重程度', '创建人', '创建时间'])
-        for d in defects:
-            writer.writerow([
-                d.defect_code, 
-                d.title, 
-                d.defect_type, 
-                d.status, 
-                d.priority, 
-                d.severity,
-                d.create_by, 
-                d.create_time.strftime('%Y-%m-%d %H:%M:%S') if d.create_time else ''
-            ])
-        
-        output.seek(0)
-        return StreamingResponse(
-            iter([output.getvalue()]), 
-            media_type="text/csv", 
-            headers={"Content-Disposition": "attachment; filename=defects.csv"}
-        )
+        return ExportService.response(stmt, DEFECT_EXPORT_COLUMNS, 'defects', export_format, '缺陷列表')
 
-    # 计算总数
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    count_result = await db.execute(count_stmt)
-    total = count_result.scalar()
-    
-    # 排序和分页
-    stmt = stmt.order_by(desc(PMDefect.create_time))
-    stmt = stmt.offset((page - 1) * page_size).limit(page_size)
-    
-    result = await db.execute(stmt)
-    defects_with_data = result.all()
+    next_cursor = None
+    if cursor_mode or cursor:
+        # 游标分页：按 (create_time, defect_id) 倒序，总数使用缓存
+        try:
+            defects_with_data, next_cursor = await PaginationService.fetch(db, stmt, DEFECT_CURSOR_ORDER, cursor, page_size)
+        except ValueError as e:
+            return {'code': 400, 'msg': str(e), 'data': None}
+        total = await PaginationService.cached_total(db, stmt, 'defect')
+    else:
+        # 计算总数
+        count_stmt = select(func.count()).select_from(stmt.subquery())
+        count_result = await db.execute(count_stmt)
+        total = count_result.scalar()
+
+        # 排序和分页
+        stmt = stmt.order_by(desc(PMDefect.create_time))
+        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
+
+        result = await db.execute(stmt)
+        defects_with_data = result.all()
     
     items = []
     for defect, case_name, req_title in defects_with_data:
@@ -140,7 +142,8 @@ async def get_defect_list(
             'items': items,
             'total': total,
             'page': page,
-            'page_size': page_size
+            'page_size': page_size,
+            'next_cursor': next_cursor
         }
     }
 
@@ -212,6 +215,10 @@ async def create_defect(
     # 生成 defect_code (e.g. BUG-10001)
     new_defect.defect_code = f"BUG-{10000 + new_defect.defect_id}"
     db.add(new_defect)
+    await ActivityService.record(
+        db, current_user.username, ACTION_CREATE, 'defect', new_defect.defect_id,
+        target_name=new_defect.title, status=new_defect.status, project_id=new_defect.project_id
+    )
     await db.commit()
     await db.refresh(new_defect)
     
@@ -310,6 +317,10 @@ async def update_defect(
     for key, value in update_data.items():
         setattr(defect, key, value)
 
+    await ActivityService.record(
+        db, current_user.username, ACTION_UPDATE, 'defect', defect.defect_id,
+        target_name=defect.title, status=defect.status, project_id=defect.project_id
+    )
     await db.commit()
     await db.refresh(defect)
     
@@ -1,50 +1,45 @@
 from fastapi import APIRouter, Depends, HTTPException, Response
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, FileResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
-from backend_fastapi.db.session import get_automation_db
+from sqlalchemy import select, desc, func, or_, and_
+from sqlalchemy.orm import defer
+from backend_fastapi.db.session import get_automation_db, AutomationSessionLocal
 from backend_fastapi.models.automation_models import Project, AutomationProject, AutomationExecution
 from backend_fastapi.utils.UitilTools import UitilTools
+from backend_fastapi.services.execution_log_service import ExecutionLogService
+from backend_fastapi.services.execution_stats_service import ExecutionStatsService
+from backend_fastapi.utils.screenshot_index import ScreenshotIndex
+from backend_fastapi.utils.LogManeger import log_info
+from backend_fastapi.services.report_asset_service import ReportAssetBundler, REPORT_IMAGE_QUALITY
+from backend_fastapi.services.report_job_service import ReportJobService
+from backend_fastapi.tasks.report_tasks import generate_report_artifact
 from datetime import datetime, timedelta
 from typing import List, Optional
 from pydantic import BaseModel
 import re
 import html
-import base64
 import os
 import json
+import tempfile
+import zipfile
 
 router = APIRouter(tags=["报告"])
 
+# 报告中每批读取并渲染的执行记录数
+REPORT_EXECUTION_BATCH_SIZE = 50
+REPORT_IMAGE_PATTERN = re.compile(r'([a-zA-Z]:\s*\\[^<>"|?*\r\n]+\.(?:png|jpg|jpeg|bmp|gif))', re.IGNORECASE)
+
 # Pydantic model for report generation request
 class ReportGenerateRequest(BaseModel):
     product_packages: List[str]
     start_date: Optional[str] = None
     end_date: Optional[str] = None
-
-def get_file_base64(file_path):
-    """
-    读取文件并转换为Base64编码
-    """
-    try:
-        if not os.path.exists(file_path):
-            return None
-        with open(file_path, "rb") as image_file:
-            encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-            # 根据文件扩展名确定 mime type
-            ext = os.path.splitext(file_path)[1].lower()
-            mime_type = "image/png"  # default
-            if ext in ['.jpg', '.jpeg']:
-                mime_type = "image/jpeg"
-            elif ext == '.gif':
-                mime_type = "image/gif"
-            elif ext == '.bmp':
-                mime_type = "image/bmp"
-            
-            return f"data:{mime_type};base64,{encoded_string}"
-    except Exception as e:
-        print(f"Error encoding file {file_path}: {str(e)}")
-        return None
+    # 报告打包方式: html（图片压缩后内嵌）/ zip（HTML + assets 图片目录）
+    package: str = 'html'
+    # 截图压缩格式 webp/jpeg 与质量 1-100
+    image_format: Optional[str] = None
+    image_quality: Optional[int] = None
 
 def format_log_line(line):
     if not line: return ''
@@ -82,11 +77,9 @@ def format_log_line(line):
         
         # 同样的标准化逻辑
         if 'IMG_LOGS' in clean_path.upper():
-            try:
-                filename = os.path.basename(clean_path)
+            filename = ScreenshotIndex.file_name(clean_path)
+            if filename:
                 key_to_use = f"IMG_LOGS/{filename}"
-            except:
-                pass
 
         # Escape backslashes for JS string (only needed if key has backslashes, standard key has forward slashes)
         js_path = key_to_use.replace('\\', '\\\\')
@@ -209,63 +202,43 @@ def render_log_html_pycharm_style(parsed_log, execution_id):
     
     return f'<div class="log-detail-container">{stats_html}{content_html}</div>'
 
-def generate_html_template(start_date, end_date, packages, stats, trend, hierarchy, embedded_images=None):
-    
-    # Serialize embedded images to JSON
-    embedded_images_json = json.dumps(embedded_images or {})
+def _parse_product_ids(product_ids, ap_product_ids):
+    """
+    解析自动化项目上的 product_ids（JSON 列表/单值/普通字符串）并加入集合
+    """
+    if not product_ids:
+        return
+    try:
+        parsed = json.loads(str(product_ids))
+        if isinstance(parsed, list):
+            for p in parsed:
+                ap_product_ids.add(str(p))
+        else:
+            ap_product_ids.add(str(parsed))
+    except:
+        ap_product_ids.add(str(product_ids))
 
-    # Generate Product Groups HTML
-    product_groups_html = ""
-    
-    for prod_key, prod_data in hierarchy.items():
-        prod_info = prod_data['info']
-        test_cases = prod_data['test_cases']
-        
-        # Calculate stats for this product
-        prod_tc_count = len(test_cases)
-        
-        # Collect all executions for this product group
-        all_executions = []
-        ap_product_ids = set()
-        
-        for tc in test_cases.values():
-            all_executions.extend(tc['executions'])
-            pid = tc['info'].get('product_ids')
-            if pid:
-                try:
-                    parsed = json.loads(str(pid))
-                    if isinstance(parsed, list):
-                        for p in parsed:
-                            ap_product_ids.add(str(p))
-                    else:
-                        ap_product_ids.add(str(parsed))
-                except:
-                    ap_product_ids.add(str(pid))
-            
-        prod_display_id = " | ".join(sorted(ap_product_ids)) if ap_product_ids else prod_info.get('product_id', '')
-        
-        prod_exec_count = len([e for e in all_executions if e.get('status')])
-        prod_pass_count = len([e for e in all_executions if e.get('status') == '成功' or e.get('status') == 'passed'])
-        prod_fail_count = len([e for e in all_executions if e.get('status') == '失败' or e.get('status') == 'failed'])
-        
-        test_cases_html = ""
-        for tc_key, tc_data in test_cases.items():
-            tc_info = tc_data['info']
-            executions = tc_data['executions']
-            
-            tc_exec_count = len(executions)
-            
-            executions_html = ""
-            for exe in executions:
-                status_class = 'success' if (exe['status'] == '成功' or exe['status'] == 'passed') else 'failed' if (exe['status'] == '失败' or exe['status'] == 'failed') else 'running'
-                
-                # Logs
-                detailed_log = exe.get('detailed_log') or exe.get('log_message', '')
-                # Use new render function instead of UitilTools
-                parsed_log = UitilTools.parse_automation_log(detailed_log)
-                logs_html = render_log_html_pycharm_style(parsed_log, exe['id'])
-                
-                executions_html += f"""
+def is_success_status(status):
+    return status == '成功' or status == 'passed'
+
+def is_failed_status(status):
+    return status == '失败' or status == 'failed'
+
+def render_execution_html(exe):
+    """
+    渲染单次执行（头部 + 日志）
+    """
+    status_class = 'success' if is_success_status(exe['status']) else 'failed' if is_failed_status(exe['status']) else 'running'
+
+    # Logs
+    parsed_log = exe.get('parsed_log')
+    if parsed_log is None:
+        # 旧数据没有预解析结果，回退实时解析
+        detailed_log = exe.get('detailed_log') or exe.get('log_message', '')
+        parsed_log = UitilTools.parse_automation_log(detailed_log)
+    logs_html = render_log_html_pycharm_style(parsed_log, exe['id'])
+
+    return f"""
                 <div class="execution-item">
                     <div class="execution-header {status_class}" onclick="toggleExecution('{exe['id']}')">
                         <span class="status-tag {status_class}">{exe['status']}</span>
@@ -278,8 +251,12 @@ def generate_html_template(start_date, end_date, packages, stats, trend, hierarc
                     </div>
                 </div>
                 """
-            
-            test_cases_html += f"""
+
+def render_test_case_open(tc_key, tc_info, tc_exec_count):
+    """
+    渲染测试用例头部，执行记录随后流式输出，最后由 TEST_CASE_CLOSE_HTML 闭合
+    """
+    return f"""
             <div class="test-case-item">
                 <div class="test-case-header" onclick="toggleTestCase('{tc_key}')">
                     <div class="tc-title">
@@ -294,15 +271,21 @@ def generate_html_template(start_date, end_date, packages, stats, trend, hierarc
                     </div>
                 </div>
                 <div class="test-case-body hidden paginated-container" id="body-{tc_key}" data-page-size="10">
-                    {executions_html}
+                    """
+
+TEST_CASE_CLOSE_HTML = """
                     <div class="pagination-controls"></div>
                 </div>
             </div>
             """
-        
-        prod_pass_rate = round(prod_pass_count / prod_exec_count * 100, 2) if prod_exec_count > 0 else 0
-        
-        product_groups_html += f"""
+
+def render_product_group_open(prod_key, prod_info, prod_display_id, prod_tc_count, prod_exec_count, prod_pass_count, prod_fail_count):
+    """
+    渲染产品分组头部，测试用例随后流式输出，最后由 PRODUCT_GROUP_CLOSE_HTML 闭合
+    """
+    prod_pass_rate = round(prod_pass_count / prod_exec_count * 100, 2) if prod_exec_count > 0 else 0
+
+    return f"""
         <div class="product-group">
             <div class="product-header" onclick="toggleProduct('{prod_key}')">
                 <div class="prod-title">
@@ -320,14 +303,30 @@ def generate_html_template(start_date, end_date, packages, stats, trend, hierarc
                 </div>
             </div>
             <div class="product-body" id="body-{prod_key}">
-                {test_cases_html}
+                """
+
+PRODUCT_GROUP_CLOSE_HTML = """
             </div>
         </div>
         """
 
+def render_embedded_images_script(images, assets):
+    """
+    输出一段追加图片数据的脚本，图片随执行记录分批嵌入，避免在内存中累积整份图片映射
+    :param images: 图片 Key -> 内容哈希
+    :param assets: 本批新增的资源 内容哈希 -> {full, thumb}
+    """
+    assets_json = json.dumps(assets).replace('</', '<\\/')
+    images_json = json.dumps(images).replace('</', '<\\/')
+    return f"\n    <script>Object.assign(embeddedAssets, {assets_json}); Object.assign(embeddedImages, {images_json});</script>\n"
+
+def render_report_head(start_date, end_date, stats, trend=None):
+    """
+    渲染报告开头（样式、页头、统计指标），到产品分组容器为止
+    """
     current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    html = f"""<!DOCTYPE html>
+
+    return f"""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
@@ -833,6 +832,12 @@ def generate_html_template(start_date, end_date, packages, stats, trend, hierarc
     </style>
 </head>
 <body>
+    <script>
+        // Embedded images data (streamed from server in chunks)
+        // embeddedImages: 图片 Key -> 内容哈希; embeddedAssets: 内容哈希 -> {{full, thumb}}
+        const embeddedImages = {{}};
+        const embeddedAssets = {{}};
+    </script>
     <div class="container">
         <!-- Header -->
         <div class="report-header">
@@ -879,7 +884,13 @@ def generate_html_template(start_date, end_date, packages, stats, trend, hierarc
         <div class="details-section">
             <div class="section-title">详细测试记录</div>
             <div class="products-container">
-                {product_groups_html}
+"""
+
+def render_report_tail():
+    """
+    渲染报告结尾（闭合容器、图片弹窗与交互脚本）
+    """
+    return f"""
             </div>
         </div>
     </div>
@@ -891,9 +902,6 @@ def generate_html_template(start_date, end_date, packages, stats, trend, hierarc
     </div>
 
     <script>
-        // Embedded images data (Pre-loaded from server)
-        const embeddedImages = {embedded_images_json};
-        
         function toggleProduct(prodKey) {{
             const body = document.getElementById('body-' + prodKey);
             const icon = document.getElementById('icon-' + prodKey);
@@ -955,17 +963,26 @@ def generate_html_template(start_date, end_date, packages, stats, trend, hierarc
              // key comes in as argument.
              
              // Try to find in embedded map
-             let base64Data = embeddedImages[key];
+             let digest = embeddedImages[key];
              
              // Fallback: try replacing backslashes with forward slashes
-             if (!base64Data) {{
+             if (!digest) {{
                  const altKey = key.replace(/\\\\/g, '/');
-                 base64Data = embeddedImages[altKey];
+                 digest = embeddedImages[altKey];
              }}
+             const asset = digest ? embeddedAssets[digest] : null;
              
-             if (base64Data) {{
+             if (asset) {{
                  modal.style.display = "flex";
-                 modalImg.src = base64Data;
+                 // 先显示缩略图，完整图加载完成后替换
+                 modalImg.src = asset.thumb || asset.full;
+                 if (asset.thumb) {{
+                     const fullImg = new Image();
+                     fullImg.onload = function() {{
+                         if (modalImg.src.endsWith(asset.thumb)) modalImg.src = asset.full;
+                     }};
+                     fullImg.src = asset.full;
+                 }}
              }} else {{
                  alert("图片数据未嵌入或未找到: " + key);
              }}
@@ -1022,7 +1039,6 @@ def generate_html_template(start_date, end_date, packages, stats, trend, hierarc
 </body>
 </html>
 """
-    return html
 
 @router.get("/product-packages")
 async def get_product_packages(
@@ -1040,125 +1056,207 @@ async def get_product_packages(
     except Exception as e:
         return JSONResponse(status_code=500, content={'code': 500, 'msg': str(e)})
 
-@router.post("/generate")
-async def generate_report(
-    request: ReportGenerateRequest,
-    db: AsyncSession = Depends(get_automation_db)
-):
+def collect_report_images(detailed_log, bundler):
     """
-    Generate HTML report based on selected products and date range
+    从日志中提取截图路径，交给打包器按内容哈希去重、压缩
+    :param bundler: 本次报告的 ReportAssetBundler
+    :return: ({标准 Key: 内容哈希}, {内容哈希: 资源地址})，只包含本次新发现的图片
     """
-    try:
-        product_packages = request.product_packages
-        start_date_str = request.start_date
-        end_date_str = request.end_date
+    images = {}
+    assets = {}
+    if not detailed_log:
+        return images, assets
+    # 优化正则：允许盘符冒号后有空白字符，允许路径中间有空白字符（因为[^...]包含空白），但排除换行符防止跨行匹配
+    matches = REPORT_IMAGE_PATTERN.findall(detailed_log)
+    for path in matches:
+        # 1. 基础清理：去除首尾空白
+        # 2. 强力清理：去除所有空白字符
+        clean_path = "".join(path.split())
 
-        if not product_packages:
-            return JSONResponse(status_code=400, content={'code': 400, 'msg': 'Please select at least one product'})
+        # 提取文件名作为唯一标识
+        filename = ScreenshotIndex.file_name(clean_path)
+        if not filename:
+            continue
+        # 统一使用标准 Key
+        final_key = f"IMG_LOGS/{filename}"
 
-        # Parse dates
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else datetime.now() - timedelta(days=30)
-        end_date = datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else datetime.now()
-        # Adjust end_date to include the full day
-        end_date = end_date.replace(hour=23, minute=59, second=59)
+        # 避免重复读取
+        if final_key in bundler.keys or final_key in bundler.missing_keys:
+            continue
 
-        print(f"DEBUG: Selected Packages: {product_packages}")
-        print(f"DEBUG: Start Date: {start_date}, End Date: {end_date}")
+        # 通过截图索引按文件名定位实际文件，忽略 Log 中路径的差异（盘符、空格等）
+        real_path = ScreenshotIndex.lookup(filename)
+        if not real_path:
+            bundler.missing_keys.add(final_key)
+            continue
+
+        digest, new_assets = bundler.add_image(final_key, real_path)
+        if digest:
+            images[final_key] = digest
+            assets.update(new_assets)
+    return images, assets
+
+def _rendered_log_text(parsed_log):
+    """
+    拼接解析结构中会被渲染的日志行，截图只需从这些行中收集
+    """
+    lines = list(parsed_log.get('initLogs', []))
+    for step in parsed_log.get('testSteps', []):
+        lines.extend(step.get('logs', []))
+    lines.extend(parsed_log.get('endLogs', []))
+    return '\n'.join(lines)
+
+def _load_execution_structures(executions, parsed_logs):
+    """
+    解压执行结束时持久化的解析结构（同步执行，在线程池中调用）
+    :param parsed_logs: {execution_id: 压缩的解析结构}，见 ExecutionLogService.fetch_parsed_logs
+    :return: {execution_id: 解析结构}，无可用结构的执行不在结果中
+    """
+    structures = {}
+    for exe in executions:
+        structure = ExecutionLogService.load_log_structure(exe, parsed_logs.get(exe.id))
+        if structure:
+            structures[exe.id] = structure['logs']
+    return structures
+
+def _render_execution_batch(executions, structures, raw_logs, bundler):
+    """
+    渲染一批执行记录并收集其中新出现的截图（同步执行，在线程池中调用）
+    :param structures: {execution_id: 解析结构}，有解析结构的执行无需读取原始日志
+    :param raw_logs: {execution_id: 原始日志}，仅包含没有可用解析结构的执行
+    """
+    chunks = []
+    images = {}
+    assets = {}
+    for exe in executions:
+        # detailed_log / log_message 为延迟加载列，这里只取渲染头部需要的字段
+        exe_dict = {
+            'id': exe.id,
+            'status': exe.status,
+            'start_time': exe.start_time.strftime('%Y-%m-%d %H:%M:%S') if exe.start_time else None,
+            'end_time': exe.end_time.strftime('%Y-%m-%d %H:%M:%S') if exe.end_time else None,
+            'executed_by': exe.executed_by,
+            'parsed_log': structures.get(exe.id),
+            'detailed_log': raw_logs.get(exe.id)
+        }
+        chunks.append(render_execution_html(exe_dict))
+        if exe_dict['parsed_log'] is not None:
+            log_text = _rendered_log_text(exe_dict['parsed_log'])
+        else:
+            log_text = exe_dict['detailed_log'] or ''
+        new_images, new_assets = collect_report_images(log_text, bundler)
+        images.update(new_images)
+        assets.update(new_assets)
+    if images:
+        chunks.append(render_embedded_images_script(images, assets))
+    return ''.join(chunks)
 
+async def _count_report_executions(db, ap_ids, start_date, end_date):
+    """
+    按自动化项目、状态分组统计执行数，只在数据库中聚合，不读取执行记录
+    :return: {ap_id: {status: 执行数}}
+    """
+    counts = {}
+    if not ap_ids:
+        return counts
+    stmt = select(
+        AutomationExecution.project_id,
+        AutomationExecution.status,
+        func.count(AutomationExecution.id).label('cnt')
+    ).where(
+        AutomationExecution.project_id.in_(ap_ids),
+        AutomationExecution.start_time >= start_date,
+        AutomationExecution.start_time <= end_date
+    ).group_by(AutomationExecution.project_id, AutomationExecution.status)
+    for row in (await db.execute(stmt)).all():
+        counts.setdefault(row.project_id, {})[row.status] = row.cnt
+    return counts
+
+async def _report_trend(db, ap_ids, start_date, end_date):
+    """
+    从执行日汇总表读取每日成功率（按结束日期统计）
+    :return: (日期列表, 成功率列表)
+    """
+    daily_counts = {}
+    if ap_ids:
+        daily_counts = await ExecutionStatsService.daily_status_counts(db, start_date.date(), end_date.date(), ap_ids)
+    return ExecutionStatsService.success_trend(start_date.date(), end_date.date(), daily_counts, is_success_status)
+
+async def _iter_ap_execution_batches(db, ap_id, start_date, end_date):
+    """
+    按 (start_time, id) 倒序游标分批读取某个自动化项目的执行记录
+    detailed_log / log_message / parsed_log 延迟加载，由渲染时按需批量读取
+    """
+    last = None
+    while True:
+        stmt = select(AutomationExecution).options(
+            defer(AutomationExecution.detailed_log, raiseload=True),
+            defer(AutomationExecution.log_message, raiseload=True),
+            defer(AutomationExecution.parsed_log, raiseload=True)
+        ).where(
+            AutomationExecution.project_id == ap_id,
+            AutomationExecution.start_time >= start_date,
+            AutomationExecution.start_time <= end_date
+        )
+        if last is not None:
+            stmt = stmt.where(or_(
+                AutomationExecution.start_time < last[0],
+                and_(AutomationExecution.start_time == last[0], AutomationExecution.id < last[1])
+            ))
+        stmt = stmt.order_by(
+            desc(AutomationExecution.start_time), desc(AutomationExecution.id)
+        ).limit(REPORT_EXECUTION_BATCH_SIZE)
+        executions = (await db.execute(stmt)).scalars().all()
+        if not executions:
+            return
+        last = (executions[-1].start_time, executions[-1].id)
+        yield executions
+        if len(executions) < REPORT_EXECUTION_BATCH_SIZE:
+            return
+
+async def stream_report_html(product_packages, start_date, end_date, bundler, progress=None, session_factory=None):
+    """
+    以生成器方式分块输出报告：先输出统计指标，再按产品分组 -> 测试用例 -> 执行记录逐批输出，
+    每批执行记录（含日志、截图）渲染后即释放，内存占用与时间范围大小无关
+    :param progress: 进度回调 progress(已渲染执行数, 执行总数)
+    :param session_factory: 自动化库会话工厂，默认 AutomationSessionLocal
+    出错时直接抛出异常，由调用方丢弃未完成的产物
+    """
+    # 后台任务中没有依赖注入的会话，这里自行管理会话
+    async with (session_factory or AutomationSessionLocal)() as db:
         # 1. Initialize Hierarchy with Selected Products
-        hierarchy = {}
-        # Fetch Project objects for selected packages
         stmt = select(Project).where(Project.product_package_name.in_(product_packages))
         result = await db.execute(stmt)
         selected_projects = result.scalars().all()
-        
         print(f"DEBUG: Found {len(selected_projects)} projects matching packages")
         project_map = {p.id: p for p in selected_projects}
-        print(f"DEBUG: Selected Project IDs: {list(project_map.keys())}")
-        
-        for p in selected_projects:
-            prod_key = f"{p.product_package_name}_{p.id}"
-            safe_prod_key = re.sub(r'[^a-zA-Z0-9]', '_', prod_key)
-            hierarchy[safe_prod_key] = {
-                'info': p.to_dict(),
-                'test_cases': {}
-            }
 
         # 2. Find Test Cases (AutomationProjects) for these products
-        if not project_map:
-             # Return early if no projects found, to avoid error in in_ query
-             relevant_aps = []
-        else:
+        relevant_aps = []
+        if project_map:
             stmt = select(AutomationProject).where(AutomationProject.project_id.in_(project_map.keys()))
             result = await db.execute(stmt)
             relevant_aps = result.scalars().all()
-        
-        print(f"DEBUG: Found {len(relevant_aps)} relevant AutomationProjects by project_id")
-        
-        relevant_ap_ids = []
-        ap_map = {}
-
+        relevant_ap_ids = [ap.id for ap in relevant_aps]
+        aps_by_project = {}
         for ap in relevant_aps:
-            relevant_ap_ids.append(ap.id)
-            ap_map[ap.id] = ap
-            
-            # Add to hierarchy
-            # Find which project this AP belongs to
-            if ap.project_id in project_map:
-                p = project_map[ap.project_id]
-                prod_key = f"{p.product_package_name}_{p.id}"
-                safe_prod_key = re.sub(r'[^a-zA-Z0-9]', '_', prod_key)
-                
-                tc_key = f"{ap.id}_{ap.process_name}"
-                safe_tc_key = re.sub(r'[^a-zA-Z0-9]', '_', tc_key)
-                
-                if safe_prod_key in hierarchy:
-                    hierarchy[safe_prod_key]['test_cases'][safe_tc_key] = {
-                        'info': ap.to_dict(),
-                        'executions': []
-                    }
-
-        # 3. Query Executions
-        executions = []
-        if relevant_ap_ids:
-            stmt = select(AutomationExecution).where(
-                AutomationExecution.project_id.in_(relevant_ap_ids),
-                AutomationExecution.start_time >= start_date,
-                AutomationExecution.start_time <= end_date
-            ).order_by(desc(AutomationExecution.start_time))
-            result = await db.execute(stmt)
-            executions = result.scalars().all()
-            
-        print(f"DEBUG: Found {len(executions)} executions in date range")
+            aps_by_project.setdefault(ap.project_id, []).append(ap)
 
-        # 4. Distribute Executions to Hierarchy
-        for exe in executions:
-            ap = ap_map.get(exe.project_id)
-            if not ap: continue
-            
-            # Since we now use project_id to link AP to Project, we can directly find the Project
-            if ap.project_id in project_map:
-                p = project_map[ap.project_id]
-                prod_key = f"{p.product_package_name}_{p.id}"
-                safe_prod_key = re.sub(r'[^a-zA-Z0-9]', '_', prod_key)
-                
-                tc_key = f"{ap.id}_{ap.process_name}"
-                safe_tc_key = re.sub(r'[^a-zA-Z0-9]', '_', tc_key)
-                
-                if safe_prod_key in hierarchy and safe_tc_key in hierarchy[safe_prod_key]['test_cases']:
-                    hierarchy[safe_prod_key]['test_cases'][safe_tc_key]['executions'].append(exe.to_dict())
-
-        # 4. Calculate Stats
-        total_executions = len(executions)
-        success_count = sum(1 for e in executions if e.status == '成功' or e.status == 'passed')
+        # 3. Calculate Stats（在数据库中按项目、状态分组聚合，不读取执行记录）
+        execution_counts = await _count_report_executions(db, relevant_ap_ids, start_date, end_date)
+        total_executions = 0
+        success_count = 0
+        for status_counts in execution_counts.values():
+            for status, cnt in status_counts.items():
+                total_executions += cnt
+                success_count += cnt if is_success_status(status) else 0
+        print(f"DEBUG: Found {total_executions} executions in date range")
         fail_count = total_executions - success_count
         success_rate = (success_count / total_executions * 100) if total_executions > 0 else 0
 
         # Calculate New Cases
         new_cases_count = 0
         if relevant_ap_ids:
-            # SQLAlchemy count query
-            from sqlalchemy import func
             stmt = select(func.count()).select_from(AutomationProject).where(
                 AutomationProject.created_at >= start_date,
                 AutomationProject.created_at <= end_date,
@@ -1166,93 +1264,13 @@ async def generate_report(
             )
             result = await db.execute(stmt)
             new_cases_count = result.scalar() or 0
-        
-        # 5. Trend Data
-        date_map = {}
-        current_d = start_date
-        while current_d <= end_date:
-            date_str = current_d.strftime('%Y-%m-%d')
-            date_map[date_str] = {'total': 0, 'success': 0}
-            current_d += timedelta(days=1)
-            
-        for exe in executions:
-            if exe.end_time:
-                d_str = exe.end_time.strftime('%Y-%m-%d')
-                if d_str in date_map:
-                    date_map[d_str]['total'] += 1
-                    if exe.status == '成功' or exe.status == 'passed':
-                        date_map[d_str]['success'] += 1
-        
-        trend_dates = sorted(date_map.keys())
-        trend_success_rates = []
-        for d in trend_dates:
-            t = date_map[d]['total']
-            s = date_map[d]['success']
-            rate = (s / t * 100) if t > 0 else 0
-            trend_success_rates.append(round(rate, 2))
-
-        # 6. Generate HTML
-        # 收集所有涉及的图片并转为Base64
-        all_images = {}
-        # 优化正则：允许盘符冒号后有空白字符，允许路径中间有空白字符（因为[^...]包含空白），但排除换行符防止跨行匹配
-        image_regex = r'([a-zA-Z]:\s*\\[^<>"|?*\r\n]+\.(?:png|jpg|jpeg|bmp|gif))'
-        
-        for exe in executions:
-            detailed_log = exe.detailed_log or exe.log_message or ''
-            if detailed_log:
-                matches = re.findall(image_regex, detailed_log, re.IGNORECASE)
-                for path in matches:
-                    # 1. 基础清理：去除首尾空白
-                    # 2. 强力清理：去除所有空白字符
-                    clean_path = "".join(path.split())
-                    
-                    # 提取文件名作为唯一标识
-                    try:
-                        filename = os.path.basename(clean_path)
-                        # 统一使用标准 Key
-                        final_key = f"IMG_LOGS/{filename}"
-                    except:
-                        continue
-
-                    # 查找策略：只根据文件名去标准目录查找
-                    # 这样可以忽略 Log 中路径的差异（盘符、空格等）
-                    real_path = None
-                    found = False
-
-                    # 候选目录列表
-                    candidate_dirs = [
-                        # 1. 用户指定的标准目录
-                        os.path.join('D:\\', 'UiAutomationProject', 'IMG_LOGS'),
-                        # 2. 项目相对目录
-                        os.path.join(os.getcwd(), 'UiAutomationProject', 'IMG_LOGS'),
-                        # 3. Log 中原始路径的目录 (如果存在)
-                        os.path.dirname(clean_path)
-                    ]
-
-                    for d in candidate_dirs:
-                        if os.path.exists(d):
-                            candidate_file = os.path.join(d, filename)
-                            if os.path.exists(candidate_file):
-                                real_path = candidate_file
-                                found = True
-                                break
-                    
-                    # 如果还没找到，尝试直接用 clean_path (绝对路径)
-                    if not found and os.path.exists(clean_path):
-                        real_path = clean_path
-                        found = True
-
-                    if found and real_path:
-                        # 避免重复读取
-                        if final_key not in all_images:
-                            b64_data = get_file_base64(real_path)
-                            if b64_data:
-                                all_images[final_key] = b64_data
-
-        html_content = generate_html_template(
+
+        # 4. Trend Data（执行日汇总表）
+        trend_dates, trend_success_rates = await _report_trend(db, relevant_ap_ids, start_date, end_date)
+
+        yield render_report_head(
             start_date=start_date.strftime('%Y-%m-%d'),
             end_date=end_date.strftime('%Y-%m-%d'),
-            packages=product_packages,
             stats={
                 'total_executions': total_executions,
                 'success_rate': round(success_rate, 2),
@@ -1266,17 +1284,180 @@ async def generate_report(
             trend={
                 'dates': trend_dates,
                 'rates': trend_success_rates
-            },
-            hierarchy=hierarchy,
-            embedded_images=all_images
+            }
+        )
+
+        # 5. Stream Product Groups
+        rendered_count = 0
+        if progress:
+            progress(rendered_count, total_executions)
+        for p in selected_projects:
+            prod_key = re.sub(r'[^a-zA-Z0-9]', '_', f"{p.product_package_name}_{p.id}")
+            prod_aps = aps_by_project.get(p.id, [])
+
+            ap_product_ids = set()
+            prod_exec_count = prod_pass_count = prod_fail_count = 0
+            for ap in prod_aps:
+                _parse_product_ids(ap.product_ids, ap_product_ids)
+                for status, cnt in execution_counts.get(ap.id, {}).items():
+                    prod_exec_count += cnt if status else 0
+                    prod_pass_count += cnt if is_success_status(status) else 0
+                    prod_fail_count += cnt if is_failed_status(status) else 0
+            prod_info = p.to_dict()
+            prod_display_id = " | ".join(sorted(ap_product_ids)) if ap_product_ids else prod_info.get('product_id', '')
+
+            yield render_product_group_open(
+                prod_key, prod_info, prod_display_id, len(prod_aps),
+                prod_exec_count, prod_pass_count, prod_fail_count
+            )
+
+            for ap in prod_aps:
+                tc_key = re.sub(r'[^a-zA-Z0-9]', '_', f"{ap.id}_{ap.process_name}")
+                tc_exec_count = sum(execution_counts.get(ap.id, {}).values())
+                yield render_test_case_open(tc_key, ap.to_dict(), tc_exec_count)
+
+                if tc_exec_count:
+                    async for executions in _iter_ap_execution_batches(db, ap.id, start_date, end_date):
+                        # 优先使用持久化的解析结构，只有旧数据才读取原始日志（含日志行表）
+                        parsed_logs = await ExecutionLogService.fetch_parsed_logs(db, executions)
+                        structures = await run_in_threadpool(_load_execution_structures, executions, parsed_logs)
+                        raw_logs = await ExecutionLogService.materialize_raw_logs(
+                            db, [exe.id for exe in executions if exe.id not in structures]
+                        )
+                        # 渲染是 CPU 密集操作，放到线程池中避免阻塞事件循环
+                        yield await run_in_threadpool(_render_execution_batch, executions, structures, raw_logs, bundler)
+                        rendered_count += len(executions)
+                        if progress:
+                            progress(rendered_count, total_executions)
+                        # 释放本批 ORM 对象与日志文本
+                        db.expunge_all()
+                        del executions, parsed_logs, structures, raw_logs
+
+                yield TEST_CASE_CLOSE_HTML
+
+            yield PRODUCT_GROUP_CLOSE_HTML
+
+        yield render_report_tail()
+
+async def write_report_artifact(artifact_path, params, progress=None, session_factory=None):
+    """
+    生成报告产物并写入磁盘（供后台任务调用）
+    html: 单文件报告（图片压缩后内嵌）；zip: report.html + assets/full、assets/thumbs 图片目录
+    先写临时文件，完成后原子替换，内存占用不随报告大小增长；生成出错时抛出异常，不替换产物
+    :param session_factory: 自动化库会话工厂，后台任务传入自己的引擎创建的工厂
+    """
+    product_packages = params['product_packages']
+    start_date = datetime.strptime(params['start_date'], '%Y-%m-%d')
+    end_date = datetime.strptime(params['end_date'], '%Y-%m-%d').replace(hour=23, minute=59, second=59)
+    image_quality = params.get('image_quality') or REPORT_IMAGE_QUALITY
+
+    os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+    html_fd, html_path = tempfile.mkstemp(prefix='report_', suffix='.html', dir=os.path.dirname(artifact_path))
+    # 立即包装描述符，后续任何一步出错都能在 finally 中关闭
+    html_file = os.fdopen(html_fd, 'wb')
+    tmp_path = f"{artifact_path}.tmp"
+    try:
+        if params.get('package') == 'zip':
+            with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                bundler = ReportAssetBundler(params.get('image_format'), image_quality, zip_file=zf)
+                with html_file:
+                    async for chunk in stream_report_html(
+                        product_packages, start_date, end_date, bundler, progress, session_factory
+                    ):
+                        html_file.write(chunk.encode('utf-8'))
+                await run_in_threadpool(zf.write, html_path, 'report.html')
+            os.replace(tmp_path, artifact_path)
+        else:
+            bundler = ReportAssetBundler(params.get('image_format'), image_quality)
+            with html_file:
+                async for chunk in stream_report_html(
+                    product_packages, start_date, end_date, bundler, progress, session_factory
+                ):
+                    html_file.write(chunk.encode('utf-8'))
+            os.replace(html_path, artifact_path)
+        log_info(
+            f"Report images {len(bundler.digests)} unique, "
+            f"{bundler.original_bytes} -> {bundler.bundled_bytes} bytes: {artifact_path}"
         )
+    finally:
+        html_file.close()
+        for path in (html_path, tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+@router.post("/generate")
+async def generate_report(
+    request: ReportGenerateRequest,
+    db: AsyncSession = Depends(get_automation_db)
+):
+    """
+    Generate HTML report based on selected products and date range
+    报告在 Celery 后台任务中生成：参数与数据水位相同的请求直接复用已生成/生成中的任务，
+    前端轮询 /jobs/{job_id} 获取进度，完成后通过 /jobs/{job_id}/download 下载
+    """
+    try:
+        product_packages = request.product_packages
+        start_date_str = request.start_date
+        end_date_str = request.end_date
 
-        response = Response(content=html_content, media_type="text/html")
-        response.headers["Content-Disposition"] = "attachment; filename=report.html"
-        return response
+        if not product_packages:
+            return JSONResponse(status_code=400, content={'code': 400, 'msg': 'Please select at least one product'})
+
+        # Parse dates
+        start_date = datetime.strptime(start_date_str, '%Y-%m-%d') if start_date_str else datetime.now() - timedelta(days=30)
+        end_date = datetime.strptime(end_date_str, '%Y-%m-%d') if end_date_str else datetime.now()
+        # Adjust end_date to include the full day
+        end_date = end_date.replace(hour=23, minute=59, second=59)
+
+        print(f"DEBUG: Selected Packages: {product_packages}")
+        print(f"DEBUG: Start Date: {start_date}, End Date: {end_date}")
+
+        params = ReportJobService.normalize_params(
+            product_packages, start_date, end_date,
+            request.package, request.image_format, request.image_quality
+        )
+        watermark = await ReportJobService.data_watermark(db, params['product_packages'], start_date, end_date)
+        job_id = ReportJobService.job_id(params, watermark)
+
+        job = ReportJobService.read_job(job_id)
+        if ReportJobService.is_reusable(job):
+            log_info(f"Reuse report job {job_id} ({job.get('status')})")
+            return {'code': 200, 'msg': 'success', 'data': ReportJobService.to_view(job)}
+
+        job = ReportJobService.write_job(job_id, status='queued', progress=0, message=None, params=params)
+        generate_report_artifact.apply_async(args=[job_id, params])
+        return {'code': 200, 'msg': 'success', 'data': ReportJobService.to_view(job)}
 
     except Exception as e:
         print(f"Error generating report: {str(e)}")
         import traceback
         traceback.print_exc()
         return JSONResponse(status_code=500, content={'code': 500, 'msg': str(e)})
+
+@router.get("/jobs/{job_id}")
+async def get_report_job(job_id: str):
+    """
+    查询报告生成任务的状态与进度
+    """
+    job = ReportJobService.read_job(job_id)
+    if not job:
+        return JSONResponse(status_code=404, content={'code': 404, 'msg': 'Report job not found'})
+    return {'code': 200, 'msg': 'success', 'data': ReportJobService.to_view(job)}
+
+@router.get("/jobs/{job_id}/download")
+async def download_report(job_id: str):
+    """
+    下载已生成的报告产物
+    """
+    job = ReportJobService.read_job(job_id)
+    if not job or job.get('status') != 'done':
+        return JSONResponse(status_code=404, content={'code': 404, 'msg': 'Report is not ready'})
+
+    package = job.get('params', {}).get('package')
+    artifact_path = ReportJobService.artifact_path(job_id, package)
+    if not os.path.exists(artifact_path):
+        return JSONResponse(status_code=404, content={'code': 404, 'msg': 'Report file has expired, please generate again'})
+
+    if package == 'zip':
+        return FileResponse(artifact_path, media_type="application/zip", filename="report.zip")
+    return FileResponse(artifact_path, media_type="text/html; charset=utf-8", filename="report.html")
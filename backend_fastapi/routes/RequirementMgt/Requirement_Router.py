@@ -1,11 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
-from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, desc, func, or_
+from sqlalchemy import select, update, desc, func, or_, case
 from typing import List, Optional
 from datetime import datetime
-import io
-import csv
 
 from backend_fastapi.db.session import get_db
 from backend_fastapi.core.deps import get_current_user
@@ -18,19 +15,62 @@ from backend_fastapi.routes.RequirementMgt.schemas import (
     SubRequirementCreate, SubRequirementUpdate, SubRequirementResponse
 )
 from backend_fastapi.services.automation_service import AutomationService
+from backend_fastapi.services.activity_service import ActivityService, ACTION_CREATE, ACTION_UPDATE
+from backend_fastapi.services.requirement_progress_service import RequirementProgressService
+from backend_fastapi.services.search_service import SearchService
+from backend_fastapi.services.export_service import ExportService
+from backend_fastapi.services.pagination_service import PaginationService
+from backend_fastapi.services.code_sequence_service import CodeSequenceService
 from backend_fastapi.utils.user_utils import enrich_usernames_with_nicknames
 
-from backend_fastapi.models.sys_dict_models import SysDictType, SysDictData
-from backend_fastapi.core.constants import REQUIREMENT_STATUS_PROGRESS_MAP
+router = APIRouter(tags=["需求管理"])
 
-import json
-from redis import asyncio as aioredis
-from backend_fastapi.core.config import settings
+# 导出列：(表头, 查询列, 值转换)
+REQUIREMENT_EXPORT_COLUMNS = [
+    ('ID', PMRequirement.req_code, None),
+    ('标题', PMRequirement.title, None),
+    ('类型', PMRequirement.type, None),
+    ('状态', PMRequirement.status, None),
+    ('优先级', PMRequirement.priority, None),
+    ('创建人', PMRequirement.create_by, None),
+    ('创建时间', PMRequirement.create_time, None)
+]
 
-# Redis connection
-redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+TASK_EXPORT_COLUMNS = [
+    ('ID', PMTask.task_code, None),
+    ('标题', PMTask.title, None),
+    ('状态', PMTask.status, None),
+    ('优先级', PMTask.priority, None),
+    ('预估工时', PMTask.estimate_time, None),
+    ('开始日期', PMTask.start_date, None),
+    ('结束日期', PMTask.end_date, None),
+    ('创建人', PMTask.create_by, None),
+    ('创建时间', PMTask.create_time, None)
+]
 
-router = APIRouter(tags=["需求管理"])
+# 游标分页排序：(排序键, 主键)
+REQUIREMENT_CURSOR_ORDER = [(PMRequirement.create_time, True), (PMRequirement.req_id, True)]
+SUB_REQUIREMENT_CURSOR_ORDER = [(PMSubRequirement.sort_order, False), (PMSubRequirement.sub_req_id, False)]
+
+# 批量更新排序时每条 UPDATE 包含的最大条目数
+SORT_UPDATE_BATCH_SIZE = 500
+
+
+async def apply_sort_order(db: AsyncSession, model, pk_column, sort_data: List[dict], key: str):
+    """
+    以 CASE 表达式批量写入排序值（每 SORT_UPDATE_BATCH_SIZE 条一条语句），排序值未变化的行不更新
+    :param key: sort_data 中主键的字段名
+    """
+    orders = {item[key]: item['sort_order'] for item in sort_data}
+    ids = list(orders.keys())
+    for i in range(0, len(ids), SORT_UPDATE_BATCH_SIZE):
+        batch = {pk: orders[pk] for pk in ids[i:i + SORT_UPDATE_BATCH_SIZE]}
+        new_order = case(batch, value=pk_column)
+        stmt = update(model).where(
+            pk_column.in_(list(batch.keys())),
+            or_(model.sort_order == None, model.sort_order != new_order)
+        ).values(sort_order=new_order).execution_options(synchronize_session=False)
+        await db.execute(stmt)
 
 # --- 需求管理接口 ---
 
@@ -129,13 +169,12 @@ async def search_requirements(
     results = []
     seen_ids = set()
 
-    # 1. Search Requirements
+    # 1. Search Requirements (全文索引，按相关度排序)
     stmt_req = select(PMRequirement).where(
-        or_(
-            PMRequirement.title.like(f"%{query}%"),
-            PMRequirement.req_code.like(f"%{query}%")
-        )
-    ).where(PMRequirement.del_flag == 0).limit(20)
+        SearchService.condition('requirement', query)
+    ).where(PMRequirement.del_flag == 0).order_by(
+        desc(SearchService.relevance('requirement', query))
+    ).limit(20)
     
     res_req = await db.execute(stmt_req)
     reqs = res_req.scalars().all()
@@ -153,11 +192,10 @@ async def search_requirements(
     stmt_sub = select(PMSubRequirement, PMRequirement).join(
         PMRequirement, PMSubRequirement.requirement_id == PMRequirement.req_id
     ).where(
-        or_(
-            PMSubRequirement.title.like(f"%{query}%"),
-            PMSubRequirement.sub_req_code.like(f"%{query}%")
-        )
-    ).where(PMSubRequirement.del_flag == 0).limit(20)
+        SearchService.condition('sub_requirement', query)
+    ).where(PMSubRequirement.del_flag == 0).order_by(
+        desc(SearchService.relevance('sub_requirement', query))
+    ).limit(20)
     
     res_sub = await db.execute(stmt_sub)
     subs = res_sub.all()
@@ -189,13 +227,17 @@ async def get_requirement_list(
     is_recent: Optional[bool] = False, # Reserved
     only_parents: Optional[bool] = False,
     export: Optional[bool] = False,
+    export_format: Optional[str] = 'csv',
     page: int = 1,
     page_size: int = 20,
+    cursor: Optional[str] = None,
+    cursor_mode: Optional[bool] = False,
     db: AsyncSession = Depends(get_db),
     current_user: SysUser = Depends(get_current_user)
 ):
     """
     获取需求列表
+    cursor_mode=true 或传入上一页返回的 next_cursor 时使用游标分页（非关注列表），否则按页码分页
     """
     stmt = select(PMRequirement).where(PMRequirement.del_flag == 0)
     
@@ -234,51 +276,6 @@ async def get_requirement_list(
         except ValueError:
             pass
     
-    # --- 核心修改：计算每个需求的进度 (进度 = (子需求进度总和 + 子任务进度总和) / (子需求数 + 子任务数)) ---
-    # 尝试从 Redis 缓存获取状态映射
-    status_map = {}
-    redis_key = "sys:dict:requirement_status_progress"
-    
-    try:
-        cached_map = await redis.get(redis_key)
-        if cached_map:
-            status_map = json.loads(cached_map)
-    except Exception as e:
-        print(f"Failed to read from Redis: {e}")
-
-    # 如果缓存未命中，尝试从数据库字典获取
-    if not status_map:
-        try:
-            # 获取 dict_id
-            type_stmt = select(SysDictType).where(SysDictType.dict_type == 'requirement_status_progress')
-            type_res = await db.execute(type_stmt)
-            dict_type = type_res.scalar_one_or_none()
-            
-            if dict_type:
-                data_stmt = select(SysDictData).where(SysDictData.dict_id == dict_type.dict_id, SysDictData.status == 1)
-                data_res = await db.execute(data_stmt)
-                dict_data = data_res.scalars().all()
-                
-                for d in dict_data:
-                    # Value is string in DB, convert to int
-                    try:
-                        status_map[d.dict_label] = int(d.dict_value)
-                    except:
-                        pass
-                
-                # 写入 Redis 缓存 (过期时间 1 小时)
-                if status_map:
-                    try:
-                        await redis.set(redis_key, json.dumps(status_map), ex=3600)
-                    except Exception as e:
-                        print(f"Failed to write to Redis: {e}")
-        except Exception as e:
-            print(f"Failed to load status map from DB: {e}")
-        
-    # 如果数据库也没数据，回退到常量文件
-    if not status_map:
-        status_map = REQUIREMENT_STATUS_PROGRESS_MAP
-
     if is_followed:
         stmt = stmt.join(
             SysUserFollow, 
@@ -288,11 +285,7 @@ async def get_requirement_list(
     if only_parents:
         stmt = stmt.where(PMRequirement.parent_id == None)
             
-    if search_term:
-        stmt = stmt.where(or_(
-            PMRequirement.title.like(f"%{search_term}%"),
-            PMRequirement.req_code.like(f"%{search_term}%")
-        ))
+    stmt = SearchService.apply(stmt, 'requirement', search_term)
     
     if req_id:
         stmt = stmt.where(PMRequirement.req_id == req_id)
@@ -300,29 +293,7 @@ async def get_requirement_list(
     # Export logic
     if export:
         stmt = stmt.order_by(desc(PMRequirement.create_time))
-        result = await db.execute(stmt)
-        requirements = result.scalars().all()
-        
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['ID', '标题', '类型', '状态', '优先级', '创建人', '创建时间'])
-        for r in requirements:
-            writer.writerow([
-                r.req_code, 
-                r.title, 
-                r.type, 
-                r.status, 
-                r.priority, 
-                r.create_by, 
-                r.create_time.strftime('%Y-%m-%d %H:%M:%S') if r.create_time else ''
-            ])
-            
-        output.seek(0)
-        return StreamingResponse(
-            iter([output.getvalue()]),
-            media_type="text/csv",
-            headers={"Content-Disposition": "attachment;filename=requirements.csv"}
-        )
+        return ExportService.response(stmt, REQUIREMENT_EXPORT_COLUMNS, 'requirements', export_format, '需求列表')
 
     # Pagination
     # Count total first
@@ -350,11 +321,7 @@ async def get_requirement_list(
             PMSubRequirement.del_flag == 0
         )
         
-        if search_term:
-             sub_stmt = sub_stmt.where(or_(
-                PMSubRequirement.title.like(f"%{search_term}%"),
-                PMSubRequirement.sub_req_code.like(f"%{search_term}%")
-            ))
+        sub_stmt = SearchService.apply(sub_stmt, 'sub_requirement', search_term)
             
         # Apply filters to sub_stmt
         if type:
@@ -428,63 +395,7 @@ async def get_requirement_list(
         end = start + page_size
         paged_items = items[start:end]
         
-        # --- 针对 is_followed=True 的进度计算补丁 ---
-        # 提取当前分页中的需求ID (is_sub=False)
-        paged_req_ids = [i['req_id'] for i in paged_items if not i.get('is_sub')]
-        
-        if paged_req_ids:
-            # 批量查询子需求
-            sub_stmt_prog = select(PMSubRequirement).where(
-                PMSubRequirement.requirement_id.in_(paged_req_ids),
-                PMSubRequirement.del_flag == 0
-            )
-            sub_res_prog = await db.execute(sub_stmt_prog)
-            all_sub_reqs_prog = sub_res_prog.scalars().all()
-            
-            # 批量查询子任务
-            tasks_stmt_prog = select(PMTask).where(
-                or_(
-                    PMTask.requirement_id.in_(paged_req_ids),
-                    PMTask.sub_requirement_id.in_([s.sub_req_id for s in all_sub_reqs_prog])
-                ),
-                PMTask.del_flag == 0
-            )
-            tasks_res_prog = await db.execute(tasks_stmt_prog)
-            all_tasks_prog = tasks_res_prog.scalars().all()
-            
-            # 计算进度并更新 paged_items
-            for item in paged_items:
-                if item.get('is_sub'):
-                    continue
-                    
-                rid = item['req_id']
-                # 找出子项
-                my_sub = [s for s in all_sub_reqs_prog if s.requirement_id == rid]
-                my_sub_ids = [s.sub_req_id for s in my_sub]
-                
-                my_tasks_direct = [t for t in all_tasks_prog if t.requirement_id == rid]
-                my_tasks_sub = [t for t in all_tasks_prog if t.sub_requirement_id in my_sub_ids]
-                
-                # 去重任务 (有些任务可能既有 requirement_id 又有 sub_requirement_id)
-                my_tasks = {t.task_id: t for t in my_tasks_direct + my_tasks_sub}.values()
-                
-                all_subs = list(my_sub) + list(my_tasks)
-                cnt = len(all_subs)
-                
-                if cnt > 0:
-                    prog_sum = 0
-                    for sub in all_subs:
-                        p = getattr(sub, 'progress', None)
-                        if p is not None:
-                            prog_sum += p
-                        else:
-                            st = getattr(sub, 'status', 'not_started')
-                            prog_sum += status_map.get(st, 0)
-                    item['progress'] = round(prog_sum / cnt)
-                else:
-                    # 无子项，使用自身进度
-                    st = item.get('status', 'not_started')
-                    item['progress'] = status_map.get(st, 0)
+        # 需求进度为子需求/任务变更时维护的 progress 字段，直接读取
 
         return {
             'code': 200, 
@@ -498,15 +409,25 @@ async def get_requirement_list(
         }
 
     # 标准分页逻辑 (非关注列表)
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    result_count = await db.execute(count_stmt)
-    total = result_count.scalar()
-    
-    stmt = stmt.order_by(desc(PMRequirement.create_time))
-    stmt = stmt.offset((page - 1) * page_size).limit(page_size)
-    
-    result = await db.execute(stmt)
-    requirements = result.scalars().all()
+    next_cursor = None
+    if cursor_mode or cursor:
+        # 游标分页：按 (create_time, req_id) 倒序，总数使用缓存
+        try:
+            rows, next_cursor = await PaginationService.fetch(db, stmt, REQUIREMENT_CURSOR_ORDER, cursor, page_size)
+        except ValueError as e:
+            return {'code': 400, 'msg': str(e), 'data': None}
+        requirements = [row[0] for row in rows]
+        total = await PaginationService.cached_total(db, stmt, 'requirement')
+    else:
+        count_stmt = select(func.count()).select_from(stmt.subquery())
+        result_count = await db.execute(count_stmt)
+        total = result_count.scalar()
+
+        stmt = stmt.order_by(desc(PMRequirement.create_time))
+        stmt = stmt.offset((page - 1) * page_size).limit(page_size)
+
+        result = await db.execute(stmt)
+        requirements = result.scalars().all()
     
     # Check follow status for current page items
     followed_ids = set()
@@ -520,51 +441,6 @@ async def get_requirement_list(
         follow_res = await db.execute(follow_stmt)
         followed_ids = set(follow_res.scalars().all())
 
-    # --- 核心修改：计算每个需求的进度 (进度 = (子需求进度总和 + 子任务进度总和) / (子需求数 + 子任务数)) ---
-    # 尝试从 Redis 缓存获取状态映射
-    status_map = {}
-    redis_key = "sys:dict:requirement_status_progress"
-    
-    try:
-        cached_map = await redis.get(redis_key)
-        if cached_map:
-            status_map = json.loads(cached_map)
-    except Exception as e:
-        print(f"Failed to read from Redis: {e}")
-
-    # 如果缓存未命中，尝试从数据库字典获取
-    if not status_map:
-        try:
-            # 获取 dict_id
-            type_stmt = select(SysDictType).where(SysDictType.dict_type == 'requirement_status_progress')
-            type_res = await db.execute(type_stmt)
-            dict_type = type_res.scalar_one_or_none()
-            
-            if dict_type:
-                data_stmt = select(SysDictData).where(SysDictData.dict_id == dict_type.dict_id, SysDictData.status == 1)
-                data_res = await db.execute(data_stmt)
-                dict_data = data_res.scalars().all()
-                
-                for d in dict_data:
-                    # Value is string in DB, convert to int
-                    try:
-                        status_map[d.dict_label] = int(d.dict_value)
-                    except:
-                        pass
-                
-                # 写入 Redis 缓存 (过期时间 1 小时)
-                if status_map:
-                    try:
-                        await redis.set(redis_key, json.dumps(status_map), ex=3600)
-                    except Exception as e:
-                        print(f"Failed to write to Redis: {e}")
-        except Exception as e:
-            print(f"Failed to load status map from DB: {e}")
-        
-    # 如果数据库也没数据，回退到常量文件
-    if not status_map:
-        status_map = REQUIREMENT_STATUS_PROGRESS_MAP
-    
     # 批量查询关联的子需求
     sub_reqs_stmt = select(PMSubRequirement).where(
         PMSubRequirement.requirement_id.in_(req_ids),
@@ -595,46 +471,19 @@ async def get_requirement_list(
     sub_reqs_res = await db.execute(sub_reqs_stmt)
     all_sub_reqs = sub_reqs_res.scalars().all()
     
-    # 批量查询关联的子任务 (直接关联父需求的，或关联子需求的)
-    # 1. 直接关联父需求的任务
-    tasks_stmt_direct = select(PMTask).where(
-        PMTask.requirement_id.in_(req_ids),
-        PMTask.del_flag == 0
-    )
-    tasks_direct_res = await db.execute(tasks_stmt_direct)
-    all_tasks_direct = tasks_direct_res.scalars().all()
-    
-    # 2. 关联子需求的任务 (需要先拿到子需求ID列表)
-    sub_req_ids = [s.sub_req_id for s in all_sub_reqs]
-    all_tasks_sub = []
-    if sub_req_ids:
-        tasks_stmt_sub = select(PMTask).where(
-            PMTask.sub_requirement_id.in_(sub_req_ids),
-            PMTask.del_flag == 0
-        )
-        tasks_sub_res = await db.execute(tasks_stmt_sub)
-        all_tasks_sub = tasks_sub_res.scalars().all()
+    sub_reqs_by_req = {}
+    for sub_req in all_sub_reqs:
+        sub_reqs_by_req.setdefault(sub_req.requirement_id, []).append(sub_req)
 
-    # 组装数据并计算进度
+    # 组装数据（进度为子需求/任务变更时维护的 progress 字段，见 RequirementProgressService）
     final_items = []
     for r in requirements:
         item = r.to_dict()
         item['is_followed'] = r.req_id in followed_ids
         
-        # 找出该需求下的所有子项
-        my_sub_reqs = [s for s in all_sub_reqs if s.requirement_id == r.req_id]
-        my_tasks_direct = [t for t in all_tasks_direct if t.requirement_id == r.req_id]
-        
-        # 找出该需求下子需求的子任务
-        my_sub_req_ids = [s.sub_req_id for s in my_sub_reqs]
-        my_tasks_sub = [t for t in all_tasks_sub if t.sub_requirement_id in my_sub_req_ids]
-        
-        all_my_items = my_sub_reqs + my_tasks_direct + my_tasks_sub
-        total_count = len(all_my_items)
-        
         # 构建 children 结构
         item['children'] = []
-        for sub_req in my_sub_reqs:
+        for sub_req in sub_reqs_by_req.get(r.req_id, []):
             sub_item = sub_req.to_dict()
             sub_item['req_id'] = f"sub_{sub_req.sub_req_id}"
             sub_item['original_req_id'] = sub_req.sub_req_id
@@ -649,22 +498,6 @@ async def get_requirement_list(
             
             item['children'].append(sub_item)
             
-        if total_count > 0:
-            total_progress = 0
-            for sub_item in all_my_items:
-                # 优先使用 progress 字段 (如果模型中有)，否则使用 status 映射
-                p = getattr(sub_item, 'progress', None)
-                if p is not None:
-                    total_progress += p
-                else:
-                    status = getattr(sub_item, 'status', 'not_started')
-                    total_progress += status_map.get(status, 0)
-            
-            item['progress'] = round(total_progress / total_count)
-        else:
-            # 无子项，使用自身进度 (status 映射)
-            item['progress'] = status_map.get(r.status, 0)
-            
         final_items.append(item)
     
     # 统一映射用户昵称
@@ -677,7 +510,8 @@ async def get_requirement_list(
             'items': final_items,
             'total': total,
             'page': page,
-            'page_size': page_size
+            'page_size': page_size,
+            'next_cursor': next_cursor
         }
     }
 
@@ -723,6 +557,7 @@ async def create_requirement(
                         final_module_id = new_module.module_id
 
         new_req = PMRequirement(
+            req_code=await CodeSequenceService.next_code('requirement'),
             title=req_in.title,
             type=req_in.type,
             priority=req_in.priority,
@@ -747,17 +582,11 @@ async def create_requirement(
         await db.commit()
         await db.refresh(new_req)
         
-        # 生成 req_code
-        stmt = select(PMRequirement.req_code).order_by(desc(PMRequirement.req_code)).limit(1)
-        result = await db.execute(stmt)
-        last_req_code = result.scalar_one_or_none()
-        
-        if last_req_code and last_req_code.isdigit():
-            new_req.req_code = str(int(last_req_code) + 1)
-        else:
-            new_req.req_code = "100000001"
-            
-        db.add(new_req)
+        await RequirementProgressService.refresh(db, [new_req.req_id])
+        await ActivityService.record(
+            db, current_user.username, ACTION_CREATE, 'requirement', new_req.req_id,
+            target_name=new_req.title, status=new_req.status, project_id=new_req.project_id
+        )
         await db.commit()
         await db.refresh(new_req)
         
@@ -815,6 +644,15 @@ async def update_requirement(
     
     stmt = update(PMRequirement).where(PMRequirement.req_id == req_in.req_id).values(**update_data)
     await db.execute(stmt)
+    if 'status' in update_data:
+        # 无子项的需求进度取自身状态
+        await RequirementProgressService.refresh(db, [req.req_id])
+    await ActivityService.record(
+        db, current_user.username, ACTION_UPDATE, 'requirement', req.req_id,
+        target_name=update_data.get('title', req.title),
+        status=update_data.get('status', req.status),
+        project_id=update_data.get('project_id', req.project_id)
+    )
     await db.commit()
     await db.refresh(req)
     
@@ -973,10 +811,7 @@ async def update_requirement_sort(
     """
     更新需求排序
     """
-    for item in sort_data:
-        stmt = update(PMRequirement).where(PMRequirement.req_id == item['req_id']).values(sort_order=item['sort_order'])
-        await db.execute(stmt)
-    
+    await apply_sort_order(db, PMRequirement, PMRequirement.req_id, sort_data, 'req_id')
     await db.commit()
     return {'code': 200, 'msg': 'success', 'data': None}
 
@@ -1091,11 +926,15 @@ async def get_sub_requirements(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     search_term: Optional[str] = None,
+    page_size: int = 20,
+    cursor: Optional[str] = None,
+    cursor_mode: Optional[bool] = False,
     db: AsyncSession = Depends(get_db),
     current_user: SysUser = Depends(get_current_user)
 ):
     """
     获取子需求列表
+    默认返回全部；cursor_mode=true 或传入上一页返回的 next_cursor 时按 (sort_order, sub_req_id) 游标分页，每页 page_size 条
     """
     stmt = select(PMSubRequirement).where(PMSubRequirement.del_flag == 0)
     
@@ -1111,11 +950,7 @@ async def get_sub_requirements(
     if parent_sub_id:
         stmt = stmt.where(PMSubRequirement.parent_sub_id == parent_sub_id)
 
-    if search_term:
-        stmt = stmt.where(or_(
-            PMSubRequirement.title.like(f"%{search_term}%"),
-            PMSubRequirement.sub_req_code.like(f"%{search_term}%")
-        ))
+    stmt = SearchService.apply(stmt, 'sub_requirement', search_term)
 
     if type:
         if type == 'unclassified':
@@ -1151,10 +986,20 @@ async def get_sub_requirements(
         except ValueError:
             pass
         
-    stmt = stmt.order_by(PMSubRequirement.sort_order)
-    
-    result = await db.execute(stmt)
-    sub_reqs = result.scalars().all()
+    data = {}
+    if cursor_mode or cursor:
+        try:
+            rows, next_cursor = await PaginationService.fetch(db, stmt, SUB_REQUIREMENT_CURSOR_ORDER, cursor, page_size)
+        except ValueError as e:
+            return {'code': 400, 'msg': str(e), 'data': None}
+        sub_reqs = [row[0] for row in rows]
+        data['total'] = await PaginationService.cached_total(db, stmt, 'sub_requirement')
+        data['next_cursor'] = next_cursor
+    else:
+        stmt = stmt.order_by(PMSubRequirement.sort_order)
+
+        result = await db.execute(stmt)
+        sub_reqs = result.scalars().all()
     
     # Check follow status for current page items
     followed_ids = set()
@@ -1176,8 +1021,9 @@ async def get_sub_requirements(
     
     # 统一映射用户昵称
     await enrich_usernames_with_nicknames(db, items)
+    data['items'] = items
     
-    return {'code': 200, 'msg': 'success', 'data': {'items': items}}
+    return {'code': 200, 'msg': 'success', 'data': data}
 
 @router.post("/sub_requirements/create", response_model=dict)
 async def create_sub_requirement(
@@ -1189,6 +1035,7 @@ async def create_sub_requirement(
     创建子需求
     """
     new_sub_req = PMSubRequirement(
+        sub_req_code=await CodeSequenceService.next_code('sub_requirement'),
         title=sub_req_in.title,
         type=sub_req_in.type,
         priority=sub_req_in.priority,
@@ -1207,17 +1054,11 @@ async def create_sub_requirement(
     await db.commit()
     await db.refresh(new_sub_req)
     
-    # 生成 sub_req_code
-    stmt = select(PMSubRequirement.sub_req_code).order_by(desc(PMSubRequirement.sub_req_code)).limit(1)
-    result = await db.execute(stmt)
-    last_sub_req_code = result.scalar_one_or_none()
-    
-    if last_sub_req_code and last_sub_req_code.isdigit():
-        new_sub_req.sub_req_code = str(int(last_sub_req_code) + 1)
-    else:
-        new_sub_req.sub_req_code = "100000001"
-        
-    db.add(new_sub_req)
+    await RequirementProgressService.refresh(db, [new_sub_req.requirement_id])
+    await ActivityService.record(
+        db, current_user.username, ACTION_CREATE, 'sub_requirement', new_sub_req.sub_req_id,
+        target_name=new_sub_req.title, status=new_sub_req.status, requirement_id=new_sub_req.requirement_id
+    )
     await db.commit()
     await db.refresh(new_sub_req)
     
@@ -1263,8 +1104,17 @@ async def update_sub_requirement(
         
     update_data['update_by'] = current_user.username
     
+    old_requirement_id = sub_req.requirement_id
     stmt = update(PMSubRequirement).where(PMSubRequirement.sub_req_id == sub_req_in.sub_req_id).values(**update_data)
     await db.execute(stmt)
+    # 重算原所属需求及变更后的所属需求
+    await RequirementProgressService.refresh(db, [old_requirement_id, update_data.get('requirement_id')])
+    await ActivityService.record(
+        db, current_user.username, ACTION_UPDATE, 'sub_requirement', sub_req.sub_req_id,
+        target_name=update_data.get('title', sub_req.title),
+        status=update_data.get('status', sub_req.status),
+        requirement_id=update_data.get('requirement_id', sub_req.requirement_id)
+    )
     await db.commit()
     await db.refresh(sub_req)
     
@@ -1297,6 +1147,7 @@ async def delete_sub_requirement(
         
     stmt = update(PMSubRequirement).where(PMSubRequirement.sub_req_id == sub_req_id).values(del_flag=1)
     await db.execute(stmt)
+    await RequirementProgressService.refresh(db, [sub_req.requirement_id])
     await db.commit()
     
     # 触发自动化助手 - 子需求更新事件 (删除也是更新的一种)
@@ -1318,10 +1169,7 @@ async def update_sub_requirement_sort(
     """
     更新子需求排序
     """
-    for item in sort_data:
-        stmt = update(PMSubRequirement).where(PMSubRequirement.sub_req_id == item['sub_req_id']).values(sort_order=item['sort_order'])
-        await db.execute(stmt)
-    
+    await apply_sort_order(db, PMSubRequirement, PMSubRequirement.sub_req_id, sort_data, 'sub_req_id')
     await db.commit()
     return {'code': 200, 'msg': 'success', 'data': None}
 
@@ -1333,6 +1181,8 @@ async def get_tasks(
     requirement_id: Optional[int] = None,
     sub_requirement_id: Optional[int] = None,
     search_term: Optional[str] = None,
+    export: Optional[bool] = False,
+    export_format: Optional[str] = 'csv',
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -1351,18 +1201,17 @@ async def get_tasks(
         try:
             search_id = int(search_term)
             stmt = stmt.where(or_(
-                PMTask.title.like(f"%{search_term}%"),
-                PMTask.task_code.like(f"%{search_term}%"),
+                SearchService.condition('task', search_term),
                 PMTask.task_id == search_id
             ))
         except ValueError:
-            stmt = stmt.where(or_(
-                PMTask.title.like(f"%{search_term}%"),
-                PMTask.task_code.like(f"%{search_term}%")
-            ))
+            stmt = stmt.where(SearchService.condition('task', search_term))
             
     stmt = stmt.order_by(PMTask.sort_order)
     
+    if export:
+        return ExportService.response(stmt, TASK_EXPORT_COLUMNS, 'tasks', export_format, '任务列表')
+    
     result = await db.execute(stmt)
     tasks = result.scalars().all()
     
@@ -1383,6 +1232,7 @@ async def create_task(
     创建任务
     """
     new_task = PMTask(
+        task_code=await CodeSequenceService.next_code('task'),
         title=task_in.title,
         estimate_time=task_in.estimate_time,
         assignee_id=task_in.assignee_id,
@@ -1399,15 +1249,14 @@ async def create_task(
     await db.commit()
     await db.refresh(new_task)
 
-    # 自动生成 task_code: 1000000 + task_id
-    stmt = select(PMTask.task_code).order_by(desc(PMTask.task_code)).limit(1)
-    result = await db.execute(stmt)
-    last_task_code = result.scalar_one_or_none()
-    if last_task_code and last_task_code.isdigit():
-        new_task.task_code = str(int(last_task_code) + 1)
-    else:
-        new_task.task_code = "10000001"
-    db.add(new_task)
+    await RequirementProgressService.refresh_for_children(
+        db, [new_task.requirement_id], [new_task.sub_requirement_id]
+    )
+    await ActivityService.record(
+        db, current_user.username, ACTION_CREATE, 'task', new_task.task_id,
+        target_name=new_task.title, status=new_task.status,
+        requirement_id=new_task.requirement_id, sub_requirement_id=new_task.sub_requirement_id
+    )
     await db.commit()
     await db.refresh(new_task)
     
@@ -1472,8 +1321,22 @@ async def update_task(
         
     update_data['update_by'] = current_user.username
     
+    old_parent_ids = ([task.requirement_id], [task.sub_requirement_id])
     stmt = update(PMTask).where(PMTask.task_id == task_in.task_id).values(**update_data)
     await db.execute(stmt)
+    # 重算原所属需求及变更后的所属需求
+    await RequirementProgressService.refresh_for_children(
+        db,
+        old_parent_ids[0] + [update_data.get('requirement_id')],
+        old_parent_ids[1] + [update_data.get('sub_requirement_id')]
+    )
+    await ActivityService.record(
+        db, current_user.username, ACTION_UPDATE, 'task', task.task_id,
+        target_name=update_data.get('title', task.title),
+        status=update_data.get('status', task.status),
+        requirement_id=update_data.get('requirement_id', task.requirement_id),
+        sub_requirement_id=update_data.get('sub_requirement_id', task.sub_requirement_id)
+    )
     await db.commit()
     await db.refresh(task)
     
@@ -1514,6 +1377,7 @@ async def delete_task(
         
     stmt = update(PMTask).where(PMTask.task_id == task_id).values(del_flag=1)
     await db.execute(stmt)
+    await RequirementProgressService.refresh_for_children(db, [task.requirement_id], [task.sub_requirement_id])
     await db.commit()
     
     # 触发自动化助手 - 任务更新事件
@@ -1543,9 +1407,6 @@ async def update_task_sort(
     """
     更新任务排序
     """
-    for item in sort_data:
-        stmt = update(PMTask).where(PMTask.task_id == item['task_id']).values(sort_order=item['sort_order'])
-        await db.execute(stmt)
-    
+    await apply_sort_order(db, PMTask, PMTask.task_id, sort_data, 'task_id')
     await db.commit()
     return {'code': 200, 'msg': 'success', 'data': None}
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend_fastapi.db.session import get_db
+from backend_fastapi.core.deps import get_current_user
+from backend_fastapi.models.sys_models import SysUser
+from backend_fastapi.services.search_service import SearchService
+from typing import Optional
+
+router = APIRouter(tags=["全局搜索"])
+
+@router.get("", response_model=dict)
+async def search_all(
+    keyword: str,
+    types: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 20,
+    db: AsyncSession = Depends(get_db),
+    current_user: SysUser = Depends(get_current_user)
+):
+    """
+    跨需求、子需求、任务、缺陷按标题/编号检索，结果按相关度排序
+    :param types: 逗号分隔的对象类型 requirement,sub_requirement,task,defect，为空时检索全部
+    """
+    try:
+        type_list = [t.strip() for t in types.split(',') if t.strip()] if types else None
+        data = await SearchService.search(db, keyword, type_list, page, page_size)
+        data.update({'page': page, 'page_size': page_size})
+        return {'code': 200, 'msg': 'success', 'data': data}
+    except Exception as e:
+        return {'code': 500, 'msg': str(e), 'data': None}
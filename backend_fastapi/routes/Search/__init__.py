@@ -0,0 +1 @@
+from .Search_Router import router
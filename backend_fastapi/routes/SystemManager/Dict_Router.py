@@ -9,6 +9,7 @@ from backend_fastapi.models.sys_models import SysUser
 from .dict_schemas import DictDataResponse, DictDataCreate
 from datetime import datetime
 from backend_fastapi.core.constants import REQUIREMENT_STATUS_PROGRESS_MAP
+from backend_fastapi.services.dict_cache_service import DictCache
 
 router = APIRouter(tags=["字典管理"])
 
@@ -65,6 +66,7 @@ async def init_constants_to_db(
         sort_order += 1
         
     await db.commit()
+    await DictCache.invalidate([dict_type])
     
     return {'code': 200, 'msg': 'Constants initialized successfully'}
 
@@ -74,34 +76,38 @@ async def get_dict_data_by_type(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    根据字典类型获取字典数据
+    根据字典类型获取字典数据（读取字典缓存）
     """
-    # First get dict_id from dict_type
-    query_type = select(SysDictType).where(SysDictType.dict_type == dict_type)
-    result_type = await db.execute(query_type)
-    dict_type_obj = result_type.scalar_one_or_none()
-    
-    if not dict_type_obj:
-        return []
-
-    # Then get data
-    query = select(SysDictData).where(
-        SysDictData.dict_id == dict_type_obj.dict_id,
-        SysDictData.status == 1
-    ).order_by(SysDictData.dict_sort)
-    
-    result = await db.execute(query)
-    data = result.scalars().all()
+    items = await DictCache.get(db, dict_type)
     
     # Map back dict_type string for response
     response_data = []
-    for item in data:
-        item_dict = item.__dict__
-        item_dict['dict_type'] = dict_type
-        response_data.append(DictDataResponse(**item_dict))
+    for item in items:
+        response_data.append(DictDataResponse(
+            dict_type=dict_type,
+            dict_data_id=item['dict_data_id'],
+            dict_label=item['label'],
+            dict_value=item['value'],
+            dict_sort=item['sort'],
+            status=item['status'],
+            remark=item['remark'],
+            create_time=item['create_time']
+        ))
         
     return response_data
 
+@router.get("/data/batch", response_model=dict)
+async def get_dict_data_batch(
+    dict_types: str = Query(..., description="字典类型，多个用逗号分隔"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    批量获取多个字典类型的字典数据（读取字典缓存）
+    """
+    types = [dict_type.strip() for dict_type in dict_types.split(',') if dict_type.strip()]
+    data = await DictCache.get_many(db, types)
+    return {'code': 200, 'msg': 'success', 'data': data}
+
 @router.post("/data", response_model=DictDataResponse)
 async def create_dict_data(
     data_in: DictDataCreate,
@@ -150,6 +156,7 @@ async def create_dict_data(
     db.add(new_data)
     await db.commit()
     await db.refresh(new_data)
+    await DictCache.invalidate([data_in.dict_type])
     
     # Prepare response
     response_dict = new_data.__dict__
@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc, or_
 from backend_fastapi.db.session import get_db
 from backend_fastapi.models.sys_models import TestEnvironment, TestEnvironmentLog
+from backend_fastapi.services.pagination_service import PaginationService
 from backend_fastapi.utils.LogManeger import log_info
 from pydantic import BaseModel, Field
 from typing import Optional, List
@@ -10,6 +11,9 @@ from datetime import datetime
 
 router = APIRouter(tags=["测试环境管理"])
 
+# 游标分页排序：按主键
+ENV_CURSOR_ORDER = [(TestEnvironment.env_id, False)]
+
 from .schemas import TestEnvironmentCreate, TestEnvironmentUpdate
 
 # Routes
@@ -65,8 +69,11 @@ async def get_list(
     pageSize: int = Query(10, ge=1),
     projectName: Optional[str] = None,
     envType: Optional[str] = None,
+    cursor: Optional[str] = None,
+    cursorMode: Optional[bool] = False,
     db: AsyncSession = Depends(get_db)
 ):
+    # cursorMode=true 或传入上一页返回的 next_cursor 时按 env_id 游标分页，总数使用缓存
     try:
         # Build query
         stmt = select(TestEnvironment)
@@ -76,23 +83,32 @@ async def get_list(
         if envType:
             stmt = stmt.where(TestEnvironment.env_type == envType)
             
-        # Count total
-        count_stmt = select(func.count()).select_from(stmt.subquery())
-        total_result = await db.execute(count_stmt)
-        total = total_result.scalar() or 0
-        
-        # Pagination
-        stmt = stmt.offset((page - 1) * pageSize).limit(pageSize)
-        result = await db.execute(stmt)
-        rows = result.scalars().all()
+        if cursorMode or cursor:
+            page_rows, next_cursor = await PaginationService.fetch(db, stmt, ENV_CURSOR_ORDER, cursor, pageSize)
+            rows = [row[0] for row in page_rows]
+            total = await PaginationService.cached_total(db, stmt, 'test_environment')
+        else:
+            # Count total
+            count_stmt = select(func.count()).select_from(stmt.subquery())
+            total_result = await db.execute(count_stmt)
+            total = total_result.scalar() or 0
+
+            # Pagination
+            stmt = stmt.offset((page - 1) * pageSize).limit(pageSize)
+            result = await db.execute(stmt)
+            rows = result.scalars().all()
+            next_cursor = None
         
         data = {
             'total': total,
-            'rows': [item.to_dict() for item in rows]
+            'rows': [item.to_dict() for item in rows],
+            'next_cursor': next_cursor
         }
         
         return {'code': 200, 'msg': 'success', 'data': data}
         
+    except ValueError as e:
+        return {'code': 400, 'msg': str(e), 'data': None}
     except Exception as e:
         log_info(f"Get environment list error: {str(e)}")
         return {'code': 500, 'msg': str(e), 'data': None}
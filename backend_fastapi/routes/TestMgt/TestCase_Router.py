@@ -10,9 +10,25 @@ from backend_fastapi.core.deps import get_current_user
 from backend_fastapi.models.sys_models import SysUser
 from backend_fastapi.models.test_mgt_models import TestCase, PMTestCaseModule
 from backend_fastapi.routes.TestMgt.schemas import TestCaseCreate, TestCaseUpdate, TestCaseResponse
+from backend_fastapi.services.export_service import ExportService
+from backend_fastapi.services.code_sequence_service import CodeSequenceService
 
 router = APIRouter(tags=["测试用例管理"])
 
+CASE_TYPE_LABELS = {1: '功能测试', 2: '性能测试', 3: '安全性测试', 4: '回归测试', 5: '其他'}
+CASE_STATUS_LABELS = {0: '未执行', 1: '通过', 2: '阻塞', 3: '失败', 4: '遗留'}
+
+# 用例列表导出列
+TEST_CASE_EXPORT_COLUMNS = [
+    ('ID', TestCase.case_code, None),
+    ('用例名称', TestCase.case_name, None),
+    ('用例类型', TestCase.case_type, lambda value: CASE_TYPE_LABELS.get(value, value)),
+    ('用例状态', TestCase.case_status, lambda value: CASE_STATUS_LABELS.get(value, value)),
+    ('用例等级', TestCase.case_level, None),
+    ('创建人', TestCase.create_by, None),
+    ('创建时间', TestCase.create_time, None)
+]
+
 @router.get("/list")
 async def get_test_case_list(
     db: AsyncSession = Depends(get_db),
@@ -27,7 +43,9 @@ async def get_test_case_list(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     case_status: Optional[int] = None,
-    case_type: Optional[int] = None
+    case_type: Optional[int] = None,
+    export: Optional[bool] = False,
+    export_format: Optional[str] = 'csv'
 ):
     stmt = select(TestCase).order_by(desc(TestCase.create_time))
     
@@ -78,6 +96,9 @@ async def get_test_case_list(
              )
         else:
              stmt = stmt.where(TestCase.create_by == create_by)
+
+    if export:
+        return ExportService.response(stmt, TEST_CASE_EXPORT_COLUMNS, 'test_cases', export_format, '测试用例')
         
     stmt = stmt.options(
         joinedload(TestCase.plan), 
@@ -201,18 +222,8 @@ async def create_test_case(
     # Handle module_id (create if string)
     module_id = await handle_module_creation(db, case_in.module_id, case_in.project_id)
 
-    # Logic to generate case_code
-    stmt = select(TestCase.case_code).order_by(desc(TestCase.case_code)).limit(1)
-    result = await db.execute(stmt)
-    last_case_code = result.scalar_one_or_none()
-    
-    if last_case_code and last_case_code.isdigit():
-        new_case_code = str(int(last_case_code) + 1)
-    else:
-        new_case_code = "100000001"
-        
     new_case = TestCase(
-        case_code=new_case_code,
+        case_code=await CodeSequenceService.next_code('test_case'),
         case_name=case_in.case_name,
         case_type=case_in.case_type,
         case_level=case_in.case_level,
@@ -1,14 +1,20 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc, or_, and_
+from sqlalchemy import select, func, desc, or_, and_, union_all, literal
 from sqlalchemy.orm import aliased
-from backend_fastapi.db.session import get_automation_db, get_db
+from backend_fastapi.db.session import get_automation_db, get_db, AsyncSessionLocal, AutomationSessionLocal
 from backend_fastapi.models.automation_models import AutomationProject, AutomationExecution, Project
 from backend_fastapi.models.pm_models import PMRequirement, PMSubRequirement, PMTask, PMProject, PMDefect
 from backend_fastapi.models.sys_models import SysUser, SysUserFollow, SysNotification
 from backend_fastapi.core.deps import get_current_user
-from typing import List, Dict, Any
+from backend_fastapi.services.execution_stats_service import ExecutionStatsService
+from backend_fastapi.services.activity_service import ActivityService
+from backend_fastapi.utils.LogManeger import log_info
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
+from collections import deque
+import asyncio
+import time
 import random
 import json
 
@@ -27,40 +33,107 @@ def parse_list_string(value):
         pass
     return value
 
-@router.get("/")
-@router.get("", include_in_schema=False)
-async def get_workbench_data(
-    current_user: SysUser = Depends(get_current_user),
-    automation_db: AsyncSession = Depends(get_automation_db),
-    main_db: AsyncSession = Depends(get_db)
-):
+# 工作台各区块的超时时间（秒），超时的区块返回空数据，不拖慢整个页面
+WORKBENCH_SECTION_TIMEOUT = 3.0
+# 每个区块保留的最近耗时样本数
+WORKBENCH_METRICS_WINDOW = 200
+
+# 区块耗时统计 {区块: {'samples': deque[毫秒], 'timeouts': 次数, 'errors': 次数}}
+_section_metrics: Dict[str, Dict[str, Any]] = {}
+
+def _record_section_metric(name, elapsed_ms, status):
+    metric = _section_metrics.setdefault(name, {
+        'samples': deque(maxlen=WORKBENCH_METRICS_WINDOW),
+        'timeouts': 0,
+        'errors': 0
+    })
+    metric['samples'].append(elapsed_ms)
+    if status == 'timeout':
+        metric['timeouts'] += 1
+    elif status == 'error':
+        metric['errors'] += 1
+
+async def _run_section(name, section, default, timings):
+    """
+    运行工作台的一个区块，超时或异常时返回默认值，并记录耗时
+    :param section: 无参协程函数，内部自行创建会话
+    :param timings: 本次请求的区块耗时 {区块: {'elapsed_ms', 'status'}}
+    """
+    start = time.perf_counter()
+    status = 'ok'
     try:
-        # 1. Statistics
+        return await asyncio.wait_for(section(), timeout=WORKBENCH_SECTION_TIMEOUT)
+    except asyncio.TimeoutError:
+        status = 'timeout'
+        log_info(f"Workbench section {name} timed out after {WORKBENCH_SECTION_TIMEOUT}s")
+        return default
+    except Exception as e:
+        status = 'error'
+        log_info(f"Workbench section {name} error: {str(e)}")
+        return default
+    finally:
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        timings[name] = {'elapsed_ms': elapsed_ms, 'status': status}
+        _record_section_metric(name, elapsed_ms, status)
+
+async def get_workbench_stats():
+    async with AutomationSessionLocal() as automation_db:
         # Total Automation Projects (del_flag=0)
         stmt_total_projects = select(func.count()).where(AutomationProject.del_flag == 0)
         total_projects = (await automation_db.execute(stmt_total_projects)).scalar() or 0
         
-        # Total Executions
-        stmt_total_executions = select(func.count()).select_from(AutomationExecution)
-        total_executions = (await automation_db.execute(stmt_total_executions)).scalar() or 0
-        
+        # Total Executions（已结束的从执行日汇总表读取，加上进行中的执行）
+        finished_executions = sum((await ExecutionStatsService.status_totals(automation_db)).values())
+        stmt_running_executions = select(func.count()).select_from(AutomationExecution).where(AutomationExecution.end_time.is_(None))
+        running_executions = (await automation_db.execute(stmt_running_executions)).scalar() or 0
+        return {
+            'total_projects': total_projects,
+            'total_executions': finished_executions + running_executions
+        }
+
+@router.get("/")
+@router.get("", include_in_schema=False)
+async def get_workbench_data(
+    current_user: SysUser = Depends(get_current_user)
+):
+    """
+    工作台首页：统计、待办、动态、关注四个区块在独立会话上并发查询，单个区块超时不影响其他区块
+    """
+    try:
+        async def todos_section():
+            async with AsyncSessionLocal() as main_db:
+                return await get_todos_data(current_user, main_db, page=1, page_size=5)
+
+        async def activities_section():
+            async with AsyncSessionLocal() as main_db:
+                return await get_activities_data(current_user, main_db, page=1, page_size=5)
+
+        async def followed_section():
+            async with AutomationSessionLocal() as automation_db, AsyncSessionLocal() as main_db:
+                return await get_followed_data(current_user, main_db, automation_db, page=1, page_size=5)
+
+        empty_page = {'items': [], 'total': 0}
+        timings = {}
         # 获取第一页数据
-        todos_data = await get_todos_data(current_user, main_db, page=1, page_size=5)
-        activities_data = await get_activities_data(current_user, automation_db, main_db, page=1, page_size=5)
-        followed_data = await get_followed_data(current_user, main_db, automation_db, page=1, page_size=5)
+        stats, todos_data, activities_data, followed_data = await asyncio.gather(
+            _run_section('stats', get_workbench_stats, {'total_projects': 0, 'total_executions': 0}, timings),
+            _run_section('todos', todos_section, empty_page, timings),
+            _run_section('activities', activities_section, empty_page, timings),
+            _run_section('followed', followed_section, empty_page, timings)
+        )
         
         data = {
             'greeting': f'Hi, {current_user.nickname or current_user.username}, 欢迎回来!',
-            'stats': {
-                'total_projects': total_projects,
-                'total_executions': total_executions
-            },
+            'stats': stats,
             'todos': todos_data['items'],
             'todos_total': todos_data['total'],
             'activities': activities_data['items'],
             'activities_total': activities_data['total'],
+            'activities_next_cursor': activities_data.get('next_cursor'),
             'followed': followed_data['items'],
-            'followed_total': followed_data['total']
+            'followed_total': followed_data['total'],
+            # 本次请求各区块耗时，超时/异常的区块 status 非 ok
+            'section_timings': timings
         }
         
         return {'code': 200, 'msg': 'success', 'data': data}
@@ -70,6 +143,29 @@ async def get_workbench_data(
         traceback.print_exc()
         return {'code': 500, 'msg': str(e), 'data': None}
 
+@router.get("/metrics")
+async def get_workbench_metrics(
+    current_user: SysUser = Depends(get_current_user)
+):
+    """
+    工作台各区块最近的耗时统计（毫秒）
+    """
+    data = {}
+    for name, metric in _section_metrics.items():
+        samples = sorted(metric['samples'])
+        if not samples:
+            continue
+        data[name] = {
+            'count': len(samples),
+            'avg_ms': round(sum(samples) / len(samples), 2),
+            'p50_ms': samples[len(samples) // 2],
+            'p95_ms': samples[min(int(len(samples) * 0.95), len(samples) - 1)],
+            'max_ms': samples[-1],
+            'timeouts': metric['timeouts'],
+            'errors': metric['errors']
+        }
+    return {'code': 200, 'msg': 'success', 'data': data}
+
 @router.get("/todos")
 async def get_todos(
     page: int = 1,
@@ -87,13 +183,18 @@ async def get_todos(
 async def get_activities(
     page: int = 1,
     page_size: int = 10,
+    cursor: Optional[str] = None,
     current_user: SysUser = Depends(get_current_user),
-    automation_db: AsyncSession = Depends(get_automation_db),
     main_db: AsyncSession = Depends(get_db)
 ):
+    """
+    我的动态：传入上一页返回的 next_cursor 时按游标翻页，否则按页码读取
+    """
     try:
-        data = await get_activities_data(current_user, automation_db, main_db, page, page_size)
+        data = await get_activities_data(current_user, main_db, page, page_size, cursor)
         return {'code': 200, 'msg': 'success', 'data': data}
+    except ValueError as e:
+        return {'code': 400, 'msg': str(e), 'data': None}
     except Exception as e:
         return {'code': 500, 'msg': str(e), 'data': None}
 
@@ -166,9 +267,76 @@ async def unfollow_item(
     
     return {'code': 200, 'msg': '取消关注成功', 'data': None}
 
+def _todo_filters(user_id):
+    """各类待办的筛选条件：分配给当前用户且未完结（缺陷还包括当前用户提交的）"""
+    return {
+        'requirement': [
+            PMRequirement.assignee_id == user_id,
+            PMRequirement.status.notin_(['completed', 'closed', 'cancelled']),
+            PMRequirement.del_flag == 0
+        ],
+        'sub_requirement': [
+            PMSubRequirement.assignee_id == user_id,
+            PMSubRequirement.status.notin_(['online', 'closed']),
+            PMSubRequirement.del_flag == 0
+        ],
+        'task': [
+            PMTask.assignee_id == user_id,
+            PMTask.status.notin_(['completed', 'closed']),
+            PMTask.del_flag == 0
+        ],
+        'defect': [
+            or_(
+                PMDefect.assignee_id == user_id,
+                PMDefect.reporter_id == user_id
+            ),
+            PMDefect.status.notin_(['Closed', 'Rejected']),
+            PMDefect.del_flag == 0
+        ]
+    }
+
+# 待办类型 -> (模型, 主键列)
+TODO_SOURCES = {
+    'requirement': (PMRequirement, PMRequirement.req_id),
+    'sub_requirement': (PMSubRequirement, PMSubRequirement.sub_req_id),
+    'task': (PMTask, PMTask.task_id),
+    'defect': (PMDefect, PMDefect.defect_id)
+}
+
 async def get_todos_data(current_user, db, page=1, page_size=10):
+    """
+    我的待办：四类数据在数据库中 UNION ALL 后按更新时间排序分页，只取当前页的主键，
+    再按类型用 IN 查询补全当前页的详情；总数为四个索引计数之和
+    """
     user_id = current_user.user_id
-    items = []
+    filters = _todo_filters(user_id)
+
+    # 总数：一次查询返回四类待办的计数之和
+    count_columns = [
+        select(func.count()).select_from(model).where(*filters[todo_type]).scalar_subquery()
+        for todo_type, (model, _) in TODO_SOURCES.items()
+    ]
+    total = (await db.execute(select(sum(count_columns[1:], count_columns[0])))).scalar() or 0
+
+    # 当前页：只在数据库中排序 (type, id, update_time) 这三列
+    union_stmt = union_all(*[
+        select(
+            literal(todo_type).label('todo_type'),
+            pk.label('todo_id'),
+            model.update_time.label('update_time')
+        ).where(*filters[todo_type])
+        for todo_type, (model, pk) in TODO_SOURCES.items()
+    ]).subquery()
+    page_stmt = select(union_stmt.c.todo_type, union_stmt.c.todo_id).order_by(
+        desc(union_stmt.c.update_time), union_stmt.c.todo_type, desc(union_stmt.c.todo_id)
+    ).offset((page - 1) * page_size).limit(page_size)
+    page_rows = (await db.execute(page_stmt)).all()
+
+    ids_by_type: Dict[str, List[int]] = {}
+    for row in page_rows:
+        ids_by_type.setdefault(row.todo_type, []).append(row.todo_id)
+
+    details = {}
 
     # Aliases for User joins
     Assignee = aliased(SysUser)
@@ -176,206 +344,194 @@ async def get_todos_data(current_user, db, page=1, page_size=10):
     Tester = aliased(SysUser)
 
     # 1. Requirements assigned to user
-    stmt_req = select(
-        PMRequirement, 
-        PMProject.project_name,
-        Assignee.nickname.label('assignee_name'),
-        Developer.nickname.label('developer_name'),
-        Tester.nickname.label('tester_name')
-    ).outerjoin(
-        PMProject, PMRequirement.project_id == PMProject.project_id
-    ).outerjoin(
-        Assignee, PMRequirement.assignee_id == Assignee.user_id
-    ).outerjoin(
-        Developer, PMRequirement.developer_id == Developer.user_id
-    ).outerjoin(
-        Tester, PMRequirement.tester_id == Tester.user_id
-    ).where(
-        PMRequirement.assignee_id == user_id,
-        PMRequirement.status.notin_(['completed', 'closed', 'cancelled']),
-        PMRequirement.del_flag == 0
-    ).order_by(desc(PMRequirement.update_time))
+    if 'requirement' in ids_by_type:
+        stmt_req = select(
+            PMRequirement, 
+            PMProject.project_name,
+            Assignee.nickname.label('assignee_name'),
+            Developer.nickname.label('developer_name'),
+            Tester.nickname.label('tester_name')
+        ).outerjoin(
+            PMProject, PMRequirement.project_id == PMProject.project_id
+        ).outerjoin(
+            Assignee, PMRequirement.assignee_id == Assignee.user_id
+        ).outerjoin(
+            Developer, PMRequirement.developer_id == Developer.user_id
+        ).outerjoin(
+            Tester, PMRequirement.tester_id == Tester.user_id
+        ).where(
+            PMRequirement.req_id.in_(ids_by_type['requirement'])
+        )
     
-    reqs = (await db.execute(stmt_req)).all()
-    for r, project_name, assignee_name, developer_name, tester_name in reqs:
-        items.append({
-            'id': r.req_id,
-            'title': r.title,
-            'code': r.req_code,
-            'type': 'requirement',
-            'type_label': '需求',
-            'status': r.status,
-            'priority': r.priority,
-            'project_name': project_name,
-            'owner': assignee_name or r.assignee_id,
-            'created_by': r.create_by,
-            'developer': developer_name,
-            'tester': tester_name,
-            'risk_level': r.risk_level,
-            'progress': r.progress,
-            'start_time': r.start_date.strftime('%Y-%m-%d') if r.start_date else None,
-            'end_date': r.end_date.strftime('%Y-%m-%d') if r.end_date else None,
-            'deadline': r.end_date.strftime('%Y-%m-%d') if r.end_date else None,
-            'created_at': r.create_time.strftime('%Y-%m-%d %H:%M:%S') if r.create_time else None,
-            'update_time': r.update_time
-        })
+        reqs = (await db.execute(stmt_req)).all()
+        for r, project_name, assignee_name, developer_name, tester_name in reqs:
+            details[('requirement', r.req_id)] = {
+                'id': r.req_id,
+                'title': r.title,
+                'code': r.req_code,
+                'type': 'requirement',
+                'type_label': '需求',
+                'status': r.status,
+                'priority': r.priority,
+                'project_name': project_name,
+                'owner': assignee_name or r.assignee_id,
+                'created_by': r.create_by,
+                'developer': developer_name,
+                'tester': tester_name,
+                'risk_level': r.risk_level,
+                'progress': r.progress,
+                'start_time': r.start_date.strftime('%Y-%m-%d') if r.start_date else None,
+                'end_date': r.end_date.strftime('%Y-%m-%d') if r.end_date else None,
+                'deadline': r.end_date.strftime('%Y-%m-%d') if r.end_date else None,
+                'created_at': r.create_time.strftime('%Y-%m-%d %H:%M:%S') if r.create_time else None,
+                'update_time': r.update_time
+            }
 
     # 2. Sub-requirements assigned to user
-    stmt_sub = select(
-        PMSubRequirement, 
-        PMProject.project_name,
-        Assignee.nickname.label('assignee_name'),
-        Developer.nickname.label('developer_name'),
-        Tester.nickname.label('tester_name')
-    ).outerjoin(
-        PMRequirement, PMSubRequirement.requirement_id == PMRequirement.req_id
-    ).outerjoin(
-        PMProject, PMRequirement.project_id == PMProject.project_id
-    ).outerjoin(
-        Assignee, PMSubRequirement.assignee_id == Assignee.user_id
-    ).outerjoin(
-        Developer, PMSubRequirement.developer_id == Developer.user_id
-    ).outerjoin(
-        Tester, PMSubRequirement.tester_id == Tester.user_id
-    ).where(
-        PMSubRequirement.assignee_id == user_id,
-        PMSubRequirement.status.notin_(['online', 'closed']),
-        PMSubRequirement.del_flag == 0
-    ).order_by(desc(PMSubRequirement.update_time))
+    if 'sub_requirement' in ids_by_type:
+        stmt_sub = select(
+            PMSubRequirement, 
+            PMProject.project_name,
+            Assignee.nickname.label('assignee_name'),
+            Developer.nickname.label('developer_name'),
+            Tester.nickname.label('tester_name')
+        ).outerjoin(
+            PMRequirement, PMSubRequirement.requirement_id == PMRequirement.req_id
+        ).outerjoin(
+            PMProject, PMRequirement.project_id == PMProject.project_id
+        ).outerjoin(
+            Assignee, PMSubRequirement.assignee_id == Assignee.user_id
+        ).outerjoin(
+            Developer, PMSubRequirement.developer_id == Developer.user_id
+        ).outerjoin(
+            Tester, PMSubRequirement.tester_id == Tester.user_id
+        ).where(
+            PMSubRequirement.sub_req_id.in_(ids_by_type['sub_requirement'])
+        )
     
-    subs = (await db.execute(stmt_sub)).all()
-    for s, project_name, assignee_name, developer_name, tester_name in subs:
-        items.append({
-            'id': s.sub_req_id,
-            'title': s.title,
-            'code': s.sub_req_code,
-            'type': 'sub_requirement',
-            'type_label': '子需求',
-            'status': s.status,
-            'priority': s.priority,
-            'project_name': project_name,
-            'owner': assignee_name or s.assignee_id,
-            'created_by': s.create_by,
-            'developer': developer_name,
-            'tester': tester_name,
-            'risk_level': s.risk_level,
-            'start_time': s.start_date.strftime('%Y-%m-%d') if s.start_date else None,
-            'end_date': s.end_date.strftime('%Y-%m-%d') if s.end_date else None,
-            'deadline': s.end_date.strftime('%Y-%m-%d') if s.end_date else None,
-            'created_at': s.create_time.strftime('%Y-%m-%d %H:%M:%S') if s.create_time else None,
-            'update_time': s.update_time
-        })
+        subs = (await db.execute(stmt_sub)).all()
+        for s, project_name, assignee_name, developer_name, tester_name in subs:
+            details[('sub_requirement', s.sub_req_id)] = {
+                'id': s.sub_req_id,
+                'title': s.title,
+                'code': s.sub_req_code,
+                'type': 'sub_requirement',
+                'type_label': '子需求',
+                'status': s.status,
+                'priority': s.priority,
+                'project_name': project_name,
+                'owner': assignee_name or s.assignee_id,
+                'created_by': s.create_by,
+                'developer': developer_name,
+                'tester': tester_name,
+                'risk_level': s.risk_level,
+                'start_time': s.start_date.strftime('%Y-%m-%d') if s.start_date else None,
+                'end_date': s.end_date.strftime('%Y-%m-%d') if s.end_date else None,
+                'deadline': s.end_date.strftime('%Y-%m-%d') if s.end_date else None,
+                'created_at': s.create_time.strftime('%Y-%m-%d %H:%M:%S') if s.create_time else None,
+                'update_time': s.update_time
+            }
 
     # 3. Tasks assigned to user
-    Req = aliased(PMRequirement)
-    SubReq = aliased(PMSubRequirement)
-    ParentReq = aliased(PMRequirement)
-    Proj = aliased(PMProject)
-
-    stmt_task = select(
-        PMTask, 
-        Proj.project_name,
-        Assignee.nickname.label('assignee_name'),
-        Developer.nickname.label('developer_name'),
-        Tester.nickname.label('tester_name')
-    ).outerjoin(
-        Req, PMTask.requirement_id == Req.req_id
-    ).outerjoin(
-        SubReq, PMTask.sub_requirement_id == SubReq.sub_req_id
-    ).outerjoin(
-        ParentReq, SubReq.requirement_id == ParentReq.req_id
-    ).outerjoin(
-        Proj, func.coalesce(Req.project_id, ParentReq.project_id) == Proj.project_id
-    ).outerjoin(
-        Assignee, PMTask.assignee_id == Assignee.user_id
-    ).outerjoin(
-        Developer, PMTask.developer_id == Developer.user_id
-    ).outerjoin(
-        Tester, PMTask.tester_id == Tester.user_id
-    ).where(
-        PMTask.assignee_id == user_id,
-        PMTask.status.notin_(['completed', 'closed']),
-        PMTask.del_flag == 0
-    ).order_by(desc(PMTask.update_time))
+    if 'task' in ids_by_type:
+        Req = aliased(PMRequirement)
+        SubReq = aliased(PMSubRequirement)
+        ParentReq = aliased(PMRequirement)
+        Proj = aliased(PMProject)
+
+        stmt_task = select(
+            PMTask, 
+            Proj.project_name,
+            Assignee.nickname.label('assignee_name'),
+            Developer.nickname.label('developer_name'),
+            Tester.nickname.label('tester_name')
+        ).outerjoin(
+            Req, PMTask.requirement_id == Req.req_id
+        ).outerjoin(
+            SubReq, PMTask.sub_requirement_id == SubReq.sub_req_id
+        ).outerjoin(
+            ParentReq, SubReq.requirement_id == ParentReq.req_id
+        ).outerjoin(
+            Proj, func.coalesce(Req.project_id, ParentReq.project_id) == Proj.project_id
+        ).outerjoin(
+            Assignee, PMTask.assignee_id == Assignee.user_id
+        ).outerjoin(
+            Developer, PMTask.developer_id == Developer.user_id
+        ).outerjoin(
+            Tester, PMTask.tester_id == Tester.user_id
+        ).where(
+            PMTask.task_id.in_(ids_by_type['task'])
+        )
     
-    tasks = (await db.execute(stmt_task)).all()
-    for t, project_name, assignee_name, developer_name, tester_name in tasks:
-        items.append({
-            'id': t.task_id,
-            'title': t.title,
-            'code': t.task_code,
-            'type': 'task',
-            'type_label': '任务',
-            'status': t.status,
-            'priority': t.priority,
-            'project_name': project_name,
-            'requirement_id': t.requirement_id,
-            'sub_requirement_id': t.sub_requirement_id,
-            'owner': assignee_name or t.assignee_id,
-            'created_by': t.create_by,
-            'developer': developer_name,
-            'tester': tester_name,
-            'estimate_time': t.estimate_time,
-            'start_time': t.start_date.strftime('%Y-%m-%d') if t.start_date else None,
-            'end_date': t.end_date.strftime('%Y-%m-%d') if t.end_date else None,
-            'deadline': t.end_date.strftime('%Y-%m-%d') if t.end_date else None,
-            'created_at': t.create_time.strftime('%Y-%m-%d %H:%M:%S') if t.create_time else None,
-            'update_time': t.update_time
-        })
+        tasks = (await db.execute(stmt_task)).all()
+        for t, project_name, assignee_name, developer_name, tester_name in tasks:
+            details[('task', t.task_id)] = {
+                'id': t.task_id,
+                'title': t.title,
+                'code': t.task_code,
+                'type': 'task',
+                'type_label': '任务',
+                'status': t.status,
+                'priority': t.priority,
+                'project_name': project_name,
+                'requirement_id': t.requirement_id,
+                'sub_requirement_id': t.sub_requirement_id,
+                'owner': assignee_name or t.assignee_id,
+                'created_by': t.create_by,
+                'developer': developer_name,
+                'tester': tester_name,
+                'estimate_time': t.estimate_time,
+                'start_time': t.start_date.strftime('%Y-%m-%d') if t.start_date else None,
+                'end_date': t.end_date.strftime('%Y-%m-%d') if t.end_date else None,
+                'deadline': t.end_date.strftime('%Y-%m-%d') if t.end_date else None,
+                'created_at': t.create_time.strftime('%Y-%m-%d %H:%M:%S') if t.create_time else None,
+                'update_time': t.update_time
+            }
 
     # 4. Defects assigned to user
-    stmt_defect = select(
-        PMDefect,
-        PMProject.project_name,
-        Assignee.nickname.label('assignee_name'),
-        Developer.nickname.label('developer_name'),
-        Tester.nickname.label('tester_name')
-    ).outerjoin(
-        PMProject, PMDefect.project_id == PMProject.project_id
-    ).outerjoin(
-        Assignee, PMDefect.assignee_id == Assignee.user_id
-    ).outerjoin(
-        Developer, PMDefect.assignee_id == Developer.user_id
-    ).outerjoin(
-        Tester, PMDefect.reporter_id == Tester.user_id
-    ).where(
-        or_(
-            PMDefect.assignee_id == user_id,
-            PMDefect.reporter_id == user_id
-        ),
-        PMDefect.status.notin_(['Closed', 'Rejected']),
-        PMDefect.del_flag == 0
-    ).order_by(desc(PMDefect.update_time))
-
-    defects = (await db.execute(stmt_defect)).all()
-    for d, project_name, assignee_name, developer_name, tester_name in defects:
-        items.append({
-            'id': d.defect_id,
-            'title': d.title,
-            'code': d.defect_code,
-            'type': 'defect',
-            'type_label': '缺陷',
-            'status': d.status,
-            'priority': d.priority,
-            'project_name': project_name,
-            'owner': assignee_name or d.assignee_id,
-            'created_by': d.create_by,
-            'start_time': d.create_time.strftime('%Y-%m-%d') if d.create_time else None,
-            'end_date': d.due_date.strftime('%Y-%m-%d') if d.due_date else None,
-            'deadline': d.due_date.strftime('%Y-%m-%d') if d.due_date else None,
-            'created_at': d.create_time.strftime('%Y-%m-%d %H:%M:%S') if d.create_time else None,
-            'update_time': d.update_time,
-            'developer': developer_name,
-            'tester': tester_name
-        })
-
-    # Sort all by update_time desc
-    items.sort(key=lambda x: x['update_time'] or datetime.min, reverse=True)
-    
-    total = len(items)
-    start = (page - 1) * page_size
-    end = start + page_size
-    paged_items = items[start:end]
+    if 'defect' in ids_by_type:
+        stmt_defect = select(
+            PMDefect,
+            PMProject.project_name,
+            Assignee.nickname.label('assignee_name'),
+            Developer.nickname.label('developer_name'),
+            Tester.nickname.label('tester_name')
+        ).outerjoin(
+            PMProject, PMDefect.project_id == PMProject.project_id
+        ).outerjoin(
+            Assignee, PMDefect.assignee_id == Assignee.user_id
+        ).outerjoin(
+            Developer, PMDefect.assignee_id == Developer.user_id
+        ).outerjoin(
+            Tester, PMDefect.reporter_id == Tester.user_id
+        ).where(
+            PMDefect.defect_id.in_(ids_by_type['defect'])
+        )
+
+        defects = (await db.execute(stmt_defect)).all()
+        for d, project_name, assignee_name, developer_name, tester_name in defects:
+            details[('defect', d.defect_id)] = {
+                'id': d.defect_id,
+                'title': d.title,
+                'code': d.defect_code,
+                'type': 'defect',
+                'type_label': '缺陷',
+                'status': d.status,
+                'priority': d.priority,
+                'project_name': project_name,
+                'owner': assignee_name or d.assignee_id,
+                'created_by': d.create_by,
+                'start_time': d.create_time.strftime('%Y-%m-%d') if d.create_time else None,
+                'end_date': d.due_date.strftime('%Y-%m-%d') if d.due_date else None,
+                'deadline': d.due_date.strftime('%Y-%m-%d') if d.due_date else None,
+                'created_at': d.create_time.strftime('%Y-%m-%d %H:%M:%S') if d.create_time else None,
+                'update_time': d.update_time,
+                'developer': developer_name,
+                'tester': tester_name
+            }
+
+    # 按数据库返回的顺序输出当前页
+    paged_items = [details[key] for key in ((row.todo_type, row.todo_id) for row in page_rows) if key in details]
     
     # Clean up datetime objects for JSON response
     for i in paged_items:
@@ -384,258 +540,47 @@ async def get_todos_data(current_user, db, page=1, page_size=10):
 
     return {'items': paged_items, 'total': total, 'page': page, 'page_size': page_size}
 
-async def get_activities_data(current_user, automation_db, main_db, page=1, page_size=10):
-    # My Activity: User operations (Create, Update, Execute)
-    # Since we don't have a centralized operation log, we query create_by/update_by from entities
-    # This is expensive but MVP acceptable.
-    
-    # 1. Automation Executions
-    stmt_exec = select(
-        AutomationExecution,
-        AutomationProject.product_package_names
-    ).outerjoin(
-        AutomationProject, AutomationExecution.project_id == AutomationProject.id
-    ).where(
-        AutomationExecution.executed_by == current_user.username
-    ).order_by(desc(AutomationExecution.start_time))
-    
-    # 2. Requirements Created/Updated
-    stmt_req = select(PMRequirement, PMProject.project_name).outerjoin(
-        PMProject, PMRequirement.project_id == PMProject.project_id
-    ).where(
-        or_(
-            PMRequirement.create_by == current_user.username,
-            PMRequirement.update_by == current_user.username
-        )
-    ).order_by(desc(PMRequirement.update_time))
-    
-    # 3. Tasks Created/Updated
-    Req = aliased(PMRequirement)
-    SubReq = aliased(PMSubRequirement)
-    ParentReq = aliased(PMRequirement)
-    Proj = aliased(PMProject)
-
-    stmt_task = select(
-        PMTask, 
-        Proj.project_name
-    ).outerjoin(
-        Req, PMTask.requirement_id == Req.req_id
-    ).outerjoin(
-        SubReq, PMTask.sub_requirement_id == SubReq.sub_req_id
-    ).outerjoin(
-        ParentReq, SubReq.requirement_id == ParentReq.req_id
-    ).outerjoin(
-        Proj, func.coalesce(Req.project_id, ParentReq.project_id) == Proj.project_id
-    ).where(
-        or_(
-            PMTask.create_by == current_user.username,
-            PMTask.update_by == current_user.username
-        )
-    ).order_by(desc(PMTask.update_time))
-
-    # 4. Sub-Requirements Created/Updated
-    stmt_sub = select(PMSubRequirement, PMProject.project_name).outerjoin(
-        PMRequirement, PMSubRequirement.requirement_id == PMRequirement.req_id
-    ).outerjoin(
-        PMProject, PMRequirement.project_id == PMProject.project_id
-    ).where(
-        or_(
-            PMSubRequirement.create_by == current_user.username,
-            PMSubRequirement.update_by == current_user.username
-        )
-    ).order_by(desc(PMSubRequirement.update_time))
-    
-    # 5. Automation Projects Created/Updated
-    stmt_auto_proj = select(AutomationProject).where(
-        AutomationProject.created_by == current_user.username
-    ).order_by(desc(AutomationProject.updated_at))
-
-    # 6. Defects Created/Updated
-    stmt_defect = select(PMDefect, PMProject.project_name).outerjoin(
-        PMProject, PMDefect.project_id == PMProject.project_id
-    ).where(
-        or_(
-            PMDefect.create_by == current_user.username,
-            PMDefect.update_by == current_user.username
-        )
-    ).order_by(desc(PMDefect.update_time))
-
-    # Execute queries
-    execs = (await automation_db.execute(stmt_exec.limit(50))).all()
-    req_rows = (await main_db.execute(stmt_req.limit(50))).all()
-    task_rows = (await main_db.execute(stmt_task.limit(50))).all()
-    sub_rows = (await main_db.execute(stmt_sub.limit(50))).all()
-    auto_projs = (await automation_db.execute(stmt_auto_proj.limit(50))).scalars().all()
-    defect_rows = (await main_db.execute(stmt_defect.limit(50))).all()
-    
-    activities = []
-    for e, package_names in execs:
-        target_name = parse_list_string(e.process_name)
-        project_name = parse_list_string(package_names) or '自动化项目'
-
-        activities.append({
-            'id': e.id,
-            'time': e.start_time,
-            'target_type': 'automation_project',
-            'target_name': target_name,
-            'project_name': project_name,
-            'action': '执行了',
-            'result': e.status,
-            'content': f"执行了自动化测试: {target_name}",
-            'status': e.status
-        })
-        
-    for r, pname in req_rows:
-        if r.create_by == current_user.username:
-            activities.append({
-                'id': r.req_id,
-                'time': r.create_time,
-                'target_type': 'requirement',
-                'target_name': r.title,
-                'project_name': pname,
-                'action': '新建了',
-                'result': r.status,
-                'content': f"新建了需求: {r.title}",
-                'status': r.status
-            })
-        if r.update_by == current_user.username and r.update_time and r.create_time and r.update_time > r.create_time + timedelta(seconds=1):
-            activities.append({
-                'id': r.req_id,
-                'time': r.update_time,
-                'target_type': 'requirement',
-                'target_name': r.title,
-                'project_name': pname,
-                'action': '更新了',
-                'result': r.status,
-                'content': f"更新了需求: {r.title}",
-                'status': r.status
-            })
-
-    for s, pname in sub_rows:
-        if s.create_by == current_user.username:
-            activities.append({
-                'id': s.sub_req_id,
-                'time': s.create_time,
-                'target_type': 'sub_requirement',
-                'target_name': s.title,
-                'project_name': pname,
-                'action': '新建了',
-                'result': s.status,
-                'content': f"新建了子需求: {s.title}",
-                'status': s.status
-            })
-        if s.update_by == current_user.username and s.update_time and s.create_time and s.update_time > s.create_time + timedelta(seconds=1):
-            activities.append({
-                'id': s.sub_req_id,
-                'time': s.update_time,
-                'target_type': 'sub_requirement',
-                'target_name': s.title,
-                'project_name': pname,
-                'action': '更新了',
-                'result': s.status,
-                'content': f"更新了子需求: {s.title}",
-                'status': s.status
-            })
-        
-    for t, pname in task_rows:
-        if t.create_by == current_user.username:
-            activities.append({
-                'id': t.task_id,
-                'requirement_id': t.requirement_id,
-                'sub_requirement_id': t.sub_requirement_id,
-                'time': t.create_time,
-                'target_type': 'task',
-                'target_name': t.title,
-                'project_name': pname,
-                'action': '新建了',
-                'result': t.status,
-                'content': f"新建了任务: {t.title}",
-                'status': t.status
-            })
-        if t.update_by == current_user.username and t.update_time and t.create_time and t.update_time > t.create_time + timedelta(seconds=1):
-            activities.append({
-                'id': t.task_id,
-                'requirement_id': t.requirement_id,
-                'sub_requirement_id': t.sub_requirement_id,
-                'time': t.update_time,
-                'target_type': 'task',
-                'target_name': t.title,
-                'project_name': pname,
-                'action': '更新了',
-                'result': t.status,
-                'content': f"更新了任务: {t.title}",
-                'status': t.status
-            })
-
-    for p in auto_projs:
-        status_val = p.des_status or p.status
-        target_name = parse_list_string(p.process_name)
-        project_name = parse_list_string(p.product_package_names)
-
-        if p.created_at:
-            activities.append({
-                'id': p.id,
-                'time': p.created_at,
-                'target_type': 'automation_project',
-                'target_name': target_name,
-                'project_name': project_name,
-                'action': '新建了',
-                'result': status_val,
-                'content': f"新建了自动化项目: {target_name}",
-                'status': status_val
-            })
-        if p.updated_at and p.created_at and p.updated_at > p.created_at + timedelta(seconds=1):
-             activities.append({
-                'id': p.id,
-                'time': p.updated_at,
-                'target_type': 'automation_project',
-                'target_name': target_name,
-                'project_name': project_name,
-                'action': '更新了',
-                'result': status_val,
-                'content': f"更新了自动化项目: {target_name}",
-                'status': status_val
-             })
-
-    for d, pname in defect_rows:
-        if d.create_by == current_user.username:
-            activities.append({
-                'id': d.defect_id,
-                'time': d.create_time,
-                'target_type': 'defect',
-                'target_name': d.title,
-                'project_name': pname,
-                'action': '新建了',
-                'result': d.status,
-                'content': f"新建了缺陷: {d.title}",
-                'status': d.status
-            })
-        if d.update_by == current_user.username and d.update_time and d.create_time and d.update_time > d.create_time + timedelta(seconds=1):
-            activities.append({
-                'id': d.defect_id,
-                'time': d.update_time,
-                'target_type': 'defect',
-                'target_name': d.title,
-                'project_name': pname,
-                'action': '更新了',
-                'result': d.status,
-                'content': f"更新了缺陷: {d.title}",
-                'status': d.status
-            })
-        
-    # Sort
-    activities.sort(key=lambda x: x['time'] or datetime.min, reverse=True)
-    
-    total = len(activities)
-    start = (page - 1) * page_size
-    end = start + page_size
-    paged_items = activities[start:end]
-    
-    for i in paged_items:
-        if isinstance(i.get('time'), datetime):
-            i['time'] = i['time'].strftime('%Y-%m-%d %H:%M:%S')
-            
-    return {'items': paged_items, 'total': total}
+async def get_activities_data(current_user, main_db, page=1, page_size=10, cursor=None):
+    # My Activity: 由新建/更新/执行接口写入的动态表，按 (username, create_time) 索引游标分页
+    return await ActivityService.list_feed(main_db, current_user.username, page, page_size, cursor)
+
+# 关注对象的查询定义：第一列为主键，detail 将查询行转换为列表项字段
+FOLLOW_TARGETS = {
+    'requirement': {
+        'database': 'main',
+        'label': '需求',
+        'columns': [PMRequirement.req_id, PMRequirement.title, PMRequirement.status, PMRequirement.priority, PMRequirement.req_code],
+        'detail': lambda row: {'title': row.title, 'status': row.status, 'priority': row.priority, 'code': row.req_code}
+    },
+    'sub_requirement': {
+        'database': 'main',
+        'label': '子需求',
+        'columns': [PMSubRequirement.sub_req_id, PMSubRequirement.title, PMSubRequirement.status, PMSubRequirement.priority, PMSubRequirement.sub_req_code],
+        'detail': lambda row: {'title': row.title, 'status': row.status, 'priority': row.priority, 'code': row.sub_req_code}
+    },
+    'task': {
+        'database': 'main',
+        'label': '任务',
+        'columns': [PMTask.task_id, PMTask.title, PMTask.status, PMTask.priority, PMTask.task_code, PMTask.requirement_id, PMTask.sub_requirement_id],
+        'detail': lambda row: {
+            'title': row.title, 'status': row.status, 'priority': row.priority, 'code': row.task_code,
+            'requirement_id': row.requirement_id, 'sub_requirement_id': row.sub_requirement_id
+        }
+    },
+    'defect': {
+        'database': 'main',
+        'label': '缺陷',
+        'columns': [PMDefect.defect_id, PMDefect.title, PMDefect.status, PMDefect.priority, PMDefect.defect_code],
+        'detail': lambda row: {'title': row.title, 'status': row.status, 'priority': row.priority, 'code': row.defect_code}
+    },
+    'automation_project': {
+        'database': 'automation',
+        'label': '自动化项目',
+        'columns': [AutomationProject.id, AutomationProject.process_name, AutomationProject.status],
+        # AutomationProject doesn't have priority field usually
+        'detail': lambda row: {'title': parse_list_string(row.process_name), 'status': row.status, 'priority': 'Normal', 'code': str(row.id)}
+    }
+}
 
 async def get_followed_data(current_user, main_db, automation_db, page=1, page_size=10):
     user_id = current_user.user_id
@@ -651,60 +596,42 @@ async def get_followed_data(current_user, main_db, automation_db, page=1, page_s
     stmt = stmt.offset((page - 1) * page_size).limit(page_size)
     follows = (await main_db.execute(stmt)).scalars().all()
     
+    # 按类型分组，每种类型一条 IN 查询；主库与自动化库的查询并发执行
+    ids_by_type: Dict[str, set] = {}
+    for f in follows:
+        if f.target_type in FOLLOW_TARGETS:
+            ids_by_type.setdefault(f.target_type, set()).add(f.target_id)
+
+    async def resolve(db, database):
+        resolved = {}
+        for target_type, ids in ids_by_type.items():
+            spec = FOLLOW_TARGETS[target_type]
+            if spec['database'] != database:
+                continue
+            stmt = select(*spec['columns']).where(spec['columns'][0].in_(ids))
+            for row in (await db.execute(stmt)).all():
+                resolved[(target_type, row[0])] = spec['detail'](row)
+        return resolved
+
+    main_details, automation_details = await asyncio.gather(
+        resolve(main_db, 'main'),
+        resolve(automation_db, 'automation')
+    )
+    details = {**main_details, **automation_details}
+
     items = []
     for f in follows:
+        detail = details.get((f.target_type, f.target_id))
+        if not detail: # Only add if target still exists
+            continue
         item = {
             'follow_id': f.follow_id,
             'target_id': f.target_id,
             'target_type': f.target_type,
-            'follow_time': f.create_time.strftime('%Y-%m-%d %H:%M:%S') if f.create_time else None
+            'follow_time': f.create_time.strftime('%Y-%m-%d %H:%M:%S') if f.create_time else None,
+            'type_label': FOLLOW_TARGETS[f.target_type]['label']
         }
-        
-        # Fetch details based on type
-        if f.target_type == 'requirement':
-            res = (await main_db.execute(select(PMRequirement).where(PMRequirement.req_id == f.target_id))).scalar_one_or_none()
-            if res:
-                item['title'] = res.title
-                item['status'] = res.status
-                item['priority'] = res.priority
-                item['code'] = res.req_code
-                item['type_label'] = '需求'
-        elif f.target_type == 'sub_requirement':
-            res = (await main_db.execute(select(PMSubRequirement).where(PMSubRequirement.sub_req_id == f.target_id))).scalar_one_or_none()
-            if res:
-                item['title'] = res.title
-                item['status'] = res.status
-                item['priority'] = res.priority
-                item['code'] = res.sub_req_code
-                item['type_label'] = '子需求'
-        elif f.target_type == 'task':
-            res = (await main_db.execute(select(PMTask).where(PMTask.task_id == f.target_id))).scalar_one_or_none()
-            if res:
-                item['title'] = res.title
-                item['status'] = res.status
-                item['priority'] = res.priority
-                item['code'] = res.task_code
-                item['type_label'] = '任务'
-                item['requirement_id'] = res.requirement_id
-                item['sub_requirement_id'] = res.sub_requirement_id
-        elif f.target_type == 'defect':
-            res = (await main_db.execute(select(PMDefect).where(PMDefect.defect_id == f.target_id))).scalar_one_or_none()
-            if res:
-                item['title'] = res.title
-                item['status'] = res.status
-                item['priority'] = res.priority
-                item['code'] = res.defect_code
-                item['type_label'] = '缺陷'
-        elif f.target_type == 'automation_project':
-             res = (await automation_db.execute(select(AutomationProject).where(AutomationProject.id == f.target_id))).scalar_one_or_none()
-             if res:
-                 item['title'] = parse_list_string(res.process_name)
-                 item['status'] = res.status
-                 item['priority'] = 'Normal' # AutomationProject doesn't have priority field usually
-                 item['code'] = str(res.id)
-                 item['type_label'] = '自动化项目'
-        
-        if 'title' in item: # Only add if target still exists
-            items.append(item)
+        item.update(detail)
+        items.append(item)
             
     return {'items': items, 'total': total}
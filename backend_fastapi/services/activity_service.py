@@ -0,0 +1,333 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import select, func, desc, or_, and_, literal
+from backend_fastapi.db.session import AsyncSessionLocal
+from backend_fastapi.models.sys_models import SysUserActivity
+from backend_fastapi.models.pm_models import PMProject, PMRequirement, PMSubRequirement, PMTask, PMDefect
+from backend_fastapi.models.automation_models import AutomationProject, AutomationExecution
+from backend_fastapi.utils.LogManeger import log_info
+from datetime import datetime, timedelta
+from typing import List, Optional
+import base64
+import json
+
+ACTION_CREATE = '新建了'
+ACTION_UPDATE = '更新了'
+ACTION_EXECUTE = '执行了'
+
+# 动态内容中的对象类型名称
+ACTIVITY_TYPE_LABELS = {
+    'requirement': '需求',
+    'sub_requirement': '子需求',
+    'task': '任务',
+    'defect': '缺陷',
+    'automation_project': '自动化项目'
+}
+
+TARGET_NAME_MAX_LENGTH = 500
+
+# 回填历史动态时每批读取的业务数据行数
+BACKFILL_BATCH_SIZE = 1000
+
+
+class ActivityService:
+    """
+    用户操作动态：业务接口只追加写入，工作台按 (username, create_time, activity_id) 游标分页读取
+    """
+
+    @staticmethod
+    def build(
+        username: str,
+        action: str,
+        target_type: str,
+        target_id: int,
+        target_name: Optional[str] = None,
+        project_name: Optional[str] = None,
+        status: Optional[str] = None,
+        create_time: Optional[datetime] = None,
+        **extra
+    ) -> SysUserActivity:
+        """构建一条动态记录"""
+        target_name = (target_name or '')[:TARGET_NAME_MAX_LENGTH]
+        if action == ACTION_EXECUTE:
+            content = f"{action}自动化测试: {target_name}"
+        else:
+            content = f"{action}{ACTIVITY_TYPE_LABELS.get(target_type, '')}: {target_name}"
+        extra = {k: v for k, v in extra.items() if v is not None}
+        return SysUserActivity(
+            username=username,
+            action=action,
+            target_type=target_type,
+            target_id=target_id,
+            target_name=target_name,
+            project_name=project_name,
+            status=status,
+            content=content[:600],
+            extra=json.dumps(extra, ensure_ascii=False) if extra else None,
+            create_time=create_time or datetime.now()
+        )
+
+    @staticmethod
+    async def resolve_project_name(
+        db: AsyncSession,
+        project_id: Optional[int] = None,
+        requirement_id: Optional[int] = None,
+        sub_requirement_id: Optional[int] = None
+    ) -> Optional[str]:
+        """按 项目ID -> 需求ID -> 子需求ID 的顺序查找所属项目名称"""
+        if project_id:
+            stmt = select(PMProject.project_name).where(PMProject.project_id == project_id)
+        elif requirement_id:
+            stmt = select(PMProject.project_name).join(
+                PMRequirement, PMRequirement.project_id == PMProject.project_id
+            ).where(PMRequirement.req_id == requirement_id)
+        elif sub_requirement_id:
+            stmt = select(PMProject.project_name).join(
+                PMRequirement, PMRequirement.project_id == PMProject.project_id
+            ).join(
+                PMSubRequirement, PMSubRequirement.requirement_id == PMRequirement.req_id
+            ).where(PMSubRequirement.sub_req_id == sub_requirement_id)
+        else:
+            return None
+        return (await db.execute(stmt.limit(1))).scalar()
+
+    @staticmethod
+    async def record(
+        db: AsyncSession,
+        username: str,
+        action: str,
+        target_type: str,
+        target_id: int,
+        project_id: Optional[int] = None,
+        **kwargs
+    ):
+        """
+        在主库会话中追加一条动态（不提交，随业务数据一起提交）
+        未传 project_name 时按 project_id / requirement_id / sub_requirement_id 查找项目名称
+        """
+        if not username or target_id is None:
+            return
+        if kwargs.get('project_name') is None:
+            kwargs['project_name'] = await ActivityService.resolve_project_name(
+                db, project_id, kwargs.get('requirement_id'), kwargs.get('sub_requirement_id')
+            )
+        db.add(ActivityService.build(username, action, target_type, target_id, **kwargs))
+
+    @staticmethod
+    async def record_detached(username: str, action: str, target_type: str, target_id: int, **kwargs):
+        """
+        使用独立的主库会话写入一条动态（供自动化库的接口调用），失败只记录日志
+        """
+        if not username or target_id is None:
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                db.add(ActivityService.build(username, action, target_type, target_id, **kwargs))
+                await db.commit()
+        except Exception as e:
+            log_info(f"Record activity error ({target_type} {target_id}): {str(e)}")
+
+    @staticmethod
+    def encode_cursor(activity: SysUserActivity) -> str:
+        """将最后一条动态编码为不透明游标"""
+        raw = f"{activity.create_time.strftime('%Y-%m-%d %H:%M:%S.%f')}|{activity.activity_id}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """解析游标，格式不正确时抛出 ValueError"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+            time_str, activity_id = raw.split('|')
+            return datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S.%f'), int(activity_id)
+        except Exception:
+            raise ValueError('无效的分页游标')
+
+    @staticmethod
+    async def list_feed(db: AsyncSession, username: str, page: int = 1, page_size: int = 10, cursor: Optional[str] = None) -> dict:
+        """
+        读取用户动态
+        传入 cursor 时按游标读取下一页（任意深度只扫描 page_size 行）；否则按页码读取（兼容直接跳页）
+        :return: {'items', 'total', 'next_cursor', 'has_more'}
+        """
+        stmt = select(SysUserActivity).where(SysUserActivity.username == username)
+        if cursor:
+            cursor_time, cursor_id = ActivityService.decode_cursor(cursor)
+            stmt = stmt.where(or_(
+                SysUserActivity.create_time < cursor_time,
+                and_(SysUserActivity.create_time == cursor_time, SysUserActivity.activity_id < cursor_id)
+            ))
+        elif page > 1:
+            stmt = stmt.offset((page - 1) * page_size)
+        stmt = stmt.order_by(desc(SysUserActivity.create_time), desc(SysUserActivity.activity_id)).limit(page_size + 1)
+        rows = (await db.execute(stmt)).scalars().all()
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        # 总数只在 (username, ...) 索引上计数，不回表
+        stmt_count = select(func.count()).select_from(SysUserActivity).where(SysUserActivity.username == username)
+        total = (await db.execute(stmt_count)).scalar() or 0
+
+        return {
+            'items': [row.to_dict() for row in rows],
+            'total': total,
+            'next_cursor': ActivityService.encode_cursor(rows[-1]) if has_more and rows else None,
+            'has_more': has_more
+        }
+
+    @staticmethod
+    def _backfill_sources():
+        """
+        回填来源：(target_type, 主键列, 查询)，查询统一输出
+        target_id/target_name/status/create_by/update_by/create_time/update_time/project_name/requirement_id/sub_requirement_id
+        """
+        Req = aliased(PMRequirement)
+        SubReq = aliased(PMSubRequirement)
+        ParentReq = aliased(PMRequirement)
+
+        def columns(model, pk, project_name, requirement_id=None, sub_requirement_id=None):
+            return [
+                pk.label('target_id'), model.title.label('target_name'), model.status.label('status'),
+                model.create_by.label('create_by'), model.update_by.label('update_by'),
+                model.create_time.label('create_time'), model.update_time.label('update_time'),
+                project_name.label('project_name'),
+                (requirement_id if requirement_id is not None else literal(None)).label('requirement_id'),
+                (sub_requirement_id if sub_requirement_id is not None else literal(None)).label('sub_requirement_id')
+            ]
+
+        return [
+            ('requirement', PMRequirement.req_id, select(
+                *columns(PMRequirement, PMRequirement.req_id, PMProject.project_name)
+            ).outerjoin(PMProject, PMRequirement.project_id == PMProject.project_id)),
+            ('sub_requirement', PMSubRequirement.sub_req_id, select(
+                *columns(PMSubRequirement, PMSubRequirement.sub_req_id, PMProject.project_name)
+            ).outerjoin(
+                PMRequirement, PMSubRequirement.requirement_id == PMRequirement.req_id
+            ).outerjoin(PMProject, PMRequirement.project_id == PMProject.project_id)),
+            ('task', PMTask.task_id, select(
+                *columns(PMTask, PMTask.task_id, PMProject.project_name, PMTask.requirement_id, PMTask.sub_requirement_id)
+            ).outerjoin(
+                Req, PMTask.requirement_id == Req.req_id
+            ).outerjoin(
+                SubReq, PMTask.sub_requirement_id == SubReq.sub_req_id
+            ).outerjoin(
+                ParentReq, SubReq.requirement_id == ParentReq.req_id
+            ).outerjoin(PMProject, func.coalesce(Req.project_id, ParentReq.project_id) == PMProject.project_id)),
+            ('defect', PMDefect.defect_id, select(
+                *columns(PMDefect, PMDefect.defect_id, PMProject.project_name)
+            ).outerjoin(PMProject, PMDefect.project_id == PMProject.project_id))
+        ]
+
+    @staticmethod
+    def _first_value(raw) -> Optional[str]:
+        """JSON 列表字段取第一个值（与工作台原有的显示规则一致）"""
+        if raw and isinstance(raw, str) and raw.strip().startswith('['):
+            try:
+                values = json.loads(raw)
+                if isinstance(values, list) and values:
+                    return str(values[0])
+            except Exception:
+                pass
+        return raw
+
+    @staticmethod
+    def _history_activities(row, target_type: str, before: datetime) -> List[SysUserActivity]:
+        """由一行业务数据推导历史的新建/更新动态（更新时间晚于创建时间 1 秒以上才视为更新）"""
+        extra = {}
+        if target_type == 'task':
+            extra = {'requirement_id': row.requirement_id, 'sub_requirement_id': row.sub_requirement_id}
+        common = dict(target_name=row.target_name, project_name=row.project_name, status=row.status, **extra)
+        activities = []
+        if row.create_by and row.create_time and row.create_time < before:
+            activities.append(ActivityService.build(
+                row.create_by, ACTION_CREATE, target_type, row.target_id, create_time=row.create_time, **common
+            ))
+        if (row.update_by and row.update_time and row.create_time and row.update_time < before
+                and row.update_time > row.create_time + timedelta(seconds=1)):
+            activities.append(ActivityService.build(
+                row.update_by, ACTION_UPDATE, target_type, row.target_id, create_time=row.update_time, **common
+            ))
+        return activities
+
+    @staticmethod
+    def _backfill_batches(source_db: Session, stmt, pk, to_activities, main_db: Session) -> int:
+        """按主键分批读取业务数据（source_db），将推导出的动态写入主库，返回写入条数"""
+        last_id = 0
+        total = 0
+        while True:
+            rows = source_db.execute(stmt.where(pk > last_id).order_by(pk).limit(BACKFILL_BATCH_SIZE)).all()
+            if not rows:
+                return total
+            activities = [activity for row in rows for activity in to_activities(row)]
+            main_db.add_all(activities)
+            main_db.commit()
+            total += len(activities)
+            last_id = rows[-1][0]
+
+    @staticmethod
+    def backfill_sync(main_db: Session, automation_db: Session, before: Optional[datetime] = None) -> int:
+        """
+        由业务表推导历史动态并写入（同步会话）
+        只回填 before 之前发生的操作，默认取动态表中最早一条的时间（为空时取当前时间），
+        因此上线后执行一次即可，重复执行不会产生重复数据
+        :return: 写入的动态条数
+        """
+        if before is None:
+            before = main_db.execute(select(func.min(SysUserActivity.create_time))).scalar() or datetime.now()
+
+        total = 0
+        for target_type, pk, stmt in ActivityService._backfill_sources():
+            count = ActivityService._backfill_batches(
+                main_db, stmt, pk,
+                lambda row, target_type=target_type: ActivityService._history_activities(row, target_type, before),
+                main_db
+            )
+            log_info(f"Backfilled {count} {target_type} activities")
+            total += count
+
+        def project_activities(row):
+            project_name = ActivityService._first_value(row.product_package_names)
+            common = dict(
+                target_name=ActivityService._first_value(row.process_name),
+                project_name=project_name,
+                status=row.des_status or row.status
+            )
+            activities = []
+            if row.created_by and row.created_at and row.created_at < before:
+                activities.append(ActivityService.build(
+                    row.created_by, ACTION_CREATE, 'automation_project', row.id, create_time=row.created_at, **common
+                ))
+                if row.updated_at and row.updated_at < before and row.updated_at > row.created_at + timedelta(seconds=1):
+                    activities.append(ActivityService.build(
+                        row.created_by, ACTION_UPDATE, 'automation_project', row.id, create_time=row.updated_at, **common
+                    ))
+            return activities
+
+        stmt_project = select(
+            AutomationProject.id, AutomationProject.process_name, AutomationProject.product_package_names,
+            AutomationProject.des_status, AutomationProject.status, AutomationProject.created_by,
+            AutomationProject.created_at, AutomationProject.updated_at
+        )
+        count = ActivityService._backfill_batches(automation_db, stmt_project, AutomationProject.id, project_activities, main_db)
+        log_info(f"Backfilled {count} automation project activities")
+        total += count
+
+        def execution_activities(row):
+            if not row.executed_by or not row.start_time or row.start_time >= before:
+                return []
+            return [ActivityService.build(
+                row.executed_by, ACTION_EXECUTE, 'automation_project', row.id,
+                target_name=ActivityService._first_value(row.process_name),
+                project_name=ActivityService._first_value(row.product_package_names) or '自动化项目',
+                status=row.status,
+                create_time=row.start_time
+            )]
+
+        stmt_execution = select(
+            AutomationExecution.id, AutomationExecution.process_name, AutomationExecution.status,
+            AutomationExecution.executed_by, AutomationExecution.start_time, AutomationProject.product_package_names
+        ).outerjoin(AutomationProject, AutomationExecution.project_id == AutomationProject.id)
+        count = ActivityService._backfill_batches(automation_db, stmt_execution, AutomationExecution.id, execution_activities, main_db)
+        log_info(f"Backfilled {count} automation execution activities")
+        return total + count
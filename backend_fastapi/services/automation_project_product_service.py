@@ -0,0 +1,136 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import select, delete, or_
+from backend_fastapi.models.automation_models import AutomationProject, AutomationProjectProduct, Project
+from backend_fastapi.utils.LogManeger import log_info
+from typing import Dict, List, Optional
+import json
+
+# 回填时每批处理的测试案例数
+BACKFILL_BATCH_SIZE = 500
+
+
+class AutomationProjectProductService:
+    """
+    维护自动化测试案例与产品包的关联表 (automation_project_products)
+    product_ids 中的值按 产品ID -> 产品编号 -> 产品包名 的顺序匹配产品（与创建测试案例时推断 project_id 的规则一致），
+    product_package_names 中未被覆盖的包名单独成行
+    """
+
+    @staticmethod
+    def parse_list(raw) -> List[str]:
+        """解析 JSON 列表/单值/逗号分隔字符串，返回去空白后的非空值"""
+        if not raw:
+            return []
+        if isinstance(raw, list):
+            values = raw
+        else:
+            try:
+                parsed = json.loads(raw)
+                values = parsed if isinstance(parsed, list) else [parsed]
+            except:
+                values = str(raw).split(',')
+        return [str(v).strip() for v in values if v is not None and str(v).strip()]
+
+    @staticmethod
+    def _projects_stmt(codes: List[str], names: List[str]):
+        """构建一次性匹配全部产品的查询"""
+        conditions = [Project.product_package_name.in_(codes + names)]
+        digit_ids = [int(code) for code in codes if code.isdecimal()]
+        if digit_ids:
+            conditions.append(Project.id.in_(digit_ids))
+        if codes:
+            conditions.append(Project.product_id.in_(codes))
+        return select(Project.id, Project.product_id, Project.product_package_name).where(or_(*conditions))
+
+    @staticmethod
+    def _build_links(automation_project_id: int, codes: List[str], names: List[str], projects) -> List[AutomationProjectProduct]:
+        """根据匹配到的产品生成关联行（去重）"""
+        by_id = {p.id: p for p in projects}
+        by_code = {p.product_id: p for p in projects if p.product_id}
+        by_name = {p.product_package_name: p for p in projects if p.product_package_name}
+
+        links = []
+        seen = set()
+
+        def add(project_id, product_code, package_name):
+            key = (project_id, product_code, package_name)
+            if key in seen:
+                return
+            seen.add(key)
+            links.append(AutomationProjectProduct(
+                automation_project_id=automation_project_id,
+                project_id=project_id,
+                product_code=product_code,
+                product_package_name=package_name
+            ))
+
+        for code in codes:
+            project = (by_id.get(int(code)) if code.isdecimal() else None) or by_code.get(code) or by_name.get(code)
+            add(project.id if project else None, code, project.product_package_name if project else '')
+
+        covered_names = {link.product_package_name for link in links}
+        for name in names:
+            if name in covered_names:
+                continue
+            project = by_name.get(name)
+            add(project.id if project else None, None, name)
+            covered_names.add(name)
+        return links
+
+    @staticmethod
+    async def sync(db: AsyncSession, automation_project: AutomationProject):
+        """
+        按测试案例当前的 product_ids / product_package_names 重建其关联行（不提交，由调用方随业务数据一起提交）
+        """
+        codes = AutomationProjectProductService.parse_list(automation_project.product_ids)
+        names = AutomationProjectProductService.parse_list(automation_project.product_package_names)
+        projects = []
+        if codes or names:
+            projects = (await db.execute(AutomationProjectProductService._projects_stmt(codes, names))).all()
+
+        await db.execute(delete(AutomationProjectProduct).where(
+            AutomationProjectProduct.automation_project_id == automation_project.id
+        ))
+        db.add_all(AutomationProjectProductService._build_links(automation_project.id, codes, names, projects))
+
+    @staticmethod
+    def backfill_sync(db: Session, start_id: Optional[int] = None) -> int:
+        """
+        为已有测试案例回填关联表（同步会话，可重复执行）
+        :param start_id: 从该测试案例ID开始，为空时处理全部
+        :return: 处理的测试案例数
+        """
+        last_id = (start_id or 0) - 1
+        total = 0
+        while True:
+            stmt = select(
+                AutomationProject.id,
+                AutomationProject.product_ids,
+                AutomationProject.product_package_names
+            ).where(AutomationProject.id > last_id).order_by(AutomationProject.id).limit(BACKFILL_BATCH_SIZE)
+            rows = db.execute(stmt).all()
+            if not rows:
+                return total
+
+            parsed: Dict[int, tuple] = {}
+            all_codes, all_names = set(), set()
+            for row in rows:
+                codes = AutomationProjectProductService.parse_list(row.product_ids)
+                names = AutomationProjectProductService.parse_list(row.product_package_names)
+                parsed[row.id] = (codes, names)
+                all_codes.update(codes)
+                all_names.update(names)
+            projects = []
+            if all_codes or all_names:
+                projects = db.execute(AutomationProjectProductService._projects_stmt(list(all_codes), list(all_names))).all()
+
+            ap_ids = list(parsed.keys())
+            db.execute(delete(AutomationProjectProduct).where(AutomationProjectProduct.automation_project_id.in_(ap_ids)))
+            for ap_id, (codes, names) in parsed.items():
+                db.add_all(AutomationProjectProductService._build_links(ap_id, codes, names, projects))
+            db.commit()
+
+            total += len(rows)
+            last_id = rows[-1].id
+            log_info(f"Backfilled automation project products up to id {last_id} ({total} projects)")
@@ -0,0 +1,94 @@
+from sqlalchemy import select, update, insert, func, cast, literal, BigInteger
+from backend_fastapi.db.session import engine
+from backend_fastapi.models.sys_models import SysCodeSequence
+from backend_fastapi.models.pm_models import PMRequirement, PMSubRequirement, PMTask
+from backend_fastapi.models.test_mgt_models import TestCase
+from typing import Dict, List
+import asyncio
+import os
+
+# 编号序列：对应的编号列（序列首次使用时从该列现有最大数字编号续接）及起始值
+CODE_SEQUENCES = {
+    'requirement': {'column': PMRequirement.req_code, 'start': 100000001},
+    'sub_requirement': {'column': PMSubRequirement.sub_req_code, 'start': 100000001},
+    'task': {'column': PMTask.task_code, 'start': 10000001},
+    'test_case': {'column': TestCase.case_code, 'start': 100000001}
+}
+
+# 每个进程一次从序列表占用的编号数
+CODE_BLOCK_SIZE = 50
+
+# 单次批量占用的编号数上限
+CODE_RESERVE_LIMIT = 100000
+
+# 进程内已占用、未分配的编号段：{序列名: [pid, 下一个编号, 段结束(不含)]}
+_code_blocks: Dict[str, List[int]] = {}
+_code_locks: Dict[str, asyncio.Lock] = {}
+
+
+class CodeSequenceService:
+    """
+    业务编号分配：序列表 sys_code_sequence 记录各序列的下一个值，每个进程原子地占用一段（CODE_BLOCK_SIZE 个）后在内存中逐个分配，
+    新建时不再排序查询最大编号，并发创建也不会得到重复编号
+    编号在各进程间不保证按创建时间递增；进程退出时未用完的编号段会被跳过
+    """
+
+    @staticmethod
+    def _init_stmt(name: str):
+        """序列不存在时插入，起始值取编号列现有最大数字编号 + 1（不小于序列起始值）"""
+        spec = CODE_SEQUENCES[name]
+        column = spec['column']
+        max_code = select(func.max(cast(column, BigInteger))).where(column.regexp_match('^[0-9]+$')).scalar_subquery()
+        return insert(SysCodeSequence).prefix_with('IGNORE').from_select(
+            ['seq_name', 'next_value', 'update_time'],
+            select(literal(name), func.greatest(func.coalesce(max_code + 1, spec['start']), spec['start']), func.now())
+        )
+
+    @staticmethod
+    async def _reserve_range(name: str, count: int) -> int:
+        """
+        占用 count 个连续编号，返回起始值
+        使用独立连接并立即提交，行锁只在这一条 UPDATE 期间持有，不随调用方事务延长
+        """
+        if name not in CODE_SEQUENCES:
+            raise ValueError(f'未知的编号序列: {name}')
+        stmt = update(SysCodeSequence).where(SysCodeSequence.seq_name == name).values(
+            # LAST_INSERT_ID(expr) 把更新后的值记在当前连接上，无需再加锁读取
+            next_value=func.last_insert_id(SysCodeSequence.next_value + count)
+        )
+        async with engine.begin() as conn:
+            result = await conn.execute(stmt)
+            if result.rowcount == 0:
+                await conn.execute(CodeSequenceService._init_stmt(name))
+                await conn.execute(stmt)
+            end = (await conn.execute(select(func.last_insert_id()))).scalar()
+        return int(end) - count
+
+    @staticmethod
+    async def next_code(name: str) -> str:
+        """
+        分配一个编号
+        :param name: 序列名，见 CODE_SEQUENCES
+        """
+        lock = _code_locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            pid = os.getpid()
+            block = _code_blocks.get(name)
+            # fork 出的子进程不能沿用父进程的编号段
+            if not block or block[0] != pid or block[1] >= block[2]:
+                start = await CodeSequenceService._reserve_range(name, CODE_BLOCK_SIZE)
+                block = _code_blocks[name] = [pid, start, start + CODE_BLOCK_SIZE]
+            value = block[1]
+            block[1] += 1
+        return str(value)
+
+    @staticmethod
+    async def reserve(name: str, count: int) -> List[str]:
+        """
+        批量占用 count 个连续编号（一次数据库往返），用于批量导入
+        :return: 编号列表
+        """
+        if count < 1 or count > CODE_RESERVE_LIMIT:
+            raise ValueError(f'单次占用的编号数需在 1 到 {CODE_RESERVE_LIMIT} 之间')
+        start = await CodeSequenceService._reserve_range(name, count)
+        return [str(value) for value in range(start, start + count)]
@@ -0,0 +1,182 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from backend_fastapi.models.sys_dict_models import SysDictType, SysDictData
+from backend_fastapi.core.redis_client import redis_client as redis
+from backend_fastapi.utils.LogManeger import log_info
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import time
+
+# Redis 中每个字典类型一个键，值为启用的字典项列表
+DICT_CACHE_KEY_PREFIX = 'sys:dict:data:'
+DICT_CACHE_REDIS_TTL = 3600
+
+# 进程内缓存有效期（秒）：正常由失效广播清除，此时长只兜底广播丢失的情况
+DICT_CACHE_LOCAL_TTL = 300
+
+# 字典变更广播频道，消息为变更的字典类型列表(JSON)
+DICT_INVALIDATE_CHANNEL = 'sys:dict:invalidate'
+DICT_LISTEN_RETRY_INTERVAL = 5
+
+# 进程内缓存：{字典类型: (过期时间, 字典项列表)}
+_local_cache: Dict[str, Tuple[float, List[dict]]] = {}
+
+
+class DictCache:
+    """
+    字典数据缓存：进程内缓存(L1) -> Redis(L2) -> 数据库
+    字典管理接口修改数据后清除 Redis 并广播失效消息，各进程收到后清除进程内缓存；
+    热点接口读取字典只命中进程内缓存，不访问 Redis 和数据库
+    字典项格式: {'dict_data_id', 'label', 'value', 'sort', 'status', 'remark', 'create_time'}，只包含启用的项，按 dict_sort 排序
+    """
+
+    @staticmethod
+    def _cache_key(dict_type: str) -> str:
+        return f"{DICT_CACHE_KEY_PREFIX}{dict_type}"
+
+    @staticmethod
+    def _local_get(dict_type: str) -> Optional[List[dict]]:
+        entry = _local_cache.get(dict_type)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    @staticmethod
+    def _local_set(dict_type: str, items: List[dict]):
+        _local_cache[dict_type] = (time.monotonic() + DICT_CACHE_LOCAL_TTL, items)
+
+    @staticmethod
+    def _data_stmt(dict_types: List[str]):
+        return select(SysDictType.dict_type, SysDictData).join(
+            SysDictType, SysDictData.dict_id == SysDictType.dict_id
+        ).where(
+            SysDictType.dict_type.in_(dict_types),
+            SysDictData.status == 1
+        ).order_by(SysDictType.dict_type, SysDictData.dict_sort)
+
+    @staticmethod
+    def _group_rows(dict_types: List[str], rows) -> Dict[str, List[dict]]:
+        grouped = {dict_type: [] for dict_type in dict_types}
+        for dict_type, data in rows:
+            grouped[dict_type].append({
+                'dict_data_id': data.dict_data_id,
+                'label': data.dict_label,
+                'value': data.dict_value,
+                'sort': data.dict_sort,
+                'status': data.status,
+                'remark': data.remark,
+                'create_time': data.create_time.strftime('%Y-%m-%d %H:%M:%S') if data.create_time else None
+            })
+        return grouped
+
+    @staticmethod
+    async def get_many(db: AsyncSession, dict_types: Iterable[str]) -> Dict[str, List[dict]]:
+        """
+        批量读取多个字典类型：进程内缓存未命中的一次 MGET 读 Redis，仍未命中的一次查询数据库
+        :return: {字典类型: 字典项列表}，不存在的类型为空列表
+        """
+        dict_types = list(dict.fromkeys(dict_types))
+        result = {}
+        missing = []
+        for dict_type in dict_types:
+            items = DictCache._local_get(dict_type)
+            if items is None:
+                missing.append(dict_type)
+            else:
+                result[dict_type] = items
+        if not missing:
+            return result
+
+        try:
+            cached = await redis.mget([DictCache._cache_key(dict_type) for dict_type in missing])
+            for dict_type, value in zip(missing, cached):
+                if value is not None:
+                    result[dict_type] = json.loads(value)
+                    DictCache._local_set(dict_type, result[dict_type])
+            missing = [dict_type for dict_type in missing if dict_type not in result]
+        except Exception as e:
+            log_info(f"Failed to read dict cache from Redis: {e}")
+        if not missing:
+            return result
+
+        rows = (await db.execute(DictCache._data_stmt(missing))).all()
+        loaded = DictCache._group_rows(missing, rows)
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for dict_type, items in loaded.items():
+                    pipe.set(DictCache._cache_key(dict_type), json.dumps(items, ensure_ascii=False), ex=DICT_CACHE_REDIS_TTL)
+                await pipe.execute()
+        except Exception as e:
+            log_info(f"Failed to write dict cache to Redis: {e}")
+        for dict_type, items in loaded.items():
+            DictCache._local_set(dict_type, items)
+        result.update(loaded)
+        return result
+
+    @staticmethod
+    async def get(db: AsyncSession, dict_type: str) -> List[dict]:
+        """读取单个字典类型的字典项"""
+        return (await DictCache.get_many(db, [dict_type]))[dict_type]
+
+    @staticmethod
+    def get_sync(db: Session, dict_type: str) -> List[dict]:
+        """读取单个字典类型（同步会话，供 Celery 任务使用）：进程内缓存 -> 数据库"""
+        items = DictCache._local_get(dict_type)
+        if items is None:
+            rows = db.execute(DictCache._data_stmt([dict_type])).all()
+            items = DictCache._group_rows([dict_type], rows)[dict_type]
+            DictCache._local_set(dict_type, items)
+        return items
+
+    @staticmethod
+    def to_map(items: List[dict], convert: Optional[Callable] = None) -> dict:
+        """
+        字典项转为 {label: value}
+        :param convert: 值转换函数，转换失败的项被忽略
+        """
+        mapping = {}
+        for item in items:
+            try:
+                mapping[item['label']] = convert(item['value']) if convert else item['value']
+            except (TypeError, ValueError):
+                pass
+        return mapping
+
+    @staticmethod
+    async def invalidate(dict_types: Iterable[str]):
+        """字典数据变更后调用：清除 Redis 缓存和本进程缓存，并通知其他进程"""
+        dict_types = list(dict.fromkeys(dict_types))
+        for dict_type in dict_types:
+            _local_cache.pop(dict_type, None)
+        try:
+            await redis.delete(*[DictCache._cache_key(dict_type) for dict_type in dict_types])
+            await redis.publish(DICT_INVALIDATE_CHANNEL, json.dumps(dict_types))
+        except Exception as e:
+            log_info(f"Failed to invalidate dict cache: {e}")
+
+    @staticmethod
+    async def listen():
+        """
+        订阅失效广播并清除进程内缓存（应用启动时作为后台任务运行）
+        连接中断期间可能错过广播，重连时清空进程内缓存
+        """
+        while True:
+            try:
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(DICT_INVALIDATE_CHANNEL)
+                _local_cache.clear()
+                try:
+                    async for message in pubsub.listen():
+                        if message.get('type') != 'message':
+                            continue
+                        for dict_type in json.loads(message['data']):
+                            _local_cache.pop(dict_type, None)
+                finally:
+                    await pubsub.reset()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_info(f"Dict cache invalidation listener error: {e}")
+                await asyncio.sleep(DICT_LISTEN_RETRY_INTERVAL)
@@ -0,0 +1,542 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from backend_fastapi.models.automation_models import AutomationExecution, AutomationExecutionLogLine, AutomationExecutMethodLog
+from backend_fastapi.utils.UitilTools import UitilTools, AutomationLogParser
+from backend_fastapi.utils.LogManeger import log_info
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import ast
+import json
+import re
+import zlib
+
+# 预解析日志结构版本号，解析逻辑变化时递增，旧版本数据会在读取时重新解析
+LOG_PARSER_VERSION = 1
+
+# 已结束的执行状态，只有这些状态的执行才持久化预解析结构
+FINISHED_EXECUTION_STATUSES = ['Passed', 'Failed', 'Completed', 'Error', 'Cancelled']
+
+CONSOLE_OUTPUT_MARKER = f"\n\n{'='*20} Console Output {'='*20}\n"
+ERROR_SECTION_PATTERN = re.compile(r'(={10,}\s+(FAILURES|ERRORS)\s+={10,}[\s\S]*)')
+INFO_LOG_LINE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}\s+-\s+.*?\s+-\s+INFO\s+-')
+TEST_ANALYSIS_PATTERN = re.compile(r'测试文件分析结果:\s*(\{.*?\})')
+SCREENSHOT_SAVED_MARKER = 'Screenshot saved at'
+
+# 运行中执行的增量解析状态缓存（按执行ID，超出容量时淘汰最久未使用的）
+INCREMENTAL_PARSE_CACHE_SIZE = 32
+_incremental_parse_states: 'OrderedDict[int, dict]' = OrderedDict()
+
+# 已结束执行的解析结构缓存，分页读取步骤日志时避免每页都解压整个结构
+STRUCTURE_CACHE_SIZE = 16
+_finished_structures: 'OrderedDict[tuple, dict]' = OrderedDict()
+
+# 日志分段：初始化阶段、测试步骤、结束阶段
+LOG_SECTIONS = ['init', 'step', 'end']
+# 步骤内出现这些关键字时视为失败
+STEP_FAILED_PATTERN = re.compile(r'\s(?:ERROR|CRITICAL)\s|Traceback|AssertionError|失败|异常|超时')
+
+
+class ExecutionLogService:
+    """
+    执行日志服务
+    负责读取只追加的 automation_execution_log_lines，并为旧接口按需拼装 detailed_log
+    """
+
+    @staticmethod
+    async def fetch_lines(
+        db: AsyncSession,
+        execution_id: int,
+        after_seq: int = 0,
+        limit: int = 500,
+        method_name: Optional[str] = None,
+        step_number: Optional[int] = None
+    ) -> List[AutomationExecutionLogLine]:
+        """
+        按序号分页读取日志行
+        :param after_seq: 游标，只返回序号大于该值的行
+        :param limit: 最多返回行数
+        :param method_name: 按测试方法过滤
+        :param step_number: 按测试步骤过滤
+        """
+        stmt = select(AutomationExecutionLogLine).where(
+            AutomationExecutionLogLine.execution_id == execution_id,
+            AutomationExecutionLogLine.seq > after_seq
+        )
+        if method_name:
+            stmt = stmt.where(AutomationExecutionLogLine.method_name == method_name)
+        if step_number is not None:
+            stmt = stmt.where(AutomationExecutionLogLine.step_number == step_number)
+        stmt = stmt.order_by(AutomationExecutionLogLine.seq).limit(limit)
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    @staticmethod
+    def _lines_content_stmt(execution_ids: List[int]):
+        """构建按执行ID批量读取日志行内容的查询"""
+        return select(
+            AutomationExecutionLogLine.execution_id,
+            AutomationExecutionLogLine.content
+        ).where(
+            AutomationExecutionLogLine.execution_id.in_(execution_ids)
+        ).order_by(AutomationExecutionLogLine.execution_id, AutomationExecutionLogLine.seq)
+
+    @staticmethod
+    def _method_lines_stmt(execution_id: int):
+        """构建按方法读取日志行内容的查询"""
+        return select(
+            AutomationExecutionLogLine.method_name,
+            AutomationExecutionLogLine.content
+        ).where(
+            AutomationExecutionLogLine.execution_id == execution_id,
+            AutomationExecutionLogLine.method_name.is_not(None)
+        ).order_by(AutomationExecutionLogLine.seq)
+
+    @staticmethod
+    def _join_lines(rows) -> Dict:
+        """将 (key, content) 行按 key 聚合为日志文本"""
+        grouped: Dict = {}
+        for key, content in rows:
+            grouped.setdefault(key, []).append((content or '') + '\n')
+        return {key: ''.join(lines) for key, lines in grouped.items()}
+
+    @staticmethod
+    async def materialize_detailed_logs(db: AsyncSession, executions: List[AutomationExecution]) -> Dict[int, str]:
+        """
+        为旧接口批量拼装完整日志文本
+        旧数据只有 detailed_log；新数据的 detailed_log 仅保留创建时的首行，其余在日志行表中
+        :return: {execution_id: 日志文本}
+        """
+        logs = {exe.id: exe.detailed_log or '' for exe in executions}
+        if not logs:
+            return logs
+
+        result = await db.execute(ExecutionLogService._lines_content_stmt(list(logs.keys())))
+        for execution_id, text in ExecutionLogService._join_lines(result.all()).items():
+            logs[execution_id] += text
+        return logs
+
+    @staticmethod
+    async def materialize_raw_logs(db: AsyncSession, execution_ids: List[int]) -> Dict[int, str]:
+        """
+        按执行ID批量拼装完整日志文本，供延迟加载了 detailed_log 的查询使用
+        只读取日志相关列，detailed_log 为空时回退 log_message
+        :return: {execution_id: 日志文本}
+        """
+        if not execution_ids:
+            return {}
+        stmt = select(
+            AutomationExecution.id,
+            AutomationExecution.detailed_log,
+            AutomationExecution.log_message
+        ).where(AutomationExecution.id.in_(execution_ids))
+        rows = (await db.execute(stmt)).all()
+        messages = {row.id: row.log_message or '' for row in rows}
+        logs = {row.id: row.detailed_log or '' for row in rows}
+
+        result = await db.execute(ExecutionLogService._lines_content_stmt(list(logs.keys())))
+        for execution_id, text in ExecutionLogService._join_lines(result.all()).items():
+            logs[execution_id] += text
+        return {execution_id: text or messages[execution_id] for execution_id, text in logs.items()}
+
+    @staticmethod
+    async def materialize_detailed_log(db: AsyncSession, execution: AutomationExecution) -> str:
+        """拼装单个执行的完整日志文本"""
+        logs = await ExecutionLogService.materialize_detailed_logs(db, [execution])
+        return logs[execution.id]
+
+    @staticmethod
+    async def get_method_logs(db: AsyncSession, execution_id: int) -> Dict[str, str]:
+        """
+        获取方法级日志 {方法名: 日志文本}
+        优先从日志行表按方法聚合，旧数据回退到 automation_execut_method_logs
+        """
+        result = await db.execute(ExecutionLogService._method_lines_stmt(execution_id))
+        method_logs = ExecutionLogService._join_lines(result.all())
+        if method_logs:
+            return method_logs
+
+        stmt = select(AutomationExecutMethodLog).where(AutomationExecutMethodLog.execution_id == execution_id)
+        result = await db.execute(stmt)
+        return {record.method_name: record.log_content for record in result.scalars().all()}
+
+    @staticmethod
+    def materialize_detailed_log_sync(db: Session, execution: AutomationExecution) -> str:
+        """拼装单个执行的完整日志文本（同步会话，供 Celery 任务使用）"""
+        rows = db.execute(ExecutionLogService._lines_content_stmt([execution.id])).all()
+        return (execution.detailed_log or '') + ExecutionLogService._join_lines(rows).get(execution.id, '')
+
+    @staticmethod
+    def get_method_logs_sync(db: Session, execution_id: int) -> Dict[str, str]:
+        """获取方法级日志（同步会话，供 Celery 任务使用）"""
+        method_logs = ExecutionLogService._join_lines(db.execute(ExecutionLogService._method_lines_stmt(execution_id)).all())
+        if method_logs:
+            return method_logs
+        records = db.execute(
+            select(AutomationExecutMethodLog).where(AutomationExecutMethodLog.execution_id == execution_id)
+        ).scalars().all()
+        return {record.method_name: record.log_content for record in records}
+
+    @staticmethod
+    def _extract_error_log(detailed_log_content: str) -> Optional[dict]:
+        """
+        从控制台输出中提取 pytest 的 FAILURES/ERRORS 段落，过滤掉普通 INFO 日志行
+        """
+        if not detailed_log_content or CONSOLE_OUTPUT_MARKER not in detailed_log_content:
+            return None
+        parts = detailed_log_content.split(CONSOLE_OUTPUT_MARKER)
+        if len(parts) <= 1:
+            return None
+        console_output = parts[1]
+        if "FAILURES" not in console_output and "ERRORS" not in console_output:
+            return None
+
+        match = ERROR_SECTION_PATTERN.search(console_output)
+        error_content = match.group(1) if match else console_output
+        filtered_lines = [line for line in error_content.split('\n') if not INFO_LOG_LINE_PATTERN.match(line.strip())]
+        return {
+            'name': '错误日志',
+            'logs': UitilTools.parse_automation_log('\n'.join(filtered_lines), is_error_log=True)
+        }
+
+    @staticmethod
+    def _count_analysis_methods(analysis_text: Optional[str], parsed_log: dict) -> int:
+        """
+        旧数据没有方法级日志时，从"测试文件分析结果"中统计测试方法数
+        :param analysis_text: 日志中第一个分析结果字典文本
+        """
+        if not analysis_text:
+            return 0
+        try:
+            analysis_result = ast.literal_eval(analysis_text)
+            if isinstance(analysis_result, dict) and 'test_methods' in analysis_result:
+                methods = analysis_result['test_methods']
+                filtered_methods = [m for m in methods if m != 'test_concurrent_independent_browsers']
+                return len(filtered_methods)
+        except Exception as e:
+            log_info(f"Failed to parse legacy test methods: {e}")
+            return len(set(s.get('method') for s in parsed_log.get('testSteps', []) if s.get('method')))
+        return 0
+
+    @staticmethod
+    def _assemble_structure(
+        parsed_log: dict,
+        method_logs_data: List[dict],
+        analysis_text: Optional[str],
+        screenshots_count: int
+    ) -> dict:
+        """组装详情页/报告所需的结构与统计"""
+        # Legacy test methods count
+        if method_logs_data:
+            test_methods_count = len([m for m in method_logs_data if m.get('name') != '错误日志'])
+        else:
+            test_methods_count = ExecutionLogService._count_analysis_methods(analysis_text, parsed_log)
+
+        return {
+            'logs': parsed_log,
+            'method_logs': method_logs_data,
+            'stats': {
+                'test_steps_count': len(parsed_log.get('testSteps', [])),
+                'test_methods_count': test_methods_count,
+                'screenshots_count': screenshots_count,
+                'keyword_data_count': sum(len(step.get('logs', [])) for step in parsed_log.get('testSteps', []))
+            }
+        }
+
+    @staticmethod
+    def build_log_structure(detailed_log_content: str, method_logs: Dict[str, str]) -> dict:
+        """
+        解析执行日志，生成详情页/报告所需的完整结构
+        :return: {'logs': 步骤解析结果, 'method_logs': 方法级解析结果(含错误日志), 'stats': 统计}
+        """
+        parsed_log = UitilTools.parse_automation_log(detailed_log_content)
+
+        method_logs_data = []
+        for method_name, log_content in method_logs.items():
+            method_logs_data.append({
+                'name': method_name,
+                'logs': UitilTools.parse_automation_log(log_content)
+            })
+
+        error_log = ExecutionLogService._extract_error_log(detailed_log_content)
+        if error_log:
+            method_logs_data.append(error_log)
+
+        analysis_match = TEST_ANALYSIS_PATTERN.search(detailed_log_content) if detailed_log_content else None
+        return ExecutionLogService._assemble_structure(
+            parsed_log,
+            method_logs_data,
+            analysis_match.group(1) if analysis_match else None,
+            detailed_log_content.count(SCREENSHOT_SAVED_MARKER) if detailed_log_content else 0
+        )
+
+    @staticmethod
+    async def build_log_structure_incremental(db: AsyncSession, execution: AutomationExecution) -> Optional[dict]:
+        """
+        运行中执行的增量解析：缓存解析器状态与已消费的日志行序号，
+        每次只读取并解析游标之后新写入的日志行，轮询成本与已执行时长无关
+        遇到无法增量处理的情况（出现控制台输出段、首行被改写）时返回 None，由调用方全量解析
+        """
+        prefix = execution.detailed_log or ''
+        state = _incremental_parse_states.get(execution.id)
+        if state is None or state['prefix'] != prefix:
+            parser = AutomationLogParser()
+            parser.feed(prefix)
+            state = {
+                'prefix': prefix,
+                'seq': 0,
+                'parser': parser,
+                'method_parsers': {},
+                'screenshots_count': prefix.count(SCREENSHOT_SAVED_MARKER),
+                'analysis_text': None,
+                'tail': prefix[-len(CONSOLE_OUTPUT_MARKER):]
+            }
+            analysis_match = TEST_ANALYSIS_PATTERN.search(prefix)
+            if analysis_match:
+                state['analysis_text'] = analysis_match.group(1)
+            _incremental_parse_states[execution.id] = state
+        _incremental_parse_states.move_to_end(execution.id)
+        while len(_incremental_parse_states) > INCREMENTAL_PARSE_CACHE_SIZE:
+            _incremental_parse_states.popitem(last=False)
+
+        stmt = select(
+            AutomationExecutionLogLine.seq,
+            AutomationExecutionLogLine.method_name,
+            AutomationExecutionLogLine.content
+        ).where(
+            AutomationExecutionLogLine.execution_id == execution.id,
+            AutomationExecutionLogLine.seq > state['seq']
+        ).order_by(AutomationExecutionLogLine.seq)
+        rows = (await db.execute(stmt)).all()
+
+        for seq, method_name, content in rows:
+            if seq <= state['seq']:
+                # 并发请求已消费过该行
+                continue
+            if seq != state['seq'] + 1:
+                # 其他进程预留的序号尚未提交，只消费连续部分，下次从缺口处继续
+                break
+            text = (content or '') + '\n'
+            state['parser'].feed(text)
+            if method_name:
+                method_parser = state['method_parsers'].get(method_name)
+                if method_parser is None:
+                    method_parser = state['method_parsers'][method_name] = AutomationLogParser()
+                method_parser.feed(text)
+            state['screenshots_count'] += text.count(SCREENSHOT_SAVED_MARKER)
+            if state['analysis_text'] is None and '测试文件分析结果' in text:
+                analysis_match = TEST_ANALYSIS_PATTERN.search(text)
+                if analysis_match:
+                    state['analysis_text'] = analysis_match.group(1)
+            state['tail'] = (state['tail'] + text)[-len(CONSOLE_OUTPUT_MARKER) * 2:]
+            state['seq'] = seq
+
+        if CONSOLE_OUTPUT_MARKER in state['tail'] or state['seq'] == 0:
+            # 控制台输出段需要整体提取错误日志，交给全量解析
+            _incremental_parse_states.pop(execution.id, None)
+            return None
+
+        method_logs_data = [
+            {'name': method_name, 'logs': method_parser.result()}
+            for method_name, method_parser in state['method_parsers'].items()
+        ]
+        return ExecutionLogService._assemble_structure(
+            state['parser'].result(),
+            method_logs_data,
+            state['analysis_text'],
+            state['screenshots_count']
+        )
+
+    @staticmethod
+    def dump_log_structure(execution: AutomationExecution, structure: dict):
+        """
+        将解析结构以压缩 JSON 写入执行记录，同时记录解析器版本与解析时的日志行序号
+        """
+        payload = {'seq': execution.log_line_seq or 0, 'data': structure}
+        execution.parsed_log = zlib.compress(
+            json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        )
+        execution.parsed_log_version = LOG_PARSER_VERSION
+
+    @staticmethod
+    def load_log_structure(execution: AutomationExecution, parsed_log: Optional[bytes]) -> Optional[dict]:
+        """
+        读取已持久化的解析结构
+        parsed_log 为延迟加载列，由调用方单独读取后传入
+        版本不一致、解析后又有新日志写入或数据损坏时返回 None，由调用方回退到实时解析
+        """
+        if not parsed_log or execution.parsed_log_version != LOG_PARSER_VERSION:
+            return None
+        try:
+            payload = json.loads(zlib.decompress(parsed_log).decode('utf-8'))
+        except Exception as e:
+            log_info(f"Failed to load parsed log of execution {execution.id}: {e}")
+            return None
+        if payload.get('seq') != (execution.log_line_seq or 0):
+            return None
+        return payload.get('data')
+
+    @staticmethod
+    async def fetch_parsed_logs(db: AsyncSession, executions: List[AutomationExecution]) -> Dict[int, bytes]:
+        """
+        批量读取当前解析器版本的持久化解析结构，供延迟加载了 parsed_log 的查询使用
+        :return: {execution_id: 压缩的解析结构}
+        """
+        execution_ids = [execution.id for execution in executions if execution.parsed_log_version == LOG_PARSER_VERSION]
+        if not execution_ids:
+            return {}
+        stmt = select(AutomationExecution.id, AutomationExecution.parsed_log).where(
+            AutomationExecution.id.in_(execution_ids),
+            AutomationExecution.parsed_log.isnot(None)
+        )
+        return {row.id: row.parsed_log for row in (await db.execute(stmt)).all()}
+
+    @staticmethod
+    async def get_log_structure(db: AsyncSession, execution: AutomationExecution) -> dict:
+        """
+        获取执行的解析结构：优先读取持久化结果，运行中的执行增量续解析，
+        旧数据回退实时解析，已结束的执行解析后顺带回写，保证只解析一次
+        """
+        cache_key = (execution.id, execution.log_line_seq or 0, execution.parsed_log_version)
+        structure = _finished_structures.get(cache_key)
+        if structure is not None:
+            _finished_structures.move_to_end(cache_key)
+            return structure
+
+        parsed_log = None
+        if execution.parsed_log_version == LOG_PARSER_VERSION:
+            # 只在这里加载延迟列 parsed_log，版本不一致时无需读取
+            await db.refresh(execution, attribute_names=['parsed_log'])
+            parsed_log = execution.parsed_log
+        structure = ExecutionLogService.load_log_structure(execution, parsed_log)
+        if structure is not None:
+            ExecutionLogService._cache_structure(cache_key, structure)
+            return structure
+
+        if execution.status in FINISHED_EXECUTION_STATUSES:
+            _incremental_parse_states.pop(execution.id, None)
+        elif execution.log_line_seq:
+            structure = await ExecutionLogService.build_log_structure_incremental(db, execution)
+            if structure is not None:
+                return structure
+
+        detailed_log_content = await ExecutionLogService.materialize_detailed_log(db, execution)
+        method_logs = await ExecutionLogService.get_method_logs(db, execution.id)
+        structure = ExecutionLogService.build_log_structure(detailed_log_content, method_logs)
+
+        if execution.status in FINISHED_EXECUTION_STATUSES:
+            try:
+                ExecutionLogService.dump_log_structure(execution, structure)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                log_info(f"Failed to persist parsed log of execution {execution.id}: {e}")
+        return structure
+
+    @staticmethod
+    def persist_log_structure_sync(db: Session, execution_id: int):
+        """
+        执行结束时解析日志并持久化（同步会话，供 Celery 任务在执行完成后调用）
+        调用前需确保排队中的数据库日志已全部写入
+        """
+        execution = db.get(AutomationExecution, execution_id)
+        if not execution:
+            return
+        # 读取其他进程写入后的最新日志行序号
+        db.refresh(execution)
+        detailed_log_content = ExecutionLogService.materialize_detailed_log_sync(db, execution)
+        method_logs = ExecutionLogService.get_method_logs_sync(db, execution_id)
+        structure = ExecutionLogService.build_log_structure(detailed_log_content, method_logs)
+        ExecutionLogService.dump_log_structure(execution, structure)
+        db.commit()
+
+    @staticmethod
+    def _cache_structure(cache_key: tuple, structure: dict):
+        """缓存已持久化的解析结构（LRU）"""
+        _finished_structures[cache_key] = structure
+        while len(_finished_structures) > STRUCTURE_CACHE_SIZE:
+            _finished_structures.popitem(last=False)
+
+    @staticmethod
+    def _logs_skeleton(parsed_log: Optional[dict]) -> dict:
+        """
+        将一份解析结果（全部日志/方法日志）压缩为骨架：保留名称、行数、状态与截图数，不含日志内容
+        """
+        parsed_log = parsed_log or {}
+        screenshot_lines = {shot.get('line') for shot in parsed_log.get('screenshots', [])}
+        steps = []
+        for step in parsed_log.get('testSteps', []):
+            logs = step.get('logs', [])
+            failed = any(STEP_FAILED_PATTERN.search(line) for line in logs)
+            steps.append({
+                'stepNumber': step.get('stepNumber'),
+                'stepName': step.get('stepName'),
+                'status': 'failed' if failed else 'passed',
+                'logsCount': len(logs),
+                'screenshotsCount': sum(1 for line in logs if line in screenshot_lines),
+                'methods': {name: len(lines) for name, lines in step.get('methods', {}).items()}
+            })
+        return {
+            'testStepsCount': parsed_log.get('testStepsCount', len(steps)),
+            'testMethodsCount': parsed_log.get('testMethodsCount', 0),
+            'screenshotsCount': parsed_log.get('screenshotsCount', 0),
+            'initLogsCount': len(parsed_log.get('initLogs', [])),
+            'endLogsCount': len(parsed_log.get('endLogs', [])),
+            'testSteps': steps
+        }
+
+    @staticmethod
+    def build_log_skeleton(structure: dict) -> dict:
+        """
+        生成执行详情的日志骨架：全部日志与各方法日志只返回步骤名称、行数、状态与截图数，
+        日志内容由分页接口按步骤/方法按需读取
+        """
+        return {
+            'logs': ExecutionLogService._logs_skeleton(structure.get('logs')),
+            'method_logs': [
+                {'name': method.get('name'), 'logs': ExecutionLogService._logs_skeleton(method.get('logs'))}
+                for method in structure.get('method_logs', [])
+            ],
+            'stats': structure.get('stats', {})
+        }
+
+    @staticmethod
+    def get_section_lines(
+        structure: dict,
+        view: str = 'all',
+        section: str = 'step',
+        step_number: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 200
+    ) -> Optional[dict]:
+        """
+        分页读取某个视图（全部日志或某个方法）中某一段的日志行
+        :param view: all 表示全部日志，否则为方法名（含"错误日志"）
+        :param section: init/step/end
+        :param step_number: section 为 step 时的步骤号
+        :return: {'list', 'total', 'offset', 'has_more'}，视图或步骤不存在时返回 None
+        """
+        if view == 'all':
+            parsed_log = structure.get('logs')
+        else:
+            parsed_log = next((m.get('logs') for m in structure.get('method_logs', []) if m.get('name') == view), None)
+        if parsed_log is None:
+            return None
+
+        if section == 'init':
+            lines = parsed_log.get('initLogs', [])
+        elif section == 'end':
+            lines = parsed_log.get('endLogs', [])
+        else:
+            step = next((s for s in parsed_log.get('testSteps', []) if s.get('stepNumber') == step_number), None)
+            if step is None:
+                return None
+            lines = step.get('logs', [])
+
+        page = lines[offset:offset + limit]
+        return {
+            'list': page,
+            'total': len(lines),
+            'offset': offset,
+            'has_more': offset + len(page) < len(lines)
+        }
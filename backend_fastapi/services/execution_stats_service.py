@@ -0,0 +1,193 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, delete, func
+from backend_fastapi.models.automation_models import AutomationExecution, AutomationExecutionDailyStat, AutomationProject, Project
+from backend_fastapi.utils.LogManeger import log_info
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 全量重建时每条语句覆盖的天数，避免一次聚合整张执行表长时间锁表
+REBUILD_CHUNK_DAYS = 31
+
+# 定时校准覆盖的最近天数（兜底执行结束时未刷新成功的汇总）
+RECONCILE_RECENT_DAYS = 2
+
+_SUMMARY_COLUMNS = [
+    AutomationExecutionDailyStat.stat_date,
+    AutomationExecutionDailyStat.automation_project_id,
+    AutomationExecutionDailyStat.product_package_name,
+    AutomationExecutionDailyStat.status,
+    AutomationExecutionDailyStat.execution_count,
+    AutomationExecutionDailyStat.updated_at
+]
+
+
+class ExecutionStatsService:
+    """
+    执行日汇总服务：维护 automation_execution_daily_stats，并提供基于汇总表的统计查询
+    汇总按执行结束日期统计，未结束（end_time 为空）的执行不计入
+    """
+
+    @staticmethod
+    def _day_range(start_day: date, end_day: date) -> Tuple[datetime, datetime]:
+        """[start_day, end_day] 对应的结束时间区间 [起, 止)"""
+        return datetime.combine(start_day, datetime.min.time()), datetime.combine(end_day + timedelta(days=1), datetime.min.time())
+
+    @staticmethod
+    def _summary_select(start_day: date, end_day: date, project_id: Optional[int] = None):
+        """从执行表聚合指定日期范围（可限定单个自动化项目）的汇总行"""
+        range_start, range_end = ExecutionStatsService._day_range(start_day, end_day)
+        end_day_expr = func.date(AutomationExecution.end_time)
+        package_expr = func.coalesce(Project.product_package_name, '')
+        stmt = select(
+            end_day_expr,
+            AutomationExecution.project_id,
+            package_expr,
+            AutomationExecution.status,
+            func.count(AutomationExecution.id),
+            func.now()
+        ).select_from(AutomationExecution).outerjoin(
+            AutomationProject, AutomationExecution.project_id == AutomationProject.id
+        ).outerjoin(
+            Project, AutomationProject.project_id == Project.id
+        ).where(
+            AutomationExecution.end_time >= range_start,
+            AutomationExecution.end_time < range_end
+        )
+        if project_id is not None:
+            stmt = stmt.where(AutomationExecution.project_id == project_id)
+        else:
+            stmt = stmt.where(AutomationExecution.project_id.isnot(None))
+        return stmt.group_by(end_day_expr, AutomationExecution.project_id, package_expr, AutomationExecution.status)
+
+    @staticmethod
+    def _refresh_stmts(start_day: date, end_day: date, project_id: Optional[int] = None) -> list:
+        """删除并重新聚合指定范围的汇总行（幂等，可重复执行）"""
+        delete_stmt = delete(AutomationExecutionDailyStat).where(
+            AutomationExecutionDailyStat.stat_date >= start_day,
+            AutomationExecutionDailyStat.stat_date <= end_day
+        )
+        if project_id is not None:
+            delete_stmt = delete_stmt.where(AutomationExecutionDailyStat.automation_project_id == project_id)
+        insert_stmt = insert(AutomationExecutionDailyStat).from_select(
+            _SUMMARY_COLUMNS,
+            ExecutionStatsService._summary_select(start_day, end_day, project_id)
+        )
+        return [delete_stmt, insert_stmt]
+
+    @staticmethod
+    def refresh_execution_sync(db: Session, execution_id: int):
+        """
+        执行结束后刷新其所在 (结束日期, 自动化项目) 的汇总（同步会话，供 Celery 任务使用）
+        按执行表重新聚合而不是累加计数，重复调用或状态被修正后结果依然正确
+        """
+        execution = db.get(AutomationExecution, execution_id)
+        if not execution or not execution.end_time or not execution.project_id:
+            return
+        day = execution.end_time.date()
+        for stmt in ExecutionStatsService._refresh_stmts(day, day, execution.project_id):
+            db.execute(stmt)
+        db.commit()
+
+    @staticmethod
+    async def refresh_execution(db: AsyncSession, execution: AutomationExecution):
+        """执行结束（取消、状态同步）后刷新其所在 (结束日期, 自动化项目) 的汇总"""
+        if not execution.end_time or not execution.project_id:
+            return
+        day = execution.end_time.date()
+        for stmt in ExecutionStatsService._refresh_stmts(day, day, execution.project_id):
+            await db.execute(stmt)
+        await db.commit()
+
+    @staticmethod
+    def rebuild_sync(db: Session, start_day: Optional[date] = None, end_day: Optional[date] = None) -> int:
+        """
+        按日期分段重建汇总表（回填历史数据、校准汇总）
+        :param start_day: 起始日期，为空时从最早的执行开始
+        :param end_day: 结束日期，为空时到今天
+        :return: 重建的天数
+        """
+        if start_day is None:
+            first_end_time = db.execute(select(func.min(AutomationExecution.end_time))).scalar()
+            if not first_end_time:
+                return 0
+            start_day = first_end_time.date()
+        end_day = end_day or date.today()
+
+        chunk_start = start_day
+        while chunk_start <= end_day:
+            chunk_end = min(chunk_start + timedelta(days=REBUILD_CHUNK_DAYS - 1), end_day)
+            for stmt in ExecutionStatsService._refresh_stmts(chunk_start, chunk_end):
+                db.execute(stmt)
+            db.commit()
+            log_info(f"Rebuilt execution daily stats {chunk_start} ~ {chunk_end}")
+            chunk_start = chunk_end + timedelta(days=1)
+        return (end_day - start_day).days + 1
+
+    @staticmethod
+    async def daily_status_counts(
+        db: AsyncSession,
+        start_day: date,
+        end_day: date,
+        project_ids: Optional[Iterable[int]] = None
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        读取日期范围内每天各状态的执行数
+        :param project_ids: 限定的自动化项目ID，为空时统计全部
+        :return: {'YYYY-MM-DD': {status: 执行数}}
+        """
+        stmt = select(
+            AutomationExecutionDailyStat.stat_date,
+            AutomationExecutionDailyStat.status,
+            func.sum(AutomationExecutionDailyStat.execution_count).label('cnt')
+        ).where(
+            AutomationExecutionDailyStat.stat_date >= start_day,
+            AutomationExecutionDailyStat.stat_date <= end_day
+        )
+        if project_ids is not None:
+            stmt = stmt.where(AutomationExecutionDailyStat.automation_project_id.in_(list(project_ids)))
+        stmt = stmt.group_by(AutomationExecutionDailyStat.stat_date, AutomationExecutionDailyStat.status)
+
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in (await db.execute(stmt)).all():
+            counts.setdefault(row.stat_date.strftime('%Y-%m-%d'), {})[row.status] = int(row.cnt or 0)
+        return counts
+
+    @staticmethod
+    async def status_totals(db: AsyncSession, project_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+        """
+        读取全部历史各状态的执行数
+        :return: {status: 执行数}
+        """
+        stmt = select(
+            AutomationExecutionDailyStat.status,
+            func.sum(AutomationExecutionDailyStat.execution_count).label('cnt')
+        )
+        if project_ids is not None:
+            stmt = stmt.where(AutomationExecutionDailyStat.automation_project_id.in_(list(project_ids)))
+        stmt = stmt.group_by(AutomationExecutionDailyStat.status)
+        return {row.status: int(row.cnt or 0) for row in (await db.execute(stmt)).all()}
+
+    @staticmethod
+    def success_trend(
+        start_day: date,
+        end_day: date,
+        counts: Dict[str, Dict[str, int]],
+        is_success: Callable[[str], bool]
+    ) -> Tuple[List[str], List[float]]:
+        """
+        将每日状态计数换算为连续日期的成功率（%，保留两位小数），无执行的日期为 0
+        :return: (日期列表, 成功率列表)
+        """
+        dates = []
+        rates = []
+        day = start_day
+        while day <= end_day:
+            day_str = day.strftime('%Y-%m-%d')
+            day_counts = counts.get(day_str, {})
+            total = sum(day_counts.values())
+            success = sum(cnt for status, cnt in day_counts.items() if is_success(status))
+            dates.append(day_str)
+            rates.append(round(success / total * 100, 2) if total > 0 else 0)
+            day += timedelta(days=1)
+        return dates, rates
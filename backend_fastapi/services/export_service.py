@@ -0,0 +1,123 @@
+from fastapi.responses import StreamingResponse
+from backend_fastapi.db.session import AsyncSessionLocal
+from backend_fastapi.utils.LogManeger import log_info
+from datetime import date, datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+import asyncio
+import csv
+import io
+import os
+import tempfile
+
+# 服务端游标每批读取的行数，也是 CSV 每次输出的行数
+EXPORT_BATCH_SIZE = 1000
+
+# XLSX 写完后按块读出返回的大小
+EXPORT_FILE_CHUNK_SIZE = 64 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+# 导出列定义：(表头, 查询列, 值转换函数或 None)
+ExportColumn = Tuple[str, Any, Optional[Callable[[Any], Any]]]
+
+
+class ExportService:
+    """
+    列表导出：使用独立会话通过服务端游标 (stream + yield_per) 分批读取，逐批写出，内存占用与数据量无关
+    CSV 边读边返回；XLSX 使用 openpyxl 只写模式写入临时文件，写完后分块返回
+    """
+
+    @staticmethod
+    def _format_value(value):
+        if isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        if isinstance(value, date):
+            return value.strftime('%Y-%m-%d')
+        return '' if value is None else value
+
+    @staticmethod
+    def _to_rows(rows, columns: Sequence[ExportColumn]) -> List[list]:
+        return [
+            [ExportService._format_value(convert(value) if convert else value) for value, (_, _, convert) in zip(row, columns)]
+            for row in rows
+        ]
+
+    @staticmethod
+    async def _iter_batches(stmt, columns: Sequence[ExportColumn]):
+        """按批读取导出数据（已转换为单元格值）"""
+        stmt = stmt.with_only_columns(*[column for _, column, _ in columns]).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        # 请求依赖中的会话在响应开始前就已关闭，流式读取需使用独立会话
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(stmt)
+            async for partition in result.partitions():
+                yield ExportService._to_rows(partition, columns)
+
+    @staticmethod
+    async def _csv_chunks(stmt, columns: Sequence[ExportColumn]):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([header for header, _, _ in columns])
+        async for rows in ExportService._iter_batches(stmt, columns):
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    async def _xlsx_chunks(stmt, columns: Sequence[ExportColumn], sheet_title: str):
+        from openpyxl import Workbook
+
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            # 只写模式：行数据直接序列化到磁盘，不在内存中保留单元格对象
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet(title=sheet_title)
+            sheet.append([header for header, _, _ in columns])
+            async for rows in ExportService._iter_batches(stmt, columns):
+                await asyncio.to_thread(lambda batch=rows: [sheet.append(row) for row in batch])
+            await asyncio.to_thread(workbook.save, path)
+
+            with open(path, 'rb') as f:
+                while True:
+                    chunk = await asyncio.to_thread(f.read, EXPORT_FILE_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            try:
+                os.remove(path)
+            except OSError as e:
+                log_info(f"Failed to remove export temp file {path}: {e}")
+
+    @staticmethod
+    def response(
+        stmt,
+        columns: Sequence[ExportColumn],
+        filename: str,
+        export_format: Optional[str] = 'csv',
+        sheet_title: str = 'Sheet1'
+    ) -> StreamingResponse:
+        """
+        构建流式导出响应
+        :param stmt: 带筛选条件/排序的查询，导出时只替换其查询列
+        :param filename: 不含扩展名的文件名
+        :param export_format: csv 或 xlsx
+        """
+        export_format = (export_format or 'csv').lower()
+        if export_format not in EXPORT_MEDIA_TYPES:
+            export_format = 'csv'
+        if export_format == 'xlsx':
+            chunks = ExportService._xlsx_chunks(stmt, columns, sheet_title)
+        else:
+            chunks = ExportService._csv_chunks(stmt, columns)
+        return StreamingResponse(
+            chunks,
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers={"Content-Disposition": f"attachment; filename={filename}.{export_format}"}
+        )
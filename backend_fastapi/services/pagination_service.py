@@ -0,0 +1,138 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, and_, or_, asc, desc, false
+from backend_fastapi.core.redis_client import redis_client as redis
+from backend_fastapi.utils.LogManeger import log_info
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import hashlib
+import json
+
+# 游标分页总数缓存：相同筛选条件在有效期内复用总数，翻页时总数最多滞后该时长
+CURSOR_TOTAL_CACHE_PREFIX = 'pm:list_total:'
+CURSOR_TOTAL_CACHE_TTL = 60
+
+# 排序定义：[(列, 是否倒序)]，最后一列须为主键，保证顺序唯一
+OrderColumn = Tuple[Any, bool]
+
+
+class PaginationService:
+    """
+    列表游标（keyset）分页：游标记录上一页最后一行的 (排序键, 主键)，下一页按 WHERE (排序键, 主键) 在其之后 + LIMIT 读取，
+    任意深度都只扫描 page_size 行；总数按筛选条件缓存，不在每次翻页时重新 count
+    排序键可为空，比较规则与 MySQL 一致：升序时 NULL 在最前，倒序时 NULL 在最后
+    """
+
+    @staticmethod
+    def _dump_value(value):
+        if isinstance(value, datetime):
+            return {'dt': value.strftime('%Y-%m-%d %H:%M:%S.%f')}
+        return value
+
+    @staticmethod
+    def _load_value(value):
+        if isinstance(value, dict):
+            return datetime.strptime(value['dt'], '%Y-%m-%d %H:%M:%S.%f')
+        return value
+
+    @staticmethod
+    def encode_cursor(values: Sequence[Any]) -> str:
+        """将排序列的值编码为不透明游标"""
+        raw = json.dumps([PaginationService._dump_value(value) for value in values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str, size: int) -> List[Any]:
+        """解析游标，格式不正确或与排序列数不符时抛出 ValueError"""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            if not isinstance(values, list) or len(values) != size:
+                raise ValueError
+            return [PaginationService._load_value(value) for value in values]
+        except Exception:
+            raise ValueError('无效的分页游标')
+
+    @staticmethod
+    def _nullable(column) -> bool:
+        return getattr(getattr(column, 'expression', column), 'nullable', True)
+
+    @staticmethod
+    def _after(column, value, descending: bool):
+        """列值排在 value 之后的条件"""
+        if value is None:
+            # 升序时 NULL 之后是全部非空值；倒序时 NULL 已在最后
+            return false() if descending else column.isnot(None)
+        if not descending:
+            return column > value
+        if PaginationService._nullable(column):
+            return or_(column < value, column.is_(None))
+        return column < value
+
+    @staticmethod
+    def _equal(column, value):
+        return column.is_(None) if value is None else column == value
+
+    @staticmethod
+    def after_condition(order: Sequence[OrderColumn], values: Sequence[Any]):
+        """(c1, c2, ...) 排在 values 之后：c1 之后，或 c1 相等且 c2 之后，..."""
+        conditions = []
+        for i, (column, descending) in enumerate(order):
+            equals = [PaginationService._equal(c, v) for (c, _), v in zip(order[:i], values[:i])]
+            conditions.append(and_(*equals, PaginationService._after(column, values[i], descending)))
+        return or_(*conditions)
+
+    @staticmethod
+    async def fetch(
+        db: AsyncSession,
+        stmt,
+        order: Sequence[OrderColumn],
+        cursor: Optional[str] = None,
+        page_size: int = 20
+    ) -> Tuple[list, Optional[str]]:
+        """
+        按游标读取一页
+        :param stmt: 带筛选条件的查询（原有排序会被替换），第一个查询实体须包含排序列
+        :param cursor: 上一页返回的游标，为空时读取第一页
+        :return: (当前页行, 下一页游标)，没有下一页时游标为 None
+        """
+        if cursor:
+            values = PaginationService.decode_cursor(cursor, len(order))
+            stmt = stmt.where(PaginationService.after_condition(order, values))
+        stmt = stmt.order_by(None).order_by(
+            *[desc(column) if descending else asc(column) for column, descending in order]
+        ).limit(page_size + 1)
+        rows = (await db.execute(stmt)).all()
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1][0]
+            next_cursor = PaginationService.encode_cursor([getattr(last, column.key) for column, _ in order])
+        return rows, next_cursor
+
+    @staticmethod
+    async def cached_total(db: AsyncSession, stmt, namespace: str) -> int:
+        """
+        查询总数，按 (namespace, 查询语句及参数) 缓存 CURSOR_TOTAL_CACHE_TTL 秒；Redis 不可用时直接 count
+        """
+        stmt = stmt.order_by(None)
+        # 按会话的方言编译：默认的字符串编译器不支持 MATCH ... AGAINST 等方言专有构造
+        compiled = stmt.compile(dialect=db.bind.dialect)
+        digest = hashlib.md5(
+            (str(compiled) + json.dumps(compiled.params, default=str, sort_keys=True)).encode('utf-8')
+        ).hexdigest()
+        cache_key = f"{CURSOR_TOTAL_CACHE_PREFIX}{namespace}:{digest}"
+
+        try:
+            cached = await redis.get(cache_key)
+            if cached is not None:
+                return int(cached)
+        except Exception as e:
+            log_info(f"Failed to read list total from Redis: {e}")
+
+        total = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar() or 0
+        try:
+            await redis.set(cache_key, total, ex=CURSOR_TOTAL_CACHE_TTL)
+        except Exception as e:
+            log_info(f"Failed to write list total to Redis: {e}")
+        return total
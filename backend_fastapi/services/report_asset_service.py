@@ -0,0 +1,234 @@
+from backend_fastapi.core.config import settings
+from backend_fastapi.utils.LogManeger import log_info
+from PIL import Image, features
+from collections import OrderedDict
+from typing import Dict, Optional
+import base64
+import hashlib
+import io
+import os
+import threading
+import zipfile
+
+# 报告图片压缩默认参数
+REPORT_IMAGE_FORMAT = 'webp'
+REPORT_IMAGE_QUALITY = 75
+# 完整图最长边、缩略图尺寸（像素）
+REPORT_IMAGE_MAX_SIZE = 1600
+REPORT_THUMBNAIL_SIZE = (320, 200)
+# WebP 编码速度档位（0-6，越大越慢），2 在体积接近的情况下耗时约为默认档位的一半
+REPORT_WEBP_METHOD = 2
+
+# 图片变体磁盘缓存目录（按内容哈希 + 参数命名，重复生成报告时直接复用）
+REPORT_ASSET_CACHE_DIR = os.path.join(settings.REPORT_CACHE_DIR, 'assets')
+
+# 文件内容哈希缓存：路径 -> (修改时间, 大小, 哈希)，文件未变化时不重复读取
+FILE_DIGEST_CACHE_SIZE = 20000
+_file_digests: 'OrderedDict[str, tuple]' = OrderedDict()
+_file_digests_lock = threading.Lock()
+
+IMAGE_MIME_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+    '.webp': 'image/webp',
+}
+
+
+class ReportAssetService:
+    """
+    报告图片资源服务
+    按内容哈希去重，生成压缩后的完整图与缩略图（WebP/JPEG，质量可调），并缓存到磁盘
+    """
+
+    @staticmethod
+    def resolve_format(image_format: Optional[str]) -> str:
+        """规范化图片格式，当前 Pillow 不支持 WebP 时回退 JPEG"""
+        image_format = (image_format or REPORT_IMAGE_FORMAT).lower()
+        if image_format == 'jpg':
+            image_format = 'jpeg'
+        if image_format not in ('webp', 'jpeg'):
+            image_format = REPORT_IMAGE_FORMAT
+        if image_format == 'webp' and not features.check('webp'):
+            image_format = 'jpeg'
+        return image_format
+
+    @staticmethod
+    def file_digest(file_path: str) -> Optional[str]:
+        """
+        计算文件内容的 SHA-256，按 (修改时间, 大小) 缓存
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        with _file_digests_lock:
+            cached = _file_digests.get(file_path)
+            if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+                _file_digests.move_to_end(file_path)
+                return cached[2]
+
+        sha = hashlib.sha256()
+        try:
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    sha.update(chunk)
+        except OSError as e:
+            log_info(f"Failed to hash report image {file_path}: {e}")
+            return None
+        digest = sha.hexdigest()
+
+        with _file_digests_lock:
+            _file_digests[file_path] = (stat.st_mtime, stat.st_size, digest)
+            while len(_file_digests) > FILE_DIGEST_CACHE_SIZE:
+                _file_digests.popitem(last=False)
+        return digest
+
+    @staticmethod
+    def _encode(image: Image.Image, image_format: str, quality: int) -> bytes:
+        """按指定格式与质量编码图片"""
+        if image_format == 'jpeg' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        elif image.mode not in ('RGB', 'RGBA', 'L'):
+            image = image.convert('RGBA')
+        buffer = io.BytesIO()
+        if image_format == 'webp':
+            image.save(buffer, format='WEBP', quality=quality, method=REPORT_WEBP_METHOD)
+        else:
+            image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+        return buffer.getvalue()
+
+    @staticmethod
+    def build_variants(
+        file_path: str,
+        digest: str,
+        image_format: str = REPORT_IMAGE_FORMAT,
+        quality: int = REPORT_IMAGE_QUALITY,
+        with_thumbnail: bool = True
+    ) -> Optional[Dict[str, bytes]]:
+        """
+        生成图片的压缩变体：full（最长边不超过 REPORT_IMAGE_MAX_SIZE）与 thumb（缩略图）
+        结果以 "哈希_变体_质量.格式" 缓存到磁盘
+        :return: {'full': bytes, 'thumb': bytes}，图片无法解析时返回 None
+        """
+        variants = {'full': REPORT_IMAGE_MAX_SIZE}
+        if with_thumbnail:
+            variants['thumb'] = REPORT_THUMBNAIL_SIZE
+
+        result = {}
+        missing = []
+        for name in variants:
+            cache_file = os.path.join(REPORT_ASSET_CACHE_DIR, f"{digest}_{name}_{quality}.{image_format}")
+            if os.path.exists(cache_file):
+                with open(cache_file, 'rb') as f:
+                    result[name] = f.read()
+            else:
+                missing.append(name)
+        if not missing:
+            return result
+
+        try:
+            with Image.open(file_path) as source:
+                source.load()
+                for name in missing:
+                    size = variants[name]
+                    image = source.copy()
+                    image.thumbnail(size if isinstance(size, tuple) else (size, size))
+                    result[name] = ReportAssetService._encode(image, image_format, quality)
+        except Exception as e:
+            log_info(f"Failed to convert report image {file_path}: {e}")
+            return None
+
+        try:
+            os.makedirs(REPORT_ASSET_CACHE_DIR, exist_ok=True)
+            for name in missing:
+                cache_file = os.path.join(REPORT_ASSET_CACHE_DIR, f"{digest}_{name}_{quality}.{image_format}")
+                tmp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp_file, 'wb') as f:
+                    f.write(result[name])
+                os.replace(tmp_file, cache_file)
+        except OSError as e:
+            log_info(f"Failed to cache report image {file_path}: {e}")
+        return result
+
+    @staticmethod
+    def to_data_uri(data: bytes, image_format: str) -> str:
+        """将图片字节转为 data URI"""
+        return f"data:image/{image_format};base64,{base64.b64encode(data).decode('utf-8')}"
+
+    @staticmethod
+    def original_data_uri(file_path: str) -> Optional[str]:
+        """图片无法转换时回退：原图直接转为 data URI"""
+        try:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        mime_type = IMAGE_MIME_TYPES.get(os.path.splitext(file_path)[1].lower(), 'image/png')
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+class ReportAssetBundler:
+    """
+    单次报告生成的图片打包器
+    inline 模式：压缩后的完整图以 data URI 嵌入 HTML（同内容只嵌入一次）
+    zip 模式：完整图与缩略图写入 ZIP 的 assets 目录，HTML 中只引用相对路径
+    """
+
+    def __init__(self, image_format: str = None, quality: int = REPORT_IMAGE_QUALITY, zip_file=None):
+        self.image_format = ReportAssetService.resolve_format(image_format)
+        self.quality = max(1, min(int(quality or REPORT_IMAGE_QUALITY), 100))
+        self.zip_file = zip_file
+        # 图片 Key -> 内容哈希；已输出的内容哈希
+        self.keys: Dict[str, str] = {}
+        self.digests = set()
+        # 找不到文件的图片 Key，避免重复查找
+        self.missing_keys = set()
+        self.original_bytes = 0
+        self.bundled_bytes = 0
+
+    def add_image(self, key: str, file_path: str):
+        """
+        登记一张图片
+        :return: (Key 对应的内容哈希, 本次新增的资源 {哈希: {'full': 地址, 'thumb': 地址}})
+        """
+        if key in self.keys:
+            return self.keys[key], {}
+        digest = ReportAssetService.file_digest(file_path)
+        if not digest:
+            return None, {}
+        self.keys[key] = digest
+        if digest in self.digests:
+            return digest, {}
+
+        self.digests.add(digest)
+        self.original_bytes += os.path.getsize(file_path)
+        variants = ReportAssetService.build_variants(
+            file_path, digest, self.image_format, self.quality, with_thumbnail=self.zip_file is not None
+        )
+
+        if self.zip_file is None:
+            if variants:
+                data_uri = ReportAssetService.to_data_uri(variants['full'], self.image_format)
+            else:
+                data_uri = ReportAssetService.original_data_uri(file_path)
+            if not data_uri:
+                return digest, {}
+            self.bundled_bytes += len(data_uri)
+            return digest, {digest: {'full': data_uri}}
+
+        if variants:
+            ext = self.image_format
+            asset = {'full': f"assets/full/{digest}.{ext}", 'thumb': f"assets/thumbs/{digest}.{ext}"}
+            # 已压缩的图片不再二次压缩
+            self.zip_file.writestr(asset['full'], variants['full'], compress_type=zipfile.ZIP_STORED)
+            self.zip_file.writestr(asset['thumb'], variants['thumb'], compress_type=zipfile.ZIP_STORED)
+            self.bundled_bytes += len(variants['full']) + len(variants['thumb'])
+        else:
+            ext = os.path.splitext(file_path)[1].lower() or '.png'
+            asset = {'full': f"assets/full/{digest}{ext}"}
+            self.zip_file.write(file_path, asset['full'])
+            self.bundled_bytes += os.path.getsize(file_path)
+        return digest, {digest: asset}
@@ -0,0 +1,155 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from backend_fastapi.core.config import settings
+from backend_fastapi.models.automation_models import Project, AutomationProject, AutomationExecution
+from backend_fastapi.utils.LogManeger import log_info
+from datetime import datetime
+from typing import List, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+# 报告产物与任务状态文件目录
+REPORT_JOB_DIR = os.path.join(settings.REPORT_CACHE_DIR, 'reports')
+# 排队/运行中的任务超过该时长未更新视为已失效（Worker 异常退出），允许重新提交
+REPORT_JOB_STALE_SECONDS = 30 * 60
+# 报告产物保留时长，过期后在新任务完成时清理
+REPORT_ARTIFACT_TTL_SECONDS = 7 * 24 * 3600
+
+REPORT_JOB_STATUSES = ['queued', 'running', 'done', 'failed']
+
+_job_file_lock = threading.Lock()
+
+
+class ReportJobService:
+    """
+    报告后台任务服务
+    任务ID由 (产品包, 日期范围, 导出参数, 数据水位) 计算得出：参数相同且范围内没有新的执行数据时命中同一个任务，
+    直接复用磁盘上已生成的报告产物
+    """
+
+    @staticmethod
+    def normalize_params(product_packages: List[str], start_date: datetime, end_date: datetime,
+                         package: str = 'html', image_format: Optional[str] = None,
+                         image_quality: Optional[int] = None) -> dict:
+        """规范化任务参数（产品包排序去重、日期转字符串），保证相同请求得到相同任务ID"""
+        return {
+            'product_packages': sorted(set(product_packages)),
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'end_date': end_date.strftime('%Y-%m-%d'),
+            'package': 'zip' if package == 'zip' else 'html',
+            'image_format': image_format,
+            'image_quality': image_quality,
+        }
+
+    @staticmethod
+    async def data_watermark(db: AsyncSession, product_packages: List[str], start_date: datetime, end_date: datetime) -> str:
+        """
+        计算范围内执行数据的水位：执行数、已结束数、最大执行ID、最大结束时间、用例最后更新时间
+        有新执行写入或执行状态结束时水位变化，缓存的报告随之失效
+        """
+        stmt = select(
+            func.count(AutomationExecution.id),
+            func.count(AutomationExecution.end_time),
+            func.max(AutomationExecution.id),
+            func.max(AutomationExecution.end_time),
+            func.max(AutomationProject.updated_at)
+        ).select_from(AutomationExecution).join(
+            AutomationProject, AutomationExecution.project_id == AutomationProject.id
+        ).join(
+            Project, AutomationProject.project_id == Project.id
+        ).where(
+            Project.product_package_name.in_(product_packages),
+            AutomationExecution.start_time >= start_date,
+            AutomationExecution.start_time <= end_date
+        )
+        row = (await db.execute(stmt)).one()
+        return '|'.join('' if value is None else str(value) for value in row)
+
+    @staticmethod
+    def job_id(params: dict, watermark: str) -> str:
+        """根据任务参数与数据水位生成任务ID"""
+        raw = json.dumps({'params': params, 'watermark': watermark}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _job_file(job_id: str) -> str:
+        return os.path.join(REPORT_JOB_DIR, f"{job_id}.json")
+
+    @staticmethod
+    def artifact_path(job_id: str, package: str) -> str:
+        """报告产物路径"""
+        return os.path.join(REPORT_JOB_DIR, f"{job_id}.{'zip' if package == 'zip' else 'html'}")
+
+    @staticmethod
+    def read_job(job_id: str) -> Optional[dict]:
+        """读取任务状态，任务不存在时返回 None"""
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(ReportJobService._job_file(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log_info(f"Failed to read report job {job_id}: {e}")
+            return None
+
+    @staticmethod
+    def write_job(job_id: str, **fields) -> dict:
+        """合并更新任务状态（写临时文件后原子替换）"""
+        with _job_file_lock:
+            job = ReportJobService.read_job(job_id) or {'job_id': job_id, 'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+            job.update(fields)
+            job['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            job['updated_ts'] = time.time()
+            os.makedirs(REPORT_JOB_DIR, exist_ok=True)
+            job_file = ReportJobService._job_file(job_id)
+            tmp_file = f"{job_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(job, f, ensure_ascii=False)
+            os.replace(tmp_file, job_file)
+        return job
+
+    @staticmethod
+    def is_reusable(job: Optional[dict]) -> bool:
+        """
+        任务是否可以直接复用：已完成且产物存在，或仍在排队/运行且未失效
+        """
+        if not job:
+            return False
+        if job.get('status') == 'done':
+            return os.path.exists(ReportJobService.artifact_path(job['job_id'], job.get('params', {}).get('package')))
+        if job.get('status') in ('queued', 'running'):
+            return time.time() - job.get('updated_ts', 0) < REPORT_JOB_STALE_SECONDS
+        return False
+
+    @staticmethod
+    def to_view(job: dict) -> dict:
+        """任务状态的对外结构"""
+        return {
+            'job_id': job['job_id'],
+            'status': job.get('status'),
+            'progress': job.get('progress', 0),
+            'message': job.get('message'),
+            'size': job.get('size'),
+            'created_at': job.get('created_at'),
+            'updated_at': job.get('updated_at'),
+            'finished_at': job.get('finished_at'),
+        }
+
+    @staticmethod
+    def cleanup_expired():
+        """清理过期的报告产物与任务状态文件"""
+        if not os.path.isdir(REPORT_JOB_DIR):
+            return
+        deadline = time.time() - REPORT_ARTIFACT_TTL_SECONDS
+        for name in os.listdir(REPORT_JOB_DIR):
+            path = os.path.join(REPORT_JOB_DIR, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+            except OSError as e:
+                log_info(f"Failed to remove expired report file {path}: {e}")
@@ -0,0 +1,189 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import select, update, func, case, union_all, literal, or_, and_
+from backend_fastapi.models.pm_models import PMRequirement, PMSubRequirement, PMTask
+from backend_fastapi.services.dict_cache_service import DictCache
+from backend_fastapi.core.constants import REQUIREMENT_STATUS_PROGRESS_MAP
+from backend_fastapi.utils.LogManeger import log_info
+from typing import Dict, Iterable, List, Optional
+
+# 需求状态进度映射的字典类型
+STATUS_PROGRESS_DICT_TYPE = 'requirement_status_progress'
+
+# 校准任务每批处理的需求数
+RECONCILE_BATCH_SIZE = 500
+
+
+class RequirementProgressService:
+    """
+    维护 pm_requirement.progress：
+    进度 = (子需求进度之和 + 子任务进度之和) / (子需求数 + 子任务数)，子项进度由字典中的状态进度映射换算；
+    无子项时取需求自身状态对应的进度。子需求/任务新建、更新、删除时重算所属需求，定时任务校准偏差
+    """
+
+    @staticmethod
+    async def load_status_map(db: AsyncSession) -> Dict[str, int]:
+        """
+        读取状态进度映射：字典缓存（进程内 -> Redis -> 数据库字典）-> 常量文件
+        """
+        status_map = {}
+        try:
+            items = await DictCache.get(db, STATUS_PROGRESS_DICT_TYPE)
+            # Value is string in DB, convert to int
+            status_map = DictCache.to_map(items, int)
+        except Exception as e:
+            log_info(f"Failed to load status progress map from DB: {e}")
+
+        # 如果数据库也没数据，回退到常量文件
+        return status_map or REQUIREMENT_STATUS_PROGRESS_MAP
+
+    @staticmethod
+    def load_status_map_sync(db: Session) -> Dict[str, int]:
+        """读取状态进度映射（同步会话）"""
+        items = DictCache.get_sync(db, STATUS_PROGRESS_DICT_TYPE)
+        return DictCache.to_map(items, int) or REQUIREMENT_STATUS_PROGRESS_MAP
+
+    @staticmethod
+    def _status_progress(status_column, status_map: Dict[str, int]):
+        """状态 -> 进度 的 CASE 表达式，未配置的状态为 0"""
+        if not status_map:
+            return literal(0)
+        return case(status_map, value=status_column, else_=0)
+
+    @staticmethod
+    def _children_stmt(req_ids: List[int], status_map: Dict[str, int]):
+        """
+        按需求汇总子项：(req_id, 子项数, 子项进度之和)
+        子项为未删除的子需求、直接挂在需求下的任务、挂在其子需求下的任务（同时挂在两处的任务只计一次）
+        """
+        TaskSubReq = aliased(PMSubRequirement)
+        sub_reqs = select(
+            PMSubRequirement.requirement_id.label('req_id'),
+            RequirementProgressService._status_progress(PMSubRequirement.status, status_map).label('progress')
+        ).where(
+            PMSubRequirement.requirement_id.in_(req_ids),
+            PMSubRequirement.del_flag == 0
+        )
+        direct_tasks = select(
+            PMTask.requirement_id.label('req_id'),
+            RequirementProgressService._status_progress(PMTask.status, status_map).label('progress')
+        ).where(
+            PMTask.requirement_id.in_(req_ids),
+            PMTask.del_flag == 0
+        )
+        sub_tasks = select(
+            TaskSubReq.requirement_id.label('req_id'),
+            RequirementProgressService._status_progress(PMTask.status, status_map).label('progress')
+        ).join(
+            TaskSubReq, PMTask.sub_requirement_id == TaskSubReq.sub_req_id
+        ).where(
+            TaskSubReq.requirement_id.in_(req_ids),
+            TaskSubReq.del_flag == 0,
+            PMTask.del_flag == 0,
+            or_(PMTask.requirement_id == None, PMTask.requirement_id != TaskSubReq.requirement_id)
+        )
+        children = union_all(sub_reqs, direct_tasks, sub_tasks).subquery()
+        return select(
+            children.c.req_id,
+            func.count().label('cnt'),
+            func.sum(children.c.progress).label('total')
+        ).group_by(children.c.req_id)
+
+    @staticmethod
+    def _compute(req_rows, child_rows, status_map: Dict[str, int]) -> Dict[int, int]:
+        """
+        :param req_rows: [(req_id, status)]
+        :param child_rows: _children_stmt 的结果
+        :return: {req_id: 进度}
+        """
+        children = {row.req_id: (row.cnt, row.total) for row in child_rows}
+        progress = {}
+        for req_id, status in req_rows:
+            cnt, total = children.get(req_id, (0, 0))
+            if cnt:
+                progress[req_id] = round(int(total or 0) / cnt)
+            else:
+                # 无子项，使用自身状态进度
+                progress[req_id] = status_map.get(status, 0)
+        return progress
+
+    @staticmethod
+    def _update_stmt(progress: Dict[int, int]):
+        """一条语句写入多个需求的进度；显式保留 update_time，重算进度不算作用户更新"""
+        return update(PMRequirement).where(
+            PMRequirement.req_id.in_(list(progress.keys()))
+        ).values(
+            progress=case(progress, value=PMRequirement.req_id),
+            update_time=PMRequirement.update_time
+        ).execution_options(synchronize_session=False)
+
+    @staticmethod
+    async def refresh(db: AsyncSession, req_ids: Iterable[Optional[int]], status_map: Optional[Dict[str, int]] = None):
+        """
+        重算指定需求的进度（不提交，随子项变更一起提交）
+        """
+        req_ids = list({req_id for req_id in req_ids if req_id})
+        if not req_ids:
+            return
+        if status_map is None:
+            status_map = await RequirementProgressService.load_status_map(db)
+
+        await db.flush()
+        req_rows = (await db.execute(
+            select(PMRequirement.req_id, PMRequirement.status).where(PMRequirement.req_id.in_(req_ids))
+        )).all()
+        child_rows = (await db.execute(RequirementProgressService._children_stmt(req_ids, status_map))).all()
+        progress = RequirementProgressService._compute(req_rows, child_rows, status_map)
+        if progress:
+            await db.execute(RequirementProgressService._update_stmt(progress))
+
+    @staticmethod
+    async def refresh_for_children(
+        db: AsyncSession,
+        requirement_ids: Iterable[Optional[int]] = (),
+        sub_requirement_ids: Iterable[Optional[int]] = ()
+    ):
+        """
+        子需求/任务变更后重算其所属需求（直接所属需求 + 子需求所属需求）
+        """
+        req_ids = {req_id for req_id in requirement_ids if req_id}
+        sub_req_ids = [sub_req_id for sub_req_id in sub_requirement_ids if sub_req_id]
+        if sub_req_ids:
+            rows = (await db.execute(
+                select(PMSubRequirement.requirement_id).where(PMSubRequirement.sub_req_id.in_(sub_req_ids))
+            )).scalars().all()
+            req_ids.update(rows)
+        await RequirementProgressService.refresh(db, req_ids)
+
+    @staticmethod
+    def reconcile_sync(db: Session, start_id: Optional[int] = None) -> int:
+        """
+        全量校准需求进度（同步会话），只写入与重算结果不一致的需求
+        :param start_id: 从该需求ID开始，为空时处理全部
+        :return: 修正的需求数
+        """
+        status_map = RequirementProgressService.load_status_map_sync(db)
+        last_id = (start_id or 0) - 1
+        fixed = 0
+        while True:
+            rows = db.execute(
+                select(PMRequirement.req_id, PMRequirement.status, PMRequirement.progress).where(
+                    PMRequirement.req_id > last_id,
+                    PMRequirement.del_flag == 0
+                ).order_by(PMRequirement.req_id).limit(RECONCILE_BATCH_SIZE)
+            ).all()
+            if not rows:
+                return fixed
+
+            req_ids = [row.req_id for row in rows]
+            child_rows = db.execute(RequirementProgressService._children_stmt(req_ids, status_map)).all()
+            progress = RequirementProgressService._compute([(row.req_id, row.status) for row in rows], child_rows, status_map)
+            current = {row.req_id: row.progress for row in rows}
+            drifted = {req_id: value for req_id, value in progress.items() if current.get(req_id) != value}
+            if drifted:
+                db.execute(RequirementProgressService._update_stmt(drifted))
+                db.commit()
+                fixed += len(drifted)
+
+            last_id = req_ids[-1]
+            log_info(f"Reconciled requirement progress up to id {last_id} ({fixed} fixed)")
@@ -0,0 +1,150 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy import select, func, desc, or_, literal, union_all, null
+from backend_fastapi.models.pm_models import PMRequirement, PMSubRequirement, PMTask, PMDefect
+from typing import Dict, Iterable, List, Optional
+import re
+
+# 与 MySQL 的 ngram_token_size 保持一致（默认 2），短于该长度的词无法命中 ngram 全文索引
+NGRAM_TOKEN_SIZE = 2
+
+# 拆分检索词的分隔符：ngram 分词器在标点/空白处断开，不会为跨标点的字符组合建索引，
+# 检索词也在这些位置拆开（如 BUG-10001 -> BUG、10001），各段作为必须命中的短语；同时去掉了 BOOLEAN MODE 的运算符
+QUERY_DELIMITERS = re.compile(r'[^\w]+')
+
+# 可检索的对象：全文索引列（与 create.sql 中 ft_title_code 索引的列顺序一致）及结果中返回的关联字段
+SEARCH_ENTITIES = {
+    'requirement': {
+        'label': '需求',
+        'model': PMRequirement,
+        'pk': PMRequirement.req_id,
+        'columns': (PMRequirement.title, PMRequirement.req_code),
+        'requirement_id': PMRequirement.req_id,
+        'sub_requirement_id': None
+    },
+    'sub_requirement': {
+        'label': '子需求',
+        'model': PMSubRequirement,
+        'pk': PMSubRequirement.sub_req_id,
+        'columns': (PMSubRequirement.title, PMSubRequirement.sub_req_code),
+        'requirement_id': PMSubRequirement.requirement_id,
+        'sub_requirement_id': PMSubRequirement.sub_req_id
+    },
+    'task': {
+        'label': '任务',
+        'model': PMTask,
+        'pk': PMTask.task_id,
+        'columns': (PMTask.title, PMTask.task_code),
+        'requirement_id': PMTask.requirement_id,
+        'sub_requirement_id': PMTask.sub_requirement_id
+    },
+    'defect': {
+        'label': '缺陷',
+        'model': PMDefect,
+        'pk': PMDefect.defect_id,
+        'columns': (PMDefect.title, PMDefect.defect_code),
+        'requirement_id': PMDefect.linked_req_id,
+        'sub_requirement_id': None
+    }
+}
+
+
+class SearchService:
+    """
+    标题/编号检索：基于 MySQL FULLTEXT ngram 索引（CJK 按 ngram 切分），按相关度排序；
+    关键词中有短于 ngram 长度的词（如单个汉字）时无法使用全文索引，回退为 LIKE
+    """
+
+    @staticmethod
+    def boolean_query(term: Optional[str]) -> Optional[str]:
+        """
+        将用户输入转为 BOOLEAN MODE 查询：按空白和标点拆词，每个词作为必须命中的短语（ngram 短语即连续子串）
+        :return: 查询串；无法使用全文索引时返回 None
+        """
+        words = [word for word in QUERY_DELIMITERS.split(term or '') if word]
+        if not words or any(len(word) < NGRAM_TOKEN_SIZE for word in words):
+            return None
+        return ' '.join(f'+"{word}"' for word in words)
+
+    @staticmethod
+    def condition(entity: str, term: str):
+        """title/编号 的检索条件"""
+        columns = SEARCH_ENTITIES[entity]['columns']
+        query = SearchService.boolean_query(term)
+        if query is None:
+            return or_(*[column.like(f"%{term.strip()}%") for column in columns])
+        return match(*columns, against=query).in_boolean_mode()
+
+    @staticmethod
+    def relevance(entity: str, term: str):
+        """相关度表达式（回退 LIKE 时为常量 0）"""
+        query = SearchService.boolean_query(term)
+        if query is None:
+            return literal(0)
+        return match(*SEARCH_ENTITIES[entity]['columns'], against=query).in_boolean_mode()
+
+    @staticmethod
+    def apply(stmt, entity: str, term: Optional[str]):
+        """为列表查询追加检索条件"""
+        if not term or not term.strip():
+            return stmt
+        return stmt.where(SearchService.condition(entity, term))
+
+    @staticmethod
+    async def search(
+        db: AsyncSession,
+        term: str,
+        types: Optional[Iterable[str]] = None,
+        page: int = 1,
+        page_size: int = 20
+    ) -> Dict:
+        """
+        跨对象检索：各对象的命中结果 UNION ALL 后按相关度、更新时间排序分页
+        :param types: 限定的对象类型，为空时检索全部
+        :return: {'items', 'total'}
+        """
+        entities = [entity for entity in (types or SEARCH_ENTITIES.keys()) if entity in SEARCH_ENTITIES]
+        if not term or not term.strip() or not entities:
+            return {'items': [], 'total': 0}
+
+        branches = []
+        counts = []
+        for entity in entities:
+            spec = SEARCH_ENTITIES[entity]
+            model = spec['model']
+            conditions = [model.del_flag == 0, SearchService.condition(entity, term)]
+            branches.append(select(
+                literal(entity).label('type'),
+                spec['pk'].label('id'),
+                spec['columns'][1].label('code'),
+                model.title.label('title'),
+                model.status.label('status'),
+                (spec['requirement_id'] if spec['requirement_id'] is not None else null()).label('requirement_id'),
+                (spec['sub_requirement_id'] if spec['sub_requirement_id'] is not None else null()).label('sub_requirement_id'),
+                model.update_time.label('update_time'),
+                SearchService.relevance(entity, term).label('score')
+            ).where(*conditions))
+            counts.append(select(func.count()).select_from(model).where(*conditions).scalar_subquery())
+
+        total = (await db.execute(select(sum(counts[1:], counts[0])))).scalar() or 0
+
+        hits = union_all(*branches).subquery()
+        stmt = select(hits).order_by(
+            desc(hits.c.score), desc(hits.c.update_time), hits.c.type, desc(hits.c.id)
+        ).offset((page - 1) * page_size).limit(page_size)
+
+        items = []
+        for row in (await db.execute(stmt)).all():
+            items.append({
+                'type': row.type,
+                'type_label': SEARCH_ENTITIES[row.type]['label'],
+                'id': row.id,
+                'code': row.code,
+                'title': row.title,
+                'status': row.status,
+                'requirement_id': row.requirement_id,
+                'sub_requirement_id': row.sub_requirement_id,
+                'update_time': row.update_time.strftime('%Y-%m-%d %H:%M:%S') if row.update_time else None,
+                'score': round(float(row.score or 0), 4)
+            })
+        return {'items': items, 'total': total}
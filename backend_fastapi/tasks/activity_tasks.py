@@ -0,0 +1,36 @@
+from backend_fastapi.core.celery_app import celery_app
+from backend_fastapi.db.session import SessionLocal, AutomationSessionLocalSync
+from backend_fastapi.services.activity_service import ActivityService
+from backend_fastapi.utils.LogManeger import log_info
+from datetime import datetime
+import argparse
+
+
+@celery_app.task
+def backfill_user_activities(before=None):
+    """
+    由需求/子需求/任务/缺陷/自动化测试案例/执行记录回填历史用户动态
+    :param before: 只回填该时间之前的操作 YYYY-MM-DD HH:MM:SS，为空时取动态表中最早一条的时间
+    """
+    main_db = SessionLocal()
+    automation_db = AutomationSessionLocalSync()
+    try:
+        before_time = datetime.strptime(before, '%Y-%m-%d %H:%M:%S') if before else None
+        total = ActivityService.backfill_sync(main_db, automation_db, before_time)
+        log_info(f"User activities backfilled: {total}")
+        return total
+    except Exception as e:
+        main_db.rollback()
+        log_info(f"Backfill user activities error: {str(e)}")
+        raise
+    finally:
+        automation_db.close()
+        main_db.close()
+
+
+if __name__ == '__main__':
+    # 建表并上线后执行一次回填: python -m backend_fastapi.tasks.activity_tasks
+    parser = argparse.ArgumentParser(description='回填用户动态表')
+    parser.add_argument('--before', default=None, help='只回填该时间之前的操作 "YYYY-MM-DD HH:MM:SS"，默认取动态表中最早一条的时间')
+    args = parser.parse_args()
+    print(f"Backfilled {backfill_user_activities(args.before)} activities")
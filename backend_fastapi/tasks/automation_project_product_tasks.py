@@ -0,0 +1,32 @@
+from backend_fastapi.core.celery_app import celery_app
+from backend_fastapi.db.session import AutomationSessionLocalSync
+from backend_fastapi.services.automation_project_product_service import AutomationProjectProductService
+from backend_fastapi.utils.LogManeger import log_info
+import argparse
+
+
+@celery_app.task
+def backfill_automation_project_products(start_id=None):
+    """
+    回填自动化测试案例-产品包关联表（可重复执行）
+    :param start_id: 从该测试案例ID开始，为空时处理全部
+    """
+    db = AutomationSessionLocalSync()
+    try:
+        total = AutomationProjectProductService.backfill_sync(db, start_id)
+        log_info(f"Automation project products backfilled: {total} projects")
+        return total
+    except Exception as e:
+        db.rollback()
+        log_info(f"Backfill automation project products error: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    # 建表后执行一次回填: python -m backend_fastapi.tasks.automation_project_product_tasks
+    parser = argparse.ArgumentParser(description='回填自动化测试案例-产品包关联表')
+    parser.add_argument('--start-id', type=int, default=None, help='从该测试案例ID开始，默认处理全部')
+    args = parser.parse_args()
+    print(f"Backfilled {backfill_automation_project_products(args.start_id)} projects")
@@ -4,7 +4,9 @@ from backend_fastapi.models.automation_models import AutomationExecution, Automa
 from backend_fastapi.models.sys_automation_models import SysAutomationRule, SysAutomationLog
 from backend_fastapi.models.pm_models import PMRequirement, PMSubRequirement, PMTask
 from backend_fastapi.models.sys_models import SysNotification, SysUser, SysUserFollow
-from backend_fastapi.utils.LogManeger import log_info, set_current_execution_id, clear_current_execution_id
+from backend_fastapi.utils.LogManeger import log_info, set_current_execution_id, clear_current_execution_id, append_execution_log, flush_database_logs
+from backend_fastapi.services.execution_log_service import ExecutionLogService
+from backend_fastapi.services.execution_stats_service import ExecutionStatsService
 from backend_fastapi.core.constants import REQUIREMENT_STATUS_PROGRESS_MAP
 from datetime import datetime
 from sqlalchemy import text, update, or_, select
@@ -322,11 +324,9 @@ def run_test_execution(self, execution_id, project_id):
         execution.end_time = datetime.now()
         execution.log_message = '测试执行成功' if result == 'Passed' else '测试执行失败'
         
+        # 控制台输出追加到日志行表，不再重写 detailed_log
         header = f"\n\n{'='*20} Console Output {'='*20}\n"
-        if execution.detailed_log:
-            execution.detailed_log = execution.detailed_log + header + stdout
-        else:
-            execution.detailed_log = header + stdout
+        append_execution_log(execution_id, header + stdout)
             
         if project:
             project.status = result
@@ -353,5 +353,17 @@ def run_test_execution(self, execution_id, project_id):
         except Exception as update_error:
             log_info(f"更新失败状态时发生错误: {str(update_error)}")
     finally:
+        # 执行结束：日志全部落库后一次性解析并持久化，详情页与报告直接读取
+        try:
+            flush_database_logs()
+            ExecutionLogService.persist_log_structure_sync(db, execution_id)
+        except Exception as parse_error:
+            log_info(f"持久化执行日志解析结果失败 (execution_id={execution_id}): {str(parse_error)}")
+        # 刷新执行日汇总，仪表板与趋势图从汇总表读取
+        try:
+            ExecutionStatsService.refresh_execution_sync(db, execution_id)
+        except Exception as stats_error:
+            db.rollback()
+            log_info(f"刷新执行日汇总失败 (execution_id={execution_id}): {str(stats_error)}")
         db.close()
         clear_current_execution_id()
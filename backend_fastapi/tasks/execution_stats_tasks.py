@@ -0,0 +1,51 @@
+from backend_fastapi.core.celery_app import celery_app
+from backend_fastapi.db.session import AutomationSessionLocalSync
+from backend_fastapi.services.execution_stats_service import ExecutionStatsService, RECONCILE_RECENT_DAYS
+from backend_fastapi.utils.LogManeger import log_info
+from datetime import date, datetime, timedelta
+import argparse
+
+
+def _parse_day(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+@celery_app.task
+def rebuild_execution_daily_stats(start_date=None, end_date=None):
+    """
+    重建执行日汇总表（回填历史数据）
+    :param start_date: 起始日期 YYYY-MM-DD，为空时从最早的执行开始
+    :param end_date: 结束日期 YYYY-MM-DD，为空时到今天
+    """
+    db = AutomationSessionLocalSync()
+    try:
+        days = ExecutionStatsService.rebuild_sync(db, _parse_day(start_date), _parse_day(end_date))
+        log_info(f"Execution daily stats rebuilt: {days} days")
+        return days
+    except Exception as e:
+        db.rollback()
+        log_info(f"Rebuild execution daily stats error: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task
+def reconcile_execution_daily_stats():
+    """
+    定时校准最近几天的汇总，兜底执行结束时未能刷新的情况（如任务进程被杀死）
+    """
+    today = date.today()
+    return rebuild_execution_daily_stats(
+        (today - timedelta(days=RECONCILE_RECENT_DAYS - 1)).strftime('%Y-%m-%d'),
+        today.strftime('%Y-%m-%d')
+    )
+
+
+if __name__ == '__main__':
+    # 命令行回填: python -m backend_fastapi.tasks.execution_stats_tasks --start 2025-01-01
+    parser = argparse.ArgumentParser(description='重建自动化执行日汇总表')
+    parser.add_argument('--start', default=None, help='起始日期 YYYY-MM-DD，默认从最早的执行开始')
+    parser.add_argument('--end', default=None, help='结束日期 YYYY-MM-DD，默认到今天')
+    args = parser.parse_args()
+    print(f"Rebuilt {rebuild_execution_daily_stats(args.start, args.end)} days")
@@ -0,0 +1,61 @@
+from backend_fastapi.core.celery_app import celery_app
+from backend_fastapi.core.config import settings
+from backend_fastapi.services.report_job_service import ReportJobService
+from backend_fastapi.utils.LogManeger import log_info
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import NullPool
+from datetime import datetime
+import asyncio
+import os
+
+# 进度写入间隔（百分比），避免每批执行都重写状态文件
+REPORT_PROGRESS_STEP = 5
+
+
+@celery_app.task
+def generate_report_artifact(job_id, params):
+    """
+    后台生成测试报告并写入磁盘缓存
+    :param job_id: 任务ID（由参数与数据水位计算）
+    :param params: ReportJobService.normalize_params 生成的参数
+    """
+    asyncio.run(_generate_report_artifact(job_id, params))
+
+
+async def _generate_report_artifact(job_id, params):
+    # 渲染逻辑与接口共用，延迟导入避免与路由模块循环导入
+    from backend_fastapi.routes.Report.Report_Router import write_report_artifact
+
+    artifact_path = ReportJobService.artifact_path(job_id, params.get('package'))
+    last_progress = {'value': -REPORT_PROGRESS_STEP}
+
+    def on_progress(done, total):
+        value = int(done * 100 / total) if total else 100
+        # 写完 HTML 尾部前保留 99%，产物落盘后再标记 100%
+        value = min(value, 99)
+        if value - last_progress['value'] >= REPORT_PROGRESS_STEP:
+            last_progress['value'] = value
+            ReportJobService.write_job(job_id, status='running', progress=value)
+
+    # 每个任务使用自己的引擎（不使用连接池），eventlet 下并发的任务互不影响；不能释放模块级的 automation_engine
+    report_engine = create_async_engine(settings.SQLALCHEMY_BINDS['automation'], echo=False, poolclass=NullPool)
+    session_factory = async_sessionmaker(bind=report_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+    try:
+        log_info(f"Start generating report {job_id}: {params}")
+        ReportJobService.write_job(job_id, status='running', progress=0)
+        await write_report_artifact(artifact_path, params, on_progress, session_factory)
+        ReportJobService.write_job(
+            job_id,
+            status='done',
+            progress=100,
+            size=os.path.getsize(artifact_path),
+            finished_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        )
+        log_info(f"Report {job_id} generated: {artifact_path}")
+    except Exception as e:
+        log_info(f"Generate report {job_id} error: {str(e)}")
+        ReportJobService.write_job(job_id, status='failed', message=str(e))
+    finally:
+        await report_engine.dispose()
+        ReportJobService.cleanup_expired()
@@ -0,0 +1,32 @@
+from backend_fastapi.core.celery_app import celery_app
+from backend_fastapi.db.session import SessionLocal
+from backend_fastapi.services.requirement_progress_service import RequirementProgressService
+from backend_fastapi.utils.LogManeger import log_info
+import argparse
+
+
+@celery_app.task
+def reconcile_requirement_progress(start_id=None):
+    """
+    按子需求/任务重新计算需求进度，修正与 pm_requirement.progress 不一致的记录（可重复执行）
+    :param start_id: 从该需求ID开始，为空时处理全部
+    """
+    db = SessionLocal()
+    try:
+        fixed = RequirementProgressService.reconcile_sync(db, start_id)
+        log_info(f"Requirement progress reconciled: {fixed} fixed")
+        return fixed
+    except Exception as e:
+        db.rollback()
+        log_info(f"Reconcile requirement progress error: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    # 上线后执行一次回填: python -m backend_fastapi.tasks.requirement_progress_tasks
+    parser = argparse.ArgumentParser(description='校准需求进度')
+    parser.add_argument('--start-id', type=int, default=None, help='从该需求ID开始，默认处理全部')
+    args = parser.parse_args()
+    print(f"Fixed {reconcile_requirement_progress(args.start_id)} requirements")
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+游标分页总数缓存回归测试：带全文检索条件（MATCH ... AGAINST）的列表查询也能生成缓存键，不同检索词互不复用总数
+
+运行方式（无需数据库和 Redis）:
+    python -m pytest backend_fastapi/tests/test_pagination_cursor_search.py -q
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql
+
+from backend_fastapi.models.pm_models import PMRequirement
+from backend_fastapi.services import pagination_service
+from backend_fastapi.services.pagination_service import PaginationService
+from backend_fastapi.services.search_service import SearchService
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = str(value)
+
+
+class CountSession:
+    """只响应 count 查询的会话，绑定 MySQL 方言"""
+
+    def __init__(self, total):
+        self.bind = SimpleNamespace(dialect=mysql.dialect())
+        self.total = total
+        self.statements = 0
+
+    async def execute(self, stmt):
+        self.statements += 1
+        return SimpleNamespace(scalar=lambda: self.total)
+
+
+def test_cached_total_with_fulltext_search_term(monkeypatch):
+    fake_redis = FakeRedis()
+    monkeypatch.setattr(pagination_service, 'redis', fake_redis)
+
+    def total_for(term, total):
+        db = CountSession(total)
+        stmt = SearchService.apply(select(PMRequirement), 'requirement', term)
+        return asyncio.run(PaginationService.cached_total(db, stmt, 'requirement')), db.statements
+
+    assert total_for('登录 页面', 7) == (7, 1)
+    # 相同检索词命中缓存，不再 count
+    assert total_for('登录 页面', 99) == (7, 0)
+    # 不同检索词使用不同的缓存键
+    assert total_for('退款流程', 3) == (3, 1)
+    assert len(fake_redis.store) == 2
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+我的关注列表查询次数回归测试
+用计数会话代替数据库，关注对象数量从 5 增加到 50 时，主库与自动化库执行的语句数都应保持不变（按类型批量 IN 查询，无 N+1）
+
+运行方式（无需数据库）:
+    python -m pytest backend_fastapi/tests/test_workbench_followed.py -q
+"""
+
+import asyncio
+from collections import namedtuple
+from datetime import datetime
+from types import SimpleNamespace
+
+from backend_fastapi.models.sys_models import SysUserFollow
+from backend_fastapi.routes.Workbench.Workbench_Router import FOLLOW_TARGETS, get_followed_data
+
+
+class _Result:
+    def __init__(self, rows=(), scalar=None):
+        self._rows = list(rows)
+        self._scalar = scalar
+
+    def scalar(self):
+        return self._scalar
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+
+class CountingSession:
+    """只记录执行语句数的会话：按查询的表返回关注记录或对应的关注对象行"""
+
+    def __init__(self, follows):
+        self.follows = follows
+        self.statements = 0
+
+    async def execute(self, stmt):
+        self.statements += 1
+        first = stmt.selected_columns[0]
+        table = getattr(first, 'table', None)
+        if table is None:
+            # select(func.count())
+            return _Result(scalar=len(self.follows))
+        if table is SysUserFollow.__table__:
+            return _Result(self.follows)
+        for target_type, spec in FOLLOW_TARGETS.items():
+            if spec['columns'][0].table is table:
+                Row = namedtuple('Row', [column.key for column in spec['columns']])
+                return _Result(
+                    Row(f.target_id, *[f"{column.key}-{f.target_id}" for column in spec['columns'][1:]])
+                    for f in self.follows if f.target_type == target_type
+                )
+        raise AssertionError(f'unexpected statement: {stmt}')
+
+
+def _follows(per_type):
+    follows = []
+    for target_type in FOLLOW_TARGETS:
+        for target_id in range(1, per_type + 1):
+            follows.append(SimpleNamespace(
+                follow_id=len(follows) + 1, target_id=target_id, target_type=target_type,
+                create_time=datetime(2024, 1, 1)
+            ))
+    return follows
+
+
+def _count_statements(per_type):
+    follows = _follows(per_type)
+    main_db = CountingSession(follows)
+    automation_db = CountingSession(follows)
+    user = SimpleNamespace(user_id=1)
+    data = asyncio.run(get_followed_data(user, main_db, automation_db, page=1, page_size=len(follows)))
+    assert len(data['items']) == len(follows)
+    assert data['total'] == len(follows)
+    return main_db.statements, automation_db.statements
+
+
+def test_followed_statement_count_independent_of_follow_count():
+    small = _count_statements(5)
+    large = _count_statements(50)
+    assert small == large
+
+    # 主库：总数 + 关注分页 + 每种主库类型一条 IN 查询；自动化库：每种类型一条 IN 查询
+    databases = [spec['database'] for spec in FOLLOW_TARGETS.values()]
+    assert large == (2 + databases.count('main'), databases.count('automation'))
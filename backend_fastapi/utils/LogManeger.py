@@ -4,8 +4,10 @@
 提供统一的日志功能，支持控制台和文件输出
 """
 
+import atexit
 import logging
 import os
+import queue
 import threading
 import time
 import re
@@ -29,6 +31,17 @@ LOG_FILE = os.path.join(LOG_DIR, 'app.log')
 MAX_LOG_SIZE = 10 * 1024 * 1024  # 10MB
 BACKUP_COUNT = 5
 
+# 数据库日志批量写入配置
+DB_LOG_BATCH_SIZE = 200  # 单批最多写入的日志行数
+DB_LOG_FLUSH_INTERVAL = 0.5  # 批量刷新间隔（秒）
+DB_LOG_QUEUE_SIZE = 10000  # 日志队列容量，队列满时 emit 阻塞形成背压
+DB_LOG_FLUSH_TIMEOUT = 10  # 等待队列刷新完成的最长时间（秒）
+
+# 方法级日志标识，例如 [test_HG_1]
+METHOD_NAME_PATTERN = re.compile(r'\[(test_\w+)\]')
+# 测试步骤开始标识，例如 "开始测试步骤3-4" / "执行第2次操作"
+STEP_START_PATTERN = re.compile(r'开始测试步骤(\d+)|执行第(\d+)次操作')
+
 # 全局变量，用于存储当前执行ID
 current_execution_id = None
 # 线程锁，用于保护数据库写入操作
@@ -198,6 +211,234 @@ class DatabaseLogHandler(logging.Handler):
                 # 避免在日志处理中产生新的日志循环
                 print(f"数据库日志处理器错误: {e}")
 
+class BatchedDatabaseLogHandler(DatabaseLogHandler):
+    """
+    批量异步数据库日志处理器
+    emit 只负责把日志行放入队列，由后台线程按数量/时间攒批后复用同一个数据库连接，
+    以只追加的方式写入 automation_execution_log_lines，避免每行日志都新建连接、
+    加全局锁，并且不再 CONCAT 重写不断增长的 detailed_log / log_content
+    """
+
+    # 后台线程退出标记
+    _STOP = object()
+    # 执行结束标记，队列项为 (_FINISH, 执行ID)
+    _FINISH = object()
+
+    def __init__(self, level=logging.NOTSET, batch_size=DB_LOG_BATCH_SIZE,
+                 flush_interval=DB_LOG_FLUSH_INTERVAL, queue_size=DB_LOG_QUEUE_SIZE):
+        super().__init__(level)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._connection = None
+        self._worker = None
+        self._worker_pid = None
+        self._worker_lock = threading.Lock()
+        self._closed = False
+        # 后台线程内维护的 (执行ID, 方法名) -> 当前步骤号，执行结束时清除该执行的条目
+        self._current_steps = {}
+        # 进程退出前确保队列中的日志全部落库
+        atexit.register(self.close)
+
+    def _ensure_worker(self):
+        """
+        确保后台刷新线程已启动
+        线程按进程懒启动，兼容 Celery prefork 等 fork 后继承处理器的场景
+        """
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+            if self._worker_pid != pid:
+                # fork 后父进程的连接和队列状态不可复用
+                self._connection = None
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._worker_pid = pid
+            self._worker = threading.Thread(target=self._run, name='db-log-flusher', daemon=True)
+            self._worker.start()
+
+    def emit(self, record):
+        """将日志记录放入写入队列（执行ID在入队时确定，保证切换执行后日志不串行）"""
+        execution_id = self.execution_id
+        if not execution_id or self._closed:
+            return
+        try:
+            log_entry = self.format(record)
+            self._ensure_worker()
+            self._queue.put((execution_id, record.levelname, log_entry, True))
+        except Exception as e:
+            print(f"数据库日志入队失败: {e}")
+
+    def flush(self):
+        """
+        阻塞等待当前已入队的日志全部写入数据库
+        """
+        worker = self._worker
+        if worker is None or self._worker_pid != os.getpid() or not worker.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(DB_LOG_FLUSH_TIMEOUT)
+
+    def close(self):
+        """刷新剩余日志、停止后台线程并释放数据库连接"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        worker = self._worker
+        if worker is not None and self._worker_pid == os.getpid() and worker.is_alive():
+            self._queue.put(self._STOP)
+            worker.join(DB_LOG_FLUSH_TIMEOUT)
+        self._close_connection()
+        super().close()
+
+    def _run(self):
+        """后台线程：按批量大小或刷新间隔攒批写入"""
+        while True:
+            item = self._queue.get()
+            batch = []
+            waiters = []
+            finished = []
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is self._STOP:
+                    stop = True
+                    break
+                if isinstance(item, threading.Event):
+                    # 刷新请求：立即写出已攒的批次
+                    waiters.append(item)
+                    break
+                if isinstance(item, tuple) and item[0] is self._FINISH:
+                    # 执行结束：先写出已攒的批次（可能含该执行的日志），再清除步骤记录
+                    finished.append(item[1])
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write_batch(batch)
+            for execution_id in finished:
+                self._forget_steps(execution_id)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                return
+
+    def _get_pooled_connection(self):
+        """获取复用的数据库连接，断线时自动重连"""
+        if self._connection is None:
+            self._connection = self.get_connection()
+        else:
+            self._connection.ping(reconnect=True)
+        return self._connection
+
+    def _close_connection(self):
+        """关闭复用的数据库连接"""
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def finish_execution(self, execution_id):
+        """
+        执行结束后调用：该执行已入队的日志写完后清除其步骤记录，避免 _current_steps 随执行次数无限增长
+        """
+        if not execution_id:
+            return
+        worker = self._worker
+        if worker is not None and self._worker_pid == os.getpid() and worker.is_alive():
+            # 步骤记录只在后台线程内读写，经队列交给后台线程清除
+            self._queue.put((self._FINISH, execution_id))
+        else:
+            self._forget_steps(execution_id)
+
+    def _forget_steps(self, execution_id):
+        """清除指定执行的全部步骤记录"""
+        for key in [key for key in self._current_steps if key[0] == execution_id]:
+            del self._current_steps[key]
+
+    def _track_step(self, execution_id, method_name, line):
+        """
+        记录 (执行ID, 方法名) 当前所处的测试步骤，返回该行所属步骤号
+        """
+        key = (execution_id, method_name)
+        match = STEP_START_PATTERN.search(line)
+        if match:
+            self._current_steps[key] = int(match.group(1) or match.group(2))
+        return self._current_steps.get(key)
+
+    def _write_batch(self, batch):
+        """
+        将一批日志追加写入 automation_execution_log_lines
+        每个执行先原子预留一段连续序号，再一次多行 INSERT 写入
+        """
+        rows_by_execution = {}
+        for execution_id, level, log_entry, by_method in batch:
+            rows = rows_by_execution.setdefault(execution_id, [])
+            if not by_method:
+                # 原始文本（控制台输出）只进入完整日志，不归属测试方法和步骤
+                rows.extend((None, None, level, line) for line in log_entry.split('\n'))
+                continue
+            # 多行日志整体归属首个匹配到的测试方法，按物理行拆分存储
+            match = METHOD_NAME_PATTERN.search(log_entry)
+            method_name = match.group(1) if match else None
+            for line in log_entry.split('\n'):
+                rows.append((method_name, self._track_step(execution_id, method_name, line), level, line))
+
+        reserve_sql = "UPDATE automation_executions SET log_line_seq = LAST_INSERT_ID(IFNULL(log_line_seq, 0) + %s) WHERE id = %s"
+        insert_sql = """
+            INSERT INTO automation_execution_log_lines (execution_id, seq, method_name, step_number, level, content, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+
+        # 连接失效时重连重试一次
+        for attempt in range(2):
+            try:
+                connection = self._get_pooled_connection()
+                now = datetime.now()
+                with connection.cursor() as cursor:
+                    for execution_id, rows in rows_by_execution.items():
+                        if not cursor.execute(reserve_sql, (len(rows), execution_id)):
+                            # 执行记录不存在
+                            continue
+                        first_seq = cursor.lastrowid - len(rows) + 1
+                        cursor.executemany(insert_sql, [
+                            (execution_id, first_seq + i, method_name, step_number, level, line, now)
+                            for i, (method_name, step_number, level, line) in enumerate(rows)
+                        ])
+                connection.commit()
+                return
+            except Exception as e:
+                self._close_connection()
+                if attempt:
+                    # 避免在日志处理中产生新的日志循环
+                    print(f"数据库日志批量写入失败，丢弃 {len(batch)} 行: {e}")
+
+    def append_raw(self, execution_id, text, level='INFO'):
+        """
+        不经格式化直接追加日志文本（如控制台输出），与普通日志共用同一写入队列
+        与原先直接追加 detailed_log 一致，不计入测试方法日志和步骤
+        """
+        if not execution_id or self._closed:
+            return
+        self._ensure_worker()
+        self._queue.put((execution_id, level, text, False))
+
+
 def setup_logger(name='星火: ', level=LOG_LEVEL):
     """
     设置日志记录器
@@ -245,8 +486,8 @@ def setup_logger(name='星火: ', level=LOG_LEVEL):
             print(f"创建文件日志处理器失败: {e}")
             # 如果文件处理器创建失败，只使用控制台处理器
     
-    # 数据库处理器
-    db_handler = DatabaseLogHandler(level)
+    # 数据库处理器（批量异步写入）
+    db_handler = BatchedDatabaseLogHandler(level)
     db_handler.setFormatter(formatter)
     logger.addHandler(db_handler)
     
@@ -302,9 +543,32 @@ def get_current_execution_id():
     """获取当前执行ID"""
     return current_execution_id
 
+def flush_database_logs():
+    """阻塞等待所有数据库日志处理器中排队的日志写入完成"""
+    for handler in default_logger.handlers:
+        if isinstance(handler, DatabaseLogHandler):
+            handler.flush()
+
+def append_execution_log(execution_id, text, level='INFO'):
+    """
+    向指定执行追加原始日志文本（不经格式化，按行存储）
+    
+    Args:
+        execution_id: 执行ID
+        text: 日志文本，可包含多行
+        level: 日志级别
+    """
+    for handler in default_logger.handlers:
+        if isinstance(handler, BatchedDatabaseLogHandler):
+            handler.append_raw(execution_id, text, level)
+
 def clear_current_execution_id():
-    """清除当前执行ID"""
+    """清除当前执行ID（清除前先将本次执行排队的日志全部落库，并清除该执行的步骤记录）"""
     global current_execution_id
+    for handler in default_logger.handlers:
+        if isinstance(handler, BatchedDatabaseLogHandler):
+            handler.finish_execution(handler.execution_id)
+    flush_database_logs()
     current_execution_id = None
     
     # 清除所有处理器的执行ID
@@ -2,6 +2,303 @@ import re
 import html
 import uuid
 
+# 日志解析预编译正则（与 UitilTools.parse_automation_log 的原有匹配规则保持一致）
+_METHOD_RE = re.compile(r'\[(test_\w+(?:_\d+)?)\]')
+_COMPLETION_RE = re.compile(r'\[(test_\w+(?:_\d+)?)\]\s+\1\s+完成')
+_SCREENSHOT_RE = re.compile(r'\[(test_\w+(?:_\d+)?)\]\s.*(?:截图成功保存|数据信息保存成功):\s*([^\s]+\.png)')
+_OVER_ABS_RE = re.compile(r'((?:[A-Za-z]:\\\\|/)\S*?over_test_(test_\w+(?:_\d+)?)_[^\\\\\/\s]*\.png)')
+_OVER_BARE_RE = re.compile(r'(over_test_(test_\w+(?:_\d+)?)_[^\\\\\/\s]*\.png)')
+_REQUEST_SHOT_RE = re.compile(r'请求测试截图:\s*([^\s]+\.png)')
+_OVER_METHOD_RE = re.compile(r'over_test_(test_\w+(?:_\d+)?)')
+_STEP_RE_0 = re.compile(r'开始(测试步骤[\d-]+.*?)(\s+的操作|=+$|:\s+.*$)')
+_STEP_RE_1 = re.compile(r'开始测试步骤([\d-]+)\s*(.*)')
+_STEP_RE_2 = re.compile(r'执行第(\d+)次操作[:：](.*)')
+_STEP_NUMBER_RE = re.compile(r'测试步骤(\d+)')
+_TRAILING_EQUALS_RE = re.compile(r'=+$')
+_TRAILING_OPERATION_RE = re.compile(r'\s*的操作$')
+# 总结行：pytest 失败/总结、浏览器布局信息、关键错误、pytest 输出开始，合并为单个交替正则
+_SUMMARY_RE = re.compile(
+    r'={10,}\s+(?:FAILURES|ERRORS|short test summary info)\s+={10,}'
+    r'|\[INFO\]\s+浏览器布局信息'
+    r'|测试执行异常|所有操作均失败|ELEMENT_CLICK_TIMEOUT|元素点击超时|BROWSER_CLOSED_BY_USER'
+    r'|Pytest Output for execution'
+)
+_STEP_INFO_RE = re.compile(r'步骤_(?:test_)?step_(\d+)_|测试步骤_(?:test_)?step_(\d+)_')
+_OVER_STEP_INFO_RE = re.compile(r'over_test_(?:test_)?step_(\d+)_')
+_RAW_LOG_RE = re.compile(r'LogManeger\.py:\d+')
+_CONCURRENT_RE = re.compile(r'开始并发执行\s*(\d+)\s*个独立浏览器实例')
+
+
+class AutomationLogParser:
+    """
+    可续解析的自动化测试日志解析器
+    单次遍历、预编译正则并用子串预判跳过不可能命中的正则；
+    解析状态保存在对象中，运行中的执行可通过 feed 追加新内容继续解析，无需从第一行重来
+    """
+
+    def __init__(self):
+        # 已消费的字符数（只统计完整行），用于从上次位置继续读取日志
+        self.offset = 0
+        self._pending = ''
+        self._finished = False
+
+        self.test_steps = []
+        self.test_methods = set()
+        self.screenshots = []
+        self.init_logs = []
+        self.end_logs = []
+        self.current_step = None
+        self.current_step_logs = []
+        self.is_in_end_phase = False
+        self.concurrent_count = None
+        self._concurrent_line_seen = False
+        # 步骤号 -> 步骤；方法名 -> 包含该方法的最后一个步骤下标
+        self._steps_by_number = {}
+        self._step_index = {}
+        self._method_last_step = {}
+
+    def feed(self, text):
+        """
+        追加日志文本并解析其中的完整行，末尾不完整的行暂存到下次 feed/finish
+        """
+        if not text:
+            return
+        data = self._pending + text
+        last_newline = data.rfind('\n')
+        if last_newline < 0:
+            self._pending = data
+            return
+        self._pending = data[last_newline + 1:]
+        self.offset += last_newline + 1
+        for line in data[:last_newline].split('\n'):
+            self._feed_line(line)
+
+    def finish(self):
+        """
+        解析剩余的不完整行并返回最终结果，之后不能再追加
+        """
+        if not self._finished:
+            if self._pending:
+                self.offset += len(self._pending)
+                self._feed_line(self._pending)
+                self._pending = ''
+            self._finished = True
+        return self.result(copy=False)
+
+    def result(self, copy=True):
+        """
+        返回当前解析结果（不改变解析状态，不包含尚未完整的最后一行）
+        :param copy: 是否复制日志列表，继续解析时避免结果被后续 feed 修改
+        """
+        clone = list if copy else (lambda value: value)
+        test_steps = []
+        for step in self.test_steps:
+            logs = self.current_step_logs if step is self.current_step else step['logs']
+            test_steps.append({
+                'stepNumber': step['stepNumber'],
+                'stepName': step['stepName'],
+                'logs': clone(logs),
+                'methods': {name: clone(lines) for name, lines in step['methods'].items()} if copy else step['methods']
+            })
+        test_methods_count = self.concurrent_count if self.concurrent_count is not None else len(self.test_methods)
+        return {
+            'testStepsCount': len(test_steps),
+            'testMethodsCount': test_methods_count,
+            'screenshotsCount': len(self.screenshots),
+            'testSteps': test_steps,
+            'initLogs': clone(self.init_logs),
+            'endLogs': clone(self.end_logs),
+            'screenshots': clone(self.screenshots)
+        }
+
+    def _add_step_method(self, step, method, line):
+        """向步骤的方法日志追加一行，并维护方法 -> 最后步骤索引"""
+        step['methods'].setdefault(method, []).append(line)
+        index = self._step_index[id(step)]
+        if self._method_last_step.get(method, -1) < index:
+            self._method_last_step[method] = index
+
+    def _find_step_by_method(self, method):
+        """查找包含该方法的最后一个步骤"""
+        index = self._method_last_step.get(method)
+        return self.test_steps[index] if index is not None else None
+
+    def _switch_step(self, step_number, step_name):
+        """切换到指定步骤，不存在时新建"""
+        current_step = self.current_step
+        existing_step = self._steps_by_number.get(step_number)
+        if existing_step:
+            if current_step and current_step is not existing_step:
+                current_step['logs'] = self.current_step_logs
+            self.current_step = existing_step
+            self.current_step_logs = existing_step['logs']
+        else:
+            if current_step:
+                current_step['logs'] = self.current_step_logs
+            new_step = {
+                'stepNumber': step_number,
+                'stepName': step_name,
+                'logs': [],
+                'methods': {}
+            }
+            self.current_step = new_step
+            self.current_step_logs = []
+            self._steps_by_number[step_number] = new_step
+            self._step_index[id(new_step)] = len(self.test_steps)
+            self.test_steps.append(new_step)
+
+    def _feed_line(self, raw_line):
+        """解析单行日志"""
+        if not self._concurrent_line_seen and '开始并发执行' in raw_line and '个独立浏览器实例' in raw_line:
+            # 与原逻辑一致：只取第一条包含并发信息的行
+            self._concurrent_line_seen = True
+            concurrent_match = _CONCURRENT_RE.search(raw_line)
+            if concurrent_match:
+                self.concurrent_count = int(concurrent_match.group(1))
+
+        line = raw_line.strip()
+        if not line:
+            return
+
+        # 检测测试方法
+        method = None
+        if '[test_' in line:
+            method_match = _METHOD_RE.search(line)
+            if method_match:
+                method = method_match.group(1)
+                self.test_methods.add(method)
+
+        # 检测测试完成标志
+        is_completion = method is not None and '完成' in line and _COMPLETION_RE.search(line) is not None
+
+        # 检测截图
+        screenshot_match = None
+        if '.png' in line:
+            if method is not None and ('截图成功保存' in line or '数据信息保存成功' in line):
+                screenshot_match = _SCREENSHOT_RE.search(line)
+            if screenshot_match:
+                self.screenshots.append({
+                    'method': screenshot_match.group(1),
+                    'path': screenshot_match.group(2),
+                    'line': line
+                })
+            else:
+                matched_path = None
+                if 'over_test_' in line:
+                    over_match = _OVER_ABS_RE.search(line) or _OVER_BARE_RE.search(line)
+                    if over_match:
+                        matched_path = over_match.group(1)
+                if not matched_path and '请求测试截图' in line:
+                    request_shot_match = _REQUEST_SHOT_RE.search(line)
+                    if request_shot_match:
+                        matched_path = request_shot_match.group(1)
+                if matched_path:
+                    method_in_name = _OVER_METHOD_RE.search(matched_path)
+                    method_from_name = method_in_name.group(1) if method_in_name else None
+                    if method_from_name:
+                        self.test_methods.add(method_from_name)
+                    self.screenshots.append({
+                        'method': method_from_name,
+                        'path': matched_path,
+                        'line': line
+                    })
+
+        if is_completion:
+            # 完成日志归入当前步骤（注意：与原逻辑一致，写入的是步骤对象上的 logs 列表）
+            self.is_in_end_phase = True
+            current_step = self.current_step
+            if current_step:
+                current_step['logs'].append(line)
+                if method in current_step['methods']:
+                    current_step['methods'][method].append(line)
+            else:
+                self.end_logs.append(line)
+
+        # 检测测试步骤开始
+        if not self.is_in_end_phase:
+            step_match_0 = step_match_1 = step_match_2 = None
+            if '开始测试步骤' in line:
+                step_match_0 = _STEP_RE_0.search(line)
+                if not step_match_0:
+                    step_match_1 = _STEP_RE_1.search(line)
+            if not (step_match_0 or step_match_1) and '执行第' in line:
+                step_match_2 = _STEP_RE_2.search(line)
+
+            if step_match_0:
+                num_match = _STEP_NUMBER_RE.search(step_match_0.group(1))
+                step_number = int(num_match.group(1)) if num_match else 0
+                self._switch_step(step_number, step_match_0.group(1).strip())
+            elif step_match_1:
+                step_num_str = step_match_1.group(1)
+                if '-' in step_num_str:
+                    step_number = int(step_num_str.split('-')[0])
+                else:
+                    step_number = int(step_num_str)
+                raw_name = step_match_1.group(2).strip()
+                raw_name = _TRAILING_EQUALS_RE.sub('', raw_name).strip()
+                raw_name = _TRAILING_OPERATION_RE.sub('', raw_name).strip()
+                self._switch_step(step_number, raw_name)
+            elif step_match_2:
+                step_number = int(step_match_2.group(1))
+                raw_name = step_match_2.group(2).strip()
+                self._switch_step(step_number, raw_name if raw_name else f"第{step_number}次操作")
+
+        # 检测总结行，强制进入结束阶段
+        if line == 'FAILED' or _SUMMARY_RE.search(line):
+            self.is_in_end_phase = True
+            self.end_logs.append(line)
+            return
+
+        # 结束阶段的所有后续日志都归入 endLogs
+        if self.is_in_end_phase:
+            self.end_logs.append(line)
+            return
+
+        current_step = self.current_step
+        if method is not None and screenshot_match:
+            found_step = None
+            step_number_from_log = None
+            step_info_match = _STEP_INFO_RE.search(line)
+            if step_info_match:
+                step_number_from_log = int(step_info_match.group(1) or step_info_match.group(2))
+            else:
+                over_step_info_match = _OVER_STEP_INFO_RE.search(line)
+                if over_step_info_match:
+                    step_number_from_log = int(over_step_info_match.group(1))
+
+            if step_number_from_log is not None:
+                if current_step and current_step['stepNumber'] == step_number_from_log:
+                    found_step = current_step
+                else:
+                    found_step = self._steps_by_number.get(step_number_from_log)
+
+            if not found_step:
+                if current_step and method in current_step['methods']:
+                    found_step = current_step
+                else:
+                    found_step = self._find_step_by_method(method)
+
+            if found_step:
+                if found_step is current_step:
+                    self.current_step_logs.append(line)
+                else:
+                    found_step['logs'].append(line)
+                self._add_step_method(found_step, method, line)
+            else:
+                self.end_logs.append(line)
+
+        elif current_step:
+            # 来自 LogManeger 的原始控制台日志不归入测试步骤
+            if 'LogManeger.py' in line and _RAW_LOG_RE.search(line):
+                self.end_logs.append(line)
+            else:
+                self.current_step_logs.append(line)
+                if method is not None:
+                    self._add_step_method(current_step, method, line)
+        else:
+            self.init_logs.append(line)
+
+
 class UitilTools:
     @staticmethod
     def parse_automation_log(log_content, is_error_log=False):
@@ -44,344 +341,9 @@ class UitilTools:
                 'screenshots': []
             }
 
-        test_steps = []
-        test_methods = set()
-        screenshots = []
-        init_logs = []
-        end_logs = []
-        
-        current_step = None
-        current_step_logs = []
-        is_in_step = False
-        is_in_end_phase = False
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # 检测测试方法
-            method_match = re.search(r'\[(test_\w+(?:_\d+)?)\]', line)
-            if method_match:
-                test_methods.add(method_match.group(1))
-                
-            # 检测测试完成标志
-            test_completion_match = re.search(r'\[(test_\w+(?:_\d+)?)\]\s+\1\s+完成', line)
-            should_switch_to_end_phase = bool(test_completion_match)
-            
-            # 检测截图
-            screenshot_match = re.search(r'\[(test_\w+(?:_\d+)?)\]\s.*(?:截图成功保存|数据信息保存成功):\s*([^\s]+\.png)', line)
-            if screenshot_match:
-                screenshots.append({
-                    'method': screenshot_match.group(1),
-                    'path': screenshot_match.group(2),
-                    'line': line
-                })
-            else:
-                # 兼容其他截图格式
-                over_abs_match = re.search(r'((?:[A-Za-z]:\\\\|/)\S*?over_test_(test_\w+(?:_\d+)?)_[^\\\\\/\s]*\.png)', line)
-                over_bare_match = re.search(r'(over_test_(test_\w+(?:_\d+)?)_[^\\\\\/\s]*\.png)', line) if not over_abs_match else None
-                request_shot_match = re.search(r'请求测试截图:\s*([^\s]+\.png)', line) if not (over_abs_match or over_bare_match) else None
-                
-                matched_path = (over_abs_match and over_abs_match.group(1)) or \
-                               (over_bare_match and over_bare_match.group(1)) or \
-                               (request_shot_match and request_shot_match.group(1))
-                
-                if matched_path:
-                    method_in_name = re.search(r'over_test_(test_\w+(?:_\d+)?)', matched_path)
-                    method_from_name = method_in_name.group(1) if method_in_name else None
-                    if method_from_name:
-                        test_methods.add(method_from_name)
-                    screenshots.append({
-                        'method': method_from_name,
-                        'path': matched_path,
-                        'line': line
-                    })
-
-            # 原有的 test_completion_match 逻辑 (移动到 is_in_end_phase 检查之后，避免冲突)
-            if should_switch_to_end_phase:
-                # 标记进入结束阶段，当前行归入上一个步骤（如果是完成日志）或者 endLogs
-                # 这里的逻辑是：[test_HG] test_HG 完成 -> 这行还是属于 test_HG 的最后一步，或者是单独的一行
-                # 但既然标志着完成，后续的应该就是 endLogs 了
-                is_in_end_phase = True
-                
-                # 尝试将这一行归入当前步骤
-                if current_step:
-                    current_step['logs'].append(line)
-                    # 同时也尝试归入方法日志
-                    log_method_match = re.search(r'\[(test_\w+(?:_\d+)?)\]', line)
-                    if log_method_match:
-                         log_method = log_method_match.group(1)
-                         if log_method in current_step['methods']:
-                             current_step['methods'][log_method].append(line)
-                else:
-                    end_logs.append(line)
-            
-            # 检测测试步骤开始 (三种模式)
-            # 模式0: 完整带时间戳的日志行 (2025-12-03... INFO - 开始测试步骤5 输入帐号 的操作==============)
-            # 兼容 "开始测试步骤3-4: 验证码识别与登录 (智能重试)" 这种格式
-            step_match_0 = re.search(r'开始(测试步骤[\d-]+.*?)(\s+的操作|=+$|:\s+.*$)', line)
-            
-            # 模式1: "开始测试步骤1 ..." - 更加宽容的匹配，后续再清洗名称
-            # 兼容 "开始测试步骤3-4" 这种格式
-            step_match_1 = re.search(r'开始测试步骤([\d-]+)\s*(.*)', line)
-            # 模式2: "执行第1次操作: ..."
-            step_match_2 = re.search(r'执行第(\d+)次操作[:：](.*)', line)
-            
-            step_match = step_match_0 or step_match_1 or step_match_2
-            
-            if step_match and not is_in_end_phase:
-                if step_match_0:
-                     # 从模式0中提取步骤号 (兼容 "3-4")
-                     # 先尝试提取第一个数字作为主步骤号
-                     num_match = re.search(r'测试步骤(\d+)', step_match.group(1))
-                     step_number = int(num_match.group(1)) if num_match else 0
-                     
-                     # 提取完整步骤名称
-                     raw_name = step_match.group(1).strip()
-                     # 如果包含冒号，可能是 "测试步骤3-4: 验证码识别与登录"
-                     if ':' in raw_name:
-                         step_name = raw_name
-                     else:
-                         step_name = raw_name
-                elif step_match_1:
-                    # 处理步骤号 "3-4" -> 3
-                    step_num_str = step_match_1.group(1)
-                    if '-' in step_num_str:
-                        step_number = int(step_num_str.split('-')[0])
-                    else:
-                        step_number = int(step_num_str)
-                        
-                    raw_name = step_match_1.group(2).strip()
-                    # 清洗名称：去除末尾的等号
-                    raw_name = re.sub(r'=+$', '', raw_name).strip()
-                    # 清洗名称：去除末尾的 "的操作"
-                    raw_name = re.sub(r'\s*的操作$', '', raw_name).strip()
-                    step_name = raw_name
-                else:
-                    step_number = int(step_match_2.group(1))
-                    raw_name = step_match_2.group(2).strip()
-                    # 如果冒号后面是具体操作指令，取一部分作为名称，或者直接叫"执行操作"
-                    step_name = raw_name if raw_name else f"第{step_number}次操作"
-
-                existing_step = next((s for s in test_steps if s['stepNumber'] == step_number), None)
-                
-                if existing_step:
-                    # 如果已经存在该步骤（可能是重复进入或同一步骤的多条日志触发），切换回该步骤
-                    if current_step and current_step != existing_step:
-                        # 保存当前步骤状态
-                        current_step['logs'] = current_step_logs
-                        if current_step not in test_steps:
-                            test_steps.append(current_step)
-                    
-                    current_step = existing_step
-                    current_step_logs = current_step['logs']
-                    is_in_step = True
-                else:
-                    # 保存上一个步骤
-                    if current_step:
-                        current_step['logs'] = current_step_logs
-                        if current_step not in test_steps:
-                            test_steps.append(current_step)
-                            
-                    current_step = {
-                        'stepNumber': step_number,
-                        'stepName': step_name,
-                        'logs': [],
-                        'methods': {}
-                    }
-                    current_step_logs = []
-                    is_in_step = True
-                    test_steps.append(current_step)
-
-            # 检测并发执行信息
-            concurrent_match = re.search(r'开始并发执行\s*(\d+)\s*个独立浏览器实例', line)
-
-            # 检测Pytest失败/总结标志，强制结束当前步骤
-            # 类似 "FAILED", "FAILURES", "ERRORS", "short test summary info" 等
-            # 或者 "[INFO] 浏览器布局信息" 这种总结性日志开始
-            is_summary_line = False
-            # 增加对 Pytest Output for execution 的检测，作为结束阶段的开始
-            if re.search(r'={10,}\s+(FAILURES|ERRORS|short test summary info)\s+={10,}', line) or \
-               re.search(r'\[INFO\]\s+浏览器布局信息', line) or \
-               re.search(r'(?:测试执行异常|所有操作均失败|ELEMENT_CLICK_TIMEOUT|元素点击超时|BROWSER_CLOSED_BY_USER)', line) or \
-               re.search(r'Pytest Output for execution', line) or \
-               line.strip() == 'FAILED':
-                is_summary_line = True
-            
-            if is_summary_line:
-                # 遇到总结行，强制进入结束阶段
-                is_in_end_phase = True
-                end_logs.append(line)
-                continue
-            
-            # 如果进入了结束阶段，所有后续日志都归入 endLogs
-            # 除非遇到了明确的"任务执行完成" 或 "Celery任务...数据库更新成功" 这种真正的结束行（这里也归入 endLogs）
-            # 注意：之前有一个 test_completion_match 逻辑，它只是标志单个测试方法完成，不一定是整个任务结束
-            # 但 Pytest Output 之后的所有内容都应该算作结束阶段
-            if is_in_end_phase:
-                end_logs.append(line)
-                continue
-
-            # 检测测试步骤开始 (三种模式)
-                should_switch_to_end_phase = True
-                
-            if should_switch_to_end_phase and is_in_step:
-                # 结束当前步骤
-                if current_step:
-                     current_step['logs'] = current_step_logs
-                current_step = None
-                is_in_step = False
-                is_in_end_phase = True
-
-            # 分配日志到相应的组
-            if method_match and screenshot_match:
-                log_method = method_match.group(1)
-                found_step = None
-                
-                step_number_from_log = None
-                step_info_match = re.search(r'步骤_(?:test_)?step_(\d+)_|测试步骤_(?:test_)?step_(\d+)_', line)
-                if step_info_match:
-                    step_number_from_log = int(step_info_match.group(1) or step_info_match.group(2))
-                else:
-                    over_step_info_match = re.search(r'over_test_(?:test_)?step_(\d+)_', line)
-                    if over_step_info_match:
-                        step_number_from_log = int(over_step_info_match.group(1))
-                        
-                if step_number_from_log is not None:
-                    if current_step and current_step['stepNumber'] == step_number_from_log:
-                        found_step = current_step
-                    else:
-                        found_step = next((s for s in test_steps if s['stepNumber'] == step_number_from_log), None)
-                        
-                if not found_step:
-                    if current_step and log_method in current_step['methods']:
-                        found_step = current_step
-                    else:
-                        for s in reversed(test_steps):
-                            if log_method in s['methods']:
-                                found_step = s
-                                break
-                                
-                if found_step:
-                    if found_step == current_step:
-                        current_step_logs.append(line)
-                    else:
-                        found_step['logs'].append(line)
-                        
-                    if log_method not in found_step['methods']:
-                        found_step['methods'][log_method] = []
-                    found_step['methods'][log_method].append(line)
-                else:
-                    end_logs.append(line)
-                    
-            elif method_match and is_in_end_phase:
-                log_method = method_match.group(1)
-                found_step = None
-                
-                if screenshot_match:
-                    step_number_from_log = None
-                    step_info_match = re.search(r'步骤_(?:test_)?step_(\d+)_|测试步骤_(?:test_)?step_(\d+)_', line)
-                    if step_info_match:
-                        step_number_from_log = int(step_info_match.group(1) or step_info_match.group(2))
-                    else:
-                        over_step_info_match = re.search(r'over_test_(?:test_)?step_(\d+)_', line)
-                        if over_step_info_match:
-                            step_number_from_log = int(over_step_info_match.group(1))
-                    
-                    if step_number_from_log is not None:
-                        if current_step and current_step['stepNumber'] == step_number_from_log:
-                            found_step = current_step
-                        else:
-                            found_step = next((s for s in test_steps if s['stepNumber'] == step_number_from_log), None)
-                            
-                if not found_step:
-                    if current_step and log_method in current_step['methods']:
-                        found_step = current_step
-                    else:
-                        for s in reversed(test_steps):
-                            if log_method in s['methods']:
-                                found_step = s
-                                break
-                                
-                if found_step:
-                    found_step['logs'].append(line)
-                    if log_method not in found_step['methods']:
-                        found_step['methods'][log_method] = []
-                    found_step['methods'][log_method].append(line)
-                else:
-                    # 只有当不在结束阶段时，未匹配到步骤的日志才尝试归入 endLogs (或者 initLogs?)
-                    # 实际上如果还没开始任何步骤，应该归入 initLogs
-                    if not test_steps:
-                        init_logs.append(line)
-                    else:
-                        # 已经在步骤中间，但没匹配到特定步骤（奇怪的情况），暂时归入 endLogs 或者是上一个步骤？
-                        # 保持原有逻辑，归入 endLogs
-                        end_logs.append(line)
-
-            elif is_in_step and current_step:
-                # 过滤掉没有时间戳且来自 LogManeger 的原始控制台日志，避免重复或混乱
-                # 例如: "INFO     星火: :LogManeger.py:257 [test_SC] ..."
-                # 只要包含 LogManeger.py 就认为是原始日志，不归入测试步骤
-                is_raw_log = re.search(r'LogManeger\.py:\d+', line)
-                
-                if is_raw_log:
-                    # 如果这行日志本身包含"测试执行异常"等关键错误信息，且之前没有触发过结束阶段
-                    # 那么这行日志也应该被视为结束信号（双重保险）
-                    if re.search(r'(?:测试执行异常|所有操作均失败|ELEMENT_CLICK_TIMEOUT|元素点击超时|BROWSER_CLOSED_BY_USER)', line):
-                         # 既然是原始日志，我们把它放到 endLogs 里，并强制结束当前步骤
-                         end_logs.append(line)
-                         # 手动触发结束逻辑
-                         if current_step:
-                             current_step['logs'] = current_step_logs
-                             if current_step not in test_steps:
-                                 test_steps.append(current_step)
-                         is_in_end_phase = True
-                         is_in_step = False
-                         current_step = None
-                    else:
-                        end_logs.append(line)
-                else:
-                    current_step_logs.append(line)
-                    if method_match:
-                        method = method_match.group(1)
-                        if method not in current_step['methods']:
-                            current_step['methods'][method] = []
-                        current_step['methods'][method].append(line)
-            else:
-                init_logs.append(line)
-                
-            if should_switch_to_end_phase:
-                if current_step:
-                    current_step['logs'] = current_step_logs
-                    # Ensure current step is in list (it should be already added when created)
-                    if current_step not in test_steps:
-                        test_steps.append(current_step)
-                is_in_end_phase = True
-                is_in_step = False
-                current_step = None
-                
-        if current_step:
-            current_step['logs'] = current_step_logs
-            if current_step not in test_steps:
-                test_steps.append(current_step)
-                
-        test_methods_count = len(test_methods)
-        concurrent_line = next((l for l in lines if '开始并发执行' in l and '个独立浏览器实例' in l), None)
-        if concurrent_line:
-            match = re.search(r'开始并发执行\s*(\d+)\s*个独立浏览器实例', concurrent_line)
-            if match:
-                test_methods_count = int(match.group(1))
-                
-        return {
-            'testStepsCount': len(test_steps),
-            'testMethodsCount': test_methods_count,
-            'screenshotsCount': len(screenshots),
-            'testSteps': test_steps,
-            'initLogs': init_logs,
-            'endLogs': end_logs,
-            'screenshots': screenshots
-        }
+        parser = AutomationLogParser()
+        parser.feed(log_content)
+        return parser.finish()
 
     @staticmethod
     def generate_log_html(log_content):
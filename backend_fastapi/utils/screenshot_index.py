@@ -0,0 +1,94 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+# page_screenshot 写入的截图目录
+SCREENSHOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'IMG_LOGS')
+
+# 截图查找目录，按优先级排列（与报告原有的查找顺序一致，最后是 page_screenshot 的写入目录）
+SCREENSHOT_DIRS: List[str] = [
+    os.path.join('D:\\', 'UiAutomationProject', 'IMG_LOGS'),
+    os.path.join(os.getcwd(), 'UiAutomationProject', 'IMG_LOGS'),
+    SCREENSHOT_DIR,
+]
+
+SCREENSHOT_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp')
+
+
+class ScreenshotIndex:
+    """
+    截图文件索引：文件名 -> 实际路径
+    启动时扫描一次截图目录，page_screenshot 写入后增量登记；
+    执行用例的子进程中写入的截图在首次查询时按目录逐个定位（每个目录一次 stat，不做目录扫描）后登记
+    """
+
+    _index: Dict[str, str] = {}
+    _lock = threading.Lock()
+    _built = False
+
+    @classmethod
+    def build(cls) -> int:
+        """扫描截图目录建立索引，返回索引的文件数"""
+        index = {}
+        for directory in SCREENSHOT_DIRS:
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.lower().endswith(SCREENSHOT_EXTENSIONS):
+                        # 优先级高的目录先登记
+                        index.setdefault(entry.name, entry.path)
+        with cls._lock:
+            # 构建期间登记的新截图保留
+            for name, file_path in cls._index.items():
+                index.setdefault(name, file_path)
+            cls._index = index
+            cls._built = True
+        return len(index)
+
+    @classmethod
+    def register(cls, file_path: str):
+        """登记新写入的截图"""
+        if not file_path:
+            return
+        name = os.path.basename(file_path)
+        with cls._lock:
+            cls._index[name] = os.path.abspath(file_path)
+
+    @classmethod
+    def discard(cls, name: str):
+        """移除已失效（文件被删除）的索引项"""
+        with cls._lock:
+            cls._index.pop(name, None)
+
+    @staticmethod
+    def file_name(name_or_path: str) -> Optional[str]:
+        """从文件名或日志中的任意路径（Windows/Posix）提取文件名，拒绝不是截图的文件"""
+        if not name_or_path:
+            return None
+        name = "".join(name_or_path.split()).replace('\\', '/').rsplit('/', 1)[-1]
+        if not name or name in ('.', '..') or not name.lower().endswith(SCREENSHOT_EXTENSIONS):
+            return None
+        return name
+
+    @classmethod
+    def lookup(cls, name_or_path: str) -> Optional[str]:
+        """
+        按文件名查找截图的实际路径
+        :param name_or_path: 文件名或日志中记录的路径（只取文件名，忽略盘符、目录差异）
+        """
+        name = cls.file_name(name_or_path)
+        if not name:
+            return None
+        file_path = cls._index.get(name)
+        if file_path:
+            return file_path
+
+        # 未命中：可能是其他进程刚写入的截图，在截图目录中直接定位
+        for directory in SCREENSHOT_DIRS:
+            candidate = os.path.join(directory, name)
+            if os.path.isfile(candidate):
+                with cls._lock:
+                    cls._index.setdefault(name, candidate)
+                return cls._index[name]
+        return None
@@ -14,6 +14,7 @@ from typing import List, Dict, Any, Optional, Tuple
 from playwright.async_api import Page, Browser, Locator
 from playwright.async_api import expect
 from backend_fastapi.utils.LogManeger import log_info
+from backend_fastapi.utils.screenshot_index import ScreenshotIndex, SCREENSHOT_DIR
 from .hybrid_image_manager import HybridImageManager
 from .captcha_solver import CaptchaSolver
 # 注释掉 scikit-image 导入，使用 OpenCV 替代
@@ -1212,10 +1213,11 @@ class UIOperations:
                 raise Exception("BROWSER_CLOSED_BY_USER")
             
             # 使用后端路径
-            screenshot_path = path.join(path.dirname(path.dirname(__file__)), 'IMG_LOGS',
+            screenshot_path = path.join(SCREENSHOT_DIR,
                                       f'{func_name}_{test_step}_{datetime.fromtimestamp(time.time()).strftime("%Y_%m_%d_%H_%M_%S")}.png')
             
             await self.page.screenshot(path=screenshot_path)
+            ScreenshotIndex.register(screenshot_path)
             log_info(f"[{self.task_id}] 测试步骤_{test_step}_截图成功保存: {screenshot_path}")
             return screenshot_path
             
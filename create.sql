@@ -800,3 +800,116 @@ CREATE TABLE IF NOT EXISTS test_plan (
 ALTER TABLE test_plan ADD COLUMN project_id INT DEFAULT NULL COMMENT '所属项目ID';
 ALTER TABLE test_plan ADD INDEX idx_project_id (project_id);
 ALTER TABLE test_plan ADD COLUMN associated_case_ids JSON DEFAULT NULL COMMENT '关联测试用例ID列表';
+
+-- 2026-10-18 Append-only execution log lines (Database: automation)
+ALTER TABLE automation_executions ADD COLUMN log_line_seq INT DEFAULT 0 COMMENT '已分配的日志行序号';
+
+CREATE TABLE IF NOT EXISTS `automation_execution_log_lines` (
+  `execution_id` int NOT NULL COMMENT '关联automation_executions表ID',
+  `seq` int NOT NULL COMMENT '执行内日志行序号(从1开始)',
+  `method_name` varchar(100) COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT '测试方法名称',
+  `step_number` int DEFAULT NULL COMMENT '测试步骤号',
+  `level` varchar(20) COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT '日志级别',
+  `content` text COLLATE utf8mb4_unicode_ci COMMENT '日志内容',
+  `created_at` datetime DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+  PRIMARY KEY (`execution_id`, `seq`),
+  KEY `idx_execution_method` (`execution_id`, `method_name`, `seq`),
+  KEY `idx_execution_step` (`execution_id`, `step_number`, `seq`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='自动化测试执行日志行表';
+
+-- 2026-10-18 Persisted pre-parsed execution log structure (Database: automation)
+ALTER TABLE automation_executions ADD COLUMN parsed_log LONGBLOB DEFAULT NULL COMMENT '预解析日志结构(zlib压缩JSON)';
+ALTER TABLE automation_executions ADD COLUMN parsed_log_version INT DEFAULT NULL COMMENT '预解析日志结构版本';
+
+-- 2026-10-18 Report aggregation index on executions (Database: automation)
+ALTER TABLE automation_executions ADD INDEX idx_project_start_time (`project_id`, `start_time`, `status`, `end_time`);
+
+-- 2026-10-18 Daily execution rollup (Database: automation)
+CREATE TABLE IF NOT EXISTS `automation_execution_daily_stats` (
+  `stat_date` date NOT NULL COMMENT '统计日期(执行结束日期)',
+  `automation_project_id` int NOT NULL COMMENT '关联automation_projects表ID',
+  `product_package_name` varchar(255) COLLATE utf8mb4_unicode_ci NOT NULL DEFAULT '' COMMENT '产品包名',
+  `status` varchar(50) COLLATE utf8mb4_unicode_ci NOT NULL COMMENT '执行状态',
+  `execution_count` int NOT NULL DEFAULT 0 COMMENT '执行次数',
+  `updated_at` datetime DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+  PRIMARY KEY (`stat_date`, `automation_project_id`, `product_package_name`, `status`),
+  KEY `idx_project_date` (`automation_project_id`, `stat_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='自动化测试执行日汇总表';
+
+ALTER TABLE automation_executions ADD INDEX idx_project_end_time (`project_id`, `end_time`, `status`);
+ALTER TABLE automation_executions ADD INDEX idx_end_time (`end_time`);
+
+-- 回填历史数据: python -m backend_fastapi.tasks.execution_stats_tasks
+
+-- 2026-10-18 Normalized automation project product packages (Database: automation)
+CREATE TABLE IF NOT EXISTS `automation_project_products` (
+  `id` bigint NOT NULL AUTO_INCREMENT COMMENT '主键ID',
+  `automation_project_id` int NOT NULL COMMENT '关联automation_projects表ID',
+  `project_id` int DEFAULT NULL COMMENT '关联projects表ID(未匹配到产品时为空)',
+  `product_code` varchar(255) COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT '产品编号(product_ids中的原始值)',
+  `product_package_name` varchar(255) COLLATE utf8mb4_unicode_ci NOT NULL DEFAULT '' COMMENT '产品包名',
+  `created_at` datetime DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+  PRIMARY KEY (`id`),
+  KEY `idx_automation_project` (`automation_project_id`),
+  KEY `idx_package_automation_project` (`product_package_name`, `automation_project_id`),
+  KEY `idx_project_automation_project` (`project_id`, `automation_project_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='自动化测试案例-产品包关联表';
+
+-- 回填已有测试案例: python -m backend_fastapi.tasks.automation_project_product_tasks
+
+-- 2026-10-18 Append-only user activity feed (Database: project_management_platform)
+CREATE TABLE IF NOT EXISTS `sys_user_activity` (
+  `activity_id` bigint NOT NULL AUTO_INCREMENT COMMENT '动态ID',
+  `username` varchar(30) COLLATE utf8mb4_unicode_ci NOT NULL COMMENT '操作人账号',
+  `action` varchar(20) COLLATE utf8mb4_unicode_ci NOT NULL COMMENT '操作(新建了/更新了/执行了)',
+  `target_type` varchar(50) COLLATE utf8mb4_unicode_ci NOT NULL COMMENT '对象类型(requirement/sub_requirement/task/defect/automation_project)',
+  `target_id` bigint NOT NULL COMMENT '对象ID(执行动态为执行记录ID)',
+  `target_name` varchar(500) COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT '对象名称',
+  `project_name` varchar(255) COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT '所属项目/产品包名称',
+  `status` varchar(50) COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT '操作时对象的状态',
+  `content` varchar(600) COLLATE utf8mb4_unicode_ci DEFAULT NULL COMMENT '动态内容',
+  `extra` text COLLATE utf8mb4_unicode_ci COMMENT '附加信息(JSON)',
+  `create_time` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '操作时间',
+  PRIMARY KEY (`activity_id`),
+  KEY `idx_username_time` (`username`, `create_time`, `activity_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='用户操作动态表';
+
+-- 回填历史动态: python -m backend_fastapi.tasks.activity_tasks
+
+-- 2026-10-18 Workbench todo pagination indexes (Database: project_management_platform)
+ALTER TABLE pm_requirement ADD INDEX idx_assignee_update_time (`assignee_id`, `del_flag`, `update_time`);
+ALTER TABLE pm_sub_requirement ADD INDEX idx_assignee_update_time (`assignee_id`, `del_flag`, `update_time`);
+ALTER TABLE pm_task ADD INDEX idx_assignee_update_time (`assignee_id`, `del_flag`, `update_time`);
+ALTER TABLE pm_defect ADD INDEX idx_assignee_update_time (`assignee_id`, `del_flag`, `update_time`);
+ALTER TABLE pm_defect ADD INDEX idx_reporter_update_time (`reporter_id`, `del_flag`, `update_time`);
+
+-- 2026-10-18 Materialized requirement progress (Database: project_management_platform)
+-- pm_requirement.progress 由子需求/任务变更维护，上线后回填: python -m backend_fastapi.tasks.requirement_progress_tasks
+ALTER TABLE pm_task ADD INDEX idx_sub_requirement_id (`sub_requirement_id`);
+
+-- 2026-10-18 Full-text search on title/code (Database: project_management_platform)
+-- 使用 ngram 分词（ngram_token_size 默认 2，需与 search_service.NGRAM_TOKEN_SIZE 一致）
+-- 建议在 my.cnf 中设置 innodb_ft_enable_stopword=OFF，避免包含停用词的 ngram 被忽略
+ALTER TABLE pm_requirement ADD FULLTEXT INDEX ft_title_code (`title`, `req_code`) WITH PARSER ngram;
+ALTER TABLE pm_sub_requirement ADD FULLTEXT INDEX ft_title_code (`title`, `sub_req_code`) WITH PARSER ngram;
+ALTER TABLE pm_task ADD FULLTEXT INDEX ft_title_code (`title`, `task_code`) WITH PARSER ngram;
+ALTER TABLE pm_defect ADD FULLTEXT INDEX ft_title_code (`title`, `defect_code`) WITH PARSER ngram;
+
+-- 2026-10-18 Keyset pagination indexes (Database: project_management_platform)
+-- InnoDB 二级索引末尾隐含主键，(筛选列, 排序键) 即覆盖游标条件 (排序键, 主键)
+ALTER TABLE pm_requirement ADD INDEX idx_del_create_time (`del_flag`, `create_time`);
+ALTER TABLE pm_sub_requirement ADD INDEX idx_requirement_sort (`requirement_id`, `del_flag`, `sort_order`);
+ALTER TABLE pm_defect ADD INDEX idx_del_create_time (`del_flag`, `create_time`);
+
+-- 2026-10-18 Keyset pagination indexes (Database: automation)
+ALTER TABLE automation_projects ADD INDEX idx_del_updated_at (`del_flag`, `updated_at`);
+ALTER TABLE automation_executions ADD INDEX idx_start_time (`start_time`);
+
+-- 2026-10-18 Block-allocated business code sequences (Database: project_management_platform)
+-- 序列行在首次分配时自动创建并从现有最大编号续接，也可提前插入: requirement / sub_requirement / task / test_case
+CREATE TABLE IF NOT EXISTS `sys_code_sequence` (
+  `seq_name` varchar(50) NOT NULL COMMENT '序列名',
+  `next_value` bigint NOT NULL COMMENT '下一个可分配的值',
+  `update_time` datetime DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
+  PRIMARY KEY (`seq_name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci COMMENT='业务编号序列表';
@@ -11,7 +11,22 @@ export function generateReport(data) {
   return request({
     url: '/api/report/generate',
     method: 'post',
-    data,
-    responseType: 'blob'
+    data
+  })
+}
+
+export function getReportJob(jobId) {
+  return request({
+    url: `/api/report/jobs/${jobId}`,
+    method: 'get'
+  })
+}
+
+export function downloadReport(jobId) {
+  return request({
+    url: `/api/report/jobs/${jobId}/download`,
+    method: 'get',
+    responseType: 'blob',
+    timeout: 0
   })
 }
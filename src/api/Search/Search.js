@@ -0,0 +1,11 @@
+import request from '@/utils/request'
+
+// 跨需求、子需求、任务、缺陷的全局搜索
+// params: { keyword, types: 'requirement,sub_requirement,task,defect', page, page_size }
+export function searchAll(params) {
+  return request({
+    url: '/api/search',
+    method: 'get',
+    params
+  })
+}
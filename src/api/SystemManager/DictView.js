@@ -8,6 +8,15 @@ export function getDictDataByType(dictType) {
   })
 }
 
+// Get dictionary data of several types in one request
+export function getDictDataBatch(dictTypes) {
+  return request({
+    url: '/api/system/dict/data/batch',
+    method: 'get',
+    params: { dict_types: dictTypes.join(',') }
+  })
+}
+
 // Create dictionary data
 export function createDictData(data) {
   return request({
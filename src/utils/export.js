@@ -8,11 +8,13 @@ import { ElMessage } from 'element-plus'
  * @param {string} filename - 导出文件名
  */
 export async function exportData(url, params, filename = 'export.xlsx') {
+  // 按文件扩展名选择导出格式（后端支持 csv / xlsx）
+  const exportFormat = filename.toLowerCase().endsWith('.csv') ? 'csv' : 'xlsx'
   try {
     const response = await service({
       url: url,
       method: 'get',
-      params: { ...params, export: 1 }, // Assume backend handles 'export=1' or similar
+      params: { ...params, export: 1, export_format: exportFormat },
       responseType: 'blob'
     })
     